@@ -0,0 +1,123 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Micro-benchmark comparing the per subscription discounts and bonuses queries with the
+    matching indexes built once per billing run (`silver.matching`), for many global and targeted
+    discounts and bonuses.
+
+    Usage: python -m benchmarks.bench_discounts_matching [--subscriptions 1000] [--global 100]
+                                                         [--targeted 400] [--repeat 3]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import random
+
+from decimal import Decimal
+
+from benchmarks.utils import best_of, create_test_database, setup_django
+
+
+def populate(subscriptions, global_count, targeted_count):
+    from silver.fixtures.datasets import SyntheticDataset
+    from silver.models import Customer, Discount, Plan, Subscription
+    from silver.models.bonuses import Bonus
+
+    SyntheticDataset(customers=max(subscriptions // 10, 1), plans=10, subscriptions=subscriptions,
+                     months=1, discounts=0, bonuses=0).generate()
+
+    customers = list(Customer.objects.values_list('pk', flat=True))
+    plans = list(Plan.objects.values_list('pk', flat=True))
+    subscriptions = list(Subscription.objects.values_list('pk', flat=True))
+
+    rng = random.Random(0)
+    targets = [('customers', 'filter_customers', customers),
+               ('plans', 'filter_plans', plans),
+               ('subscriptions', 'filter_subscriptions', subscriptions)]
+
+    discounts = Discount.objects.bulk_create([
+        Discount(name='Discount {}'.format(index), percentage=Decimal(10))
+        for index in range(global_count + targeted_count)
+    ])
+    bonuses = Bonus.objects.bulk_create([
+        Bonus(name='Bonus {}'.format(index), amount=Decimal(10))
+        for index in range(global_count + targeted_count)
+    ])
+    discounts = list(Discount.objects.order_by('pk'))[-len(discounts):]
+    bonuses = list(Bonus.objects.order_by('pk'))[-len(bonuses):]
+
+    for index in range(targeted_count):
+        discount_field, bonus_field, values = targets[index % len(targets)]
+        sample = rng.sample(values, min(len(values), 5))
+
+        getattr(discounts[global_count + index], discount_field).add(*sample)
+        getattr(bonuses[global_count + index], bonus_field).add(*sample)
+
+
+def run(repeat):
+    from silver.matching import BonusesIndex, DiscountsIndex
+    from silver.models import Discount, Subscription
+    from silver.models.bonuses import Bonus
+
+    subscriptions = list(Subscription.objects.select_related('plan', 'customer'))
+
+    def queries():
+        return [
+            (sorted(discount.pk for discount in
+                    Discount.for_subscription(subscription).filter(enabled=True)),
+             sorted(bonus.pk for bonus in Bonus.for_subscription(subscription)))
+            for subscription in subscriptions
+        ]
+
+    def indexes():
+        discounts_index, bonuses_index = DiscountsIndex(), BonusesIndex()
+
+        return [
+            ([discount.pk for discount in discounts_index.for_subscription(subscription)],
+             [bonus.pk for bonus in bonuses_index.for_subscription(subscription)])
+            for subscription in subscriptions
+        ]
+
+    assert queries() == indexes()
+
+    queries_seconds = best_of(queries, repeat)
+    indexes_seconds = best_of(indexes, repeat)
+
+    print('{:<16}{:>12}'.format('method', 'seconds'))
+    print('{:<16}{:>12.4f}'.format('queries', queries_seconds))
+    print('{:<16}{:>12.4f}'.format('indexes', indexes_seconds))
+    print('speedup: {:.1f}x'.format(queries_seconds / indexes_seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscriptions', type=int, default=1000)
+    parser.add_argument('--global', dest='global_count', type=int, default=100)
+    parser.add_argument('--targeted', dest='targeted_count', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    populate(options.subscriptions, options.global_count, options.targeted_count)
+    run(options.repeat)
+
+
+if __name__ == '__main__':
+    main()
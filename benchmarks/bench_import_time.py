@@ -0,0 +1,98 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Measures the modules imported when a process sets up Django and loads silver (like a web
+    or Celery worker does), using `python -X importtime`, and fails if one of the heavy, rarely
+    used dependencies is imported eagerly again or if the setup exceeds `--max-ms`.
+
+    Usage: python -m benchmarks.bench_import_time [--top 15] [--max-ms 0]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.utils import ROOT_DIR
+
+
+# only imported by the code paths using them (PDF rendering, PDF merging, VAT validation)
+LAZY_MODULES = ('xhtml2pdf', 'reportlab', 'PyPDF2', 'pyvat')
+
+SETUP_CODE = 'import django; django.setup(); import silver.urls, silver.tasks'
+
+
+def import_times(code=SETUP_CODE):
+    """
+        :return: A dict mapping the imported modules to their cumulative import time, in
+        microseconds, along with the total import time.
+    """
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE',
+                                                                 'settings'))
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT_DIR,
+                            env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            check=True).stderr.decode('utf-8')
+
+    times, total = {}, 0
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # only the top level imports are counted in the total, the others are nested in them
+        if not name.startswith('  '):
+            total += int(cumulative)
+        times[name.strip()] = int(cumulative)
+
+    return times, total
+
+
+def eagerly_imported(times, modules=LAZY_MODULES):
+    return [module for module in modules if module in times]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float, default=0,
+                        help='Fail if the total import time exceeds it (default: no limit).')
+    options = parser.parse_args()
+
+    times, total = import_times()
+
+    print('{:<60}{:>12}'.format('module', 'ms'))
+    for name, microseconds in sorted(times.items(), key=lambda item: -item[1])[:options.top]:
+        print('{:<60}{:>12.1f}'.format(name, microseconds / 1000))
+    print('total: {:.1f}ms'.format(total / 1000))
+
+    errors = []
+    eager_modules = eagerly_imported(times)
+    if eager_modules:
+        errors.append('Eagerly imported: {}.'.format(', '.join(eager_modules)))
+    if options.max_ms and total / 1000 > options.max_ms:
+        errors.append('The imports took more than {}ms.'.format(options.max_ms))
+
+    if errors:
+        print('\n'.join(errors))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Micro-benchmark comparing the Fraction based money arithmetic, with its string round
+    trips, to the `silver.utils.numbers` helpers, for the discount and proration computations
+    made for each document entry. It doesn't need a database.
+
+    Usage: python -m benchmarks.bench_money [--entries 10000] [--repeat 5]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import random
+
+from decimal import Decimal
+from fractions import Fraction
+
+from benchmarks.utils import best_of
+
+
+def sample(entries):
+    rng = random.Random(0)
+
+    return [
+        (Decimal(rng.randint(0, 10000)) / Decimal(10000),
+         Decimal(rng.randint(0, 10 ** 7)).scaleb(-2),
+         Fraction(rng.randint(1, 31), 31))
+        for _ in range(entries)
+    ]
+
+
+def run(entries, repeat):
+    from silver.utils.numbers import quantize_fraction, quantize_product
+
+    values = sample(entries)
+
+    def fractions():
+        return [quantize_fraction(Fraction(str(percent)) * Fraction(str(amount)) * fraction)
+                for percent, amount, fraction in values]
+
+    def ratios():
+        return [quantize_product(percent, amount, fraction)
+                for percent, amount, fraction in values]
+
+    assert fractions() == ratios()
+
+    fractions_seconds = best_of(fractions, repeat)
+    ratios_seconds = best_of(ratios, repeat)
+
+    print('{:<16}{:>12}'.format('method', 'seconds'))
+    print('{:<16}{:>12.4f}'.format('fractions', fractions_seconds))
+    print('{:<16}{:>12.4f}'.format('ratios', ratios_seconds))
+    print('speedup: {:.1f}x'.format(fractions_seconds / ratios_seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    run(options.entries, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Micro-benchmark comparing the documents generation with and without the per run proration
+    cache (`silver.proration`), for customers with many discounts, bonuses and metered features.
+    Each generation is rolled back, so that all of them bill the same subscriptions.
+
+    Usage: python -m benchmarks.bench_proration_cache [--subscriptions 200] [--discounts 50]
+                                                      [--bonuses 50] [--metered-features 10]
+                                                      [--repeat 3] [--generation]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+
+from contextlib import contextmanager
+
+from mock import patch
+
+from benchmarks.utils import best_of, create_test_database, setup_django
+
+
+def populate(options):
+    from silver.fixtures.datasets import SyntheticDataset
+
+    dataset = SyntheticDataset(customers=max(options.subscriptions // 10, 1), plans=5,
+                               metered_features=options.metered_features,
+                               subscriptions=options.subscriptions, months=1,
+                               discounts=options.discounts, bonuses=options.bonuses)
+    dataset.generate()
+
+    return dataset.billing_date
+
+
+@contextmanager
+def disabled_proration_cache():
+    from silver.proration import ProrationCache
+
+    # an inactive cache, only used for the run's statistics
+    yield ProrationCache()
+
+
+def bench_prorations(billing_date, repeat):
+    """
+        Computes the prorations the way the documents generator does: the subscription's, then
+        each bonus' for each metered feature and each discount's for each entry.
+    """
+
+    from silver.documents_generator import DocumentsGenerator
+    from silver.models import Subscription
+    from silver.models.documents.entries import OriginType
+    from silver.proration import proration_cache
+    from silver.utils.dates import ONE_DAY, ONE_MONTH
+
+    generator = DocumentsGenerator()
+    cycles = []
+    for subscription in Subscription.objects.select_related('plan', 'customer'):
+        start_date = max(subscription.start_date, billing_date - ONE_MONTH)
+        end_date = billing_date - ONE_DAY
+        metered_features = list(subscription.plan.metered_features.all())
+
+        cycles.append((subscription, start_date, end_date, metered_features,
+                       generator.discounts_index.for_subscription(subscription),
+                       generator.bonuses_index.for_subscription(subscription)))
+
+    def prorations():
+        results = []
+        for subscription, start_date, end_date, metered_features, discounts, bonuses in cycles:
+            for origin_type in (OriginType.Plan, OriginType.MeteredFeature):
+                results.append(subscription._get_proration_status_and_fraction(
+                    start_date, end_date, origin_type
+                ))
+
+            for _ in metered_features:
+                for bonus in bonuses:
+                    results.append(bonus.extra_proration_fraction(
+                        subscription, start_date, end_date, OriginType.MeteredFeature
+                    ))
+
+                for discount in discounts:
+                    results.append(discount.extra_proration_fraction(
+                        subscription, start_date, end_date, OriginType.MeteredFeature
+                    ))
+
+        return results
+
+    def cached_prorations():
+        with proration_cache():
+            return prorations()
+
+    assert prorations() == cached_prorations()
+
+    return best_of(prorations, repeat), best_of(cached_prorations, repeat)
+
+
+def bench_generation(billing_date, repeat):
+    from django.db import transaction
+
+    from silver.documents_generator import DocumentsGenerator
+    from silver.models import BillingDocumentBase
+
+    def generate(cache):
+        with transaction.atomic():
+            if cache:
+                DocumentsGenerator().generate(billing_date=billing_date)
+            else:
+                with patch('silver.documents_generator.proration_cache',
+                           disabled_proration_cache):
+                    DocumentsGenerator().generate(billing_date=billing_date)
+
+            totals = sorted(str(document.total) for document in BillingDocumentBase.objects.all())
+            transaction.set_rollback(True)
+
+        return totals
+
+    assert generate(cache=False) == generate(cache=True)
+
+    return best_of(lambda: generate(cache=False), repeat), \
+        best_of(lambda: generate(cache=True), repeat)
+
+
+def report(name, uncached_seconds, cached_seconds):
+    print(name)
+    print('{:<16}{:>12}'.format('method', 'seconds'))
+    print('{:<16}{:>12.4f}'.format('uncached', uncached_seconds))
+    print('{:<16}{:>12.4f}'.format('cached', cached_seconds))
+    print('speedup: {:.1f}x'.format(uncached_seconds / cached_seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscriptions', type=int, default=200)
+    parser.add_argument('--discounts', type=int, default=50)
+    parser.add_argument('--bonuses', type=int, default=50)
+    parser.add_argument('--metered-features', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--generation', action='store_true',
+                        help='Also time the whole documents generation, which is dominated by '
+                             'the entries\' creation.')
+    options = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    billing_date = populate(options)
+    report('prorations', *bench_prorations(billing_date, options.repeat))
+    if options.generation:
+        report('\ndocuments generation', *bench_generation(billing_date, options.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Micro-benchmark measuring how fast querysets of the models using AutoCleanModelMixin are
+    materialized, compared to fetching the same rows as tuples.
+
+    Usage: python -m benchmarks.bench_queryset_iteration [--rows 10000] [--repeat 5]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+
+from benchmarks.utils import best_of, create_test_database, setup_django
+
+
+def model_copies(instance, count):
+    fields = [field for field in instance._meta.concrete_fields if not field.primary_key]
+
+    def copy():
+        # fields having a callable default (e.g. UUIDs) get a fresh value for each copy
+        return instance.__class__(**{
+            field.attname: (
+                field.get_default() if field.has_default() and callable(field.default)
+                else getattr(instance, field.attname)
+            )
+            for field in fields
+        })
+
+    return [copy() for _ in range(count)]
+
+
+def populate(rows):
+    from silver.fixtures.factories import (DocumentEntryFactory, InvoiceFactory,
+                                           TransactionFactory)
+    from silver.models import DocumentEntry, Invoice, Transaction
+
+    invoice = InvoiceFactory.create()
+    DocumentEntry.objects.bulk_create(
+        model_copies(DocumentEntryFactory.create(invoice=invoice), rows - 1)
+    )
+    Invoice.objects.bulk_create(model_copies(invoice, rows - 1))
+    Transaction.objects.bulk_create(
+        model_copies(TransactionFactory.create(), rows - 1)
+    )
+
+
+def run(rows, repeat):
+    from silver.models import BillingDocumentBase, DocumentEntry, Transaction
+
+    querysets = [
+        ('DocumentEntry', DocumentEntry.objects.all()),
+        ('BillingDocumentBase', BillingDocumentBase.objects.select_related(None)),
+        ('Transaction', Transaction.objects.all()),
+    ]
+
+    print('{:<22}{:>14}{:>14}{:>12}'.format('model', 'instances (s)', 'tuples (s)', 'overhead'))
+    for name, queryset in querysets:
+        instances = best_of(lambda: list(queryset.all()), repeat)
+        tuples = best_of(lambda: list(queryset.values_list()), repeat)
+
+        print('{:<22}{:>14.4f}{:>14.4f}{:>11.1f}x'.format(name, instances, tuples,
+                                                          instances / tuples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    populate(options.rows)
+    run(options.rows, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Compares two benchmark results files created by `python -m benchmarks.run`, printing the
+    timings side by side. Exits with status 1 if any timing regressed by more than the threshold.
+
+    Usage: python -m benchmarks.compare <baseline.json> <results.json> [--threshold 0.1]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import json
+import sys
+
+
+def flatten_timings(results, prefix=''):
+    timings = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+
+        key = '{}.{}'.format(prefix, name) if prefix else name
+        if 'seconds' in value:
+            timings[key] = value['seconds']
+        else:
+            timings.update(flatten_timings(value, key))
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('results')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='The relative slowdown considered a regression (default: 0.1).')
+    options = parser.parse_args()
+
+    with open(options.baseline) as baseline_file, open(options.results) as results_file:
+        baseline, results = json.load(baseline_file), json.load(results_file)
+
+    baseline_timings = flatten_timings(baseline['results'])
+    timings = flatten_timings(results['results'])
+
+    print('{:<50}{:>12}{:>12}{:>9}'.format('benchmark', baseline['revision'],
+                                           results['revision'], 'change'))
+
+    regressions = []
+    for key in sorted(set(baseline_timings) & set(timings)):
+        change = (timings[key] - baseline_timings[key]) / baseline_timings[key]
+        flag = ''
+        if change > options.threshold:
+            regressions.append(key)
+            flag = ' !'
+
+        print('{:<50}{:>12.4f}{:>12.4f}{:>+8.0%}{}'.format(key, baseline_timings[key],
+                                                           timings[key], change, flag))
+
+    if regressions:
+        print('\n{} regression(s) over {:.0%}.'.format(len(regressions), options.threshold))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+    Benchmark suite timing the main billing operations on synthetic datasets of different sizes.
+    The results are stored as JSON, so that they can be compared across commits using
+    `python -m benchmarks.compare`.
+
+    Usage: python -m benchmarks.run [--scales 1000,10000,100000] [--output results.json]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import datetime
+import json
+import os
+import platform
+
+from benchmarks.utils import (ROOT_DIR, best_of, create_test_database, git_revision,
+                              setup_django, timed)
+
+
+API_ENDPOINTS = ['invoice-list', 'proforma-list', 'customer-list', 'plan-list']
+
+
+def reset_database():
+    from django.core.management import call_command
+
+    call_command('flush', interactive=False, verbosity=0)
+
+
+def bench_dataset(scale, billing_date):
+    from silver.fixtures.datasets import SyntheticDataset
+
+    dataset = SyntheticDataset(customers=max(scale // 10, 1), plans=10,
+                               subscriptions=scale, billing_date=billing_date)
+    seconds, counts = timed(dataset.generate)
+
+    return {'seconds': seconds, 'counts': dict(counts)}
+
+
+def bench_generate_documents(billing_date):
+    from silver.documents_generator import DocumentsGenerator
+    from silver.models import BillingDocumentBase
+
+    seconds, _ = timed(lambda: DocumentsGenerator().generate(billing_date=billing_date))
+
+    return {'seconds': seconds, 'documents': BillingDocumentBase.objects.count()}
+
+
+def bench_issue_documents():
+    from silver.models import BillingDocumentBase
+
+    def issue_documents():
+        documents = BillingDocumentBase.objects.filter(state=BillingDocumentBase.STATES.DRAFT)
+        for document in documents:
+            document.issue()
+            document.save()
+
+        return len(documents)
+
+    seconds, documents = timed(issue_documents)
+
+    return {'seconds': seconds, 'documents': documents}
+
+
+def bench_render_pdfs(sample_size):
+    from silver.models import BillingDocumentBase
+
+    documents = list(BillingDocumentBase.objects.all()[:sample_size])
+    seconds, _ = timed(lambda: [document.generate_pdf(upload=False) for document in documents])
+
+    return {'seconds': seconds, 'documents': len(documents)}
+
+
+def bench_api_endpoints(repeat):
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from rest_framework.reverse import reverse
+    from rest_framework.test import APIClient
+
+    from silver.models import Customer
+
+    client = APIClient()
+    client.force_authenticate(user=get_user_model().objects.create_superuser(
+        'benchmark', 'benchmark@example.com', 'benchmark'
+    ))
+
+    urls = {endpoint: reverse(endpoint) for endpoint in API_ENDPOINTS}
+
+    customer = Customer.objects.annotate(subscriptions_count=Count('subscriptions')) \
+                               .order_by('-subscriptions_count').first()
+    urls['subscription-list'] = reverse('subscription-list',
+                                        kwargs={'customer_pk': customer.pk})
+
+    results = {}
+    for endpoint, url in urls.items():
+        results[endpoint] = {'seconds': best_of(lambda: client.get(url), repeat)}
+
+    return results
+
+
+def run_scale(scale, options):
+    billing_date = options.billing_date
+
+    results = {
+        'dataset': bench_dataset(scale, billing_date),
+        'generate_documents': bench_generate_documents(billing_date),
+    }
+    results['api'] = bench_api_endpoints(options.repeat)
+    results['issue_documents'] = bench_issue_documents()
+    # the documents' PDF objects are only created when the documents are issued
+    results['render_pdfs'] = bench_render_pdfs(options.pdf_sample)
+
+    return results
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1000',
+                        help='Comma separated numbers of subscriptions (default: 1000).')
+    parser.add_argument('--date', dest='billing_date', type=parse_date,
+                        default=datetime.date.today().replace(day=1),
+                        help='The billing date (format YYYY-MM-DD).')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='How many times the fast operations are repeated.')
+    parser.add_argument('--pdf-sample', dest='pdf_sample', type=int, default=10,
+                        help='How many documents are rendered as PDF.')
+    parser.add_argument('--output', help='The JSON results file (default: '
+                                         'benchmarks/results/<revision>.json).')
+    options = parser.parse_args()
+
+    setup_django()
+    create_test_database()
+
+    from django import get_version
+    from django.db import connection
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'created_at': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'django': get_version(),
+        'database': connection.vendor,
+        'billing_date': options.billing_date.isoformat(),
+        'results': {},
+    }
+
+    for scale in [int(scale) for scale in options.scales.split(',')]:
+        print('Running benchmarks for {} subscriptions...'.format(scale))
+        reset_database()
+        report['results'][str(scale)] = run_scale(scale, options)
+
+    output = options.output or os.path.join(ROOT_DIR, 'benchmarks', 'results',
+                                            '{}.json'.format(revision))
+    if not os.path.isdir(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)))
+
+    with open(output, 'w') as results_file:
+        json.dump(report, results_file, indent=2, sort_keys=True)
+
+    print('Results saved to {}.'.format(output))
+
+
+if __name__ == '__main__':
+    main()
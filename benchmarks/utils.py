@@ -0,0 +1,70 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import os
+import subprocess
+import sys
+import timeit
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+    import django
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+
+
+def create_test_database():
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+
+
+def best_of(func, repeat):
+    """
+        :return: The fastest of `repeat` timed calls of `func`, in seconds.
+    """
+
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def timed(func):
+    """
+        :return: A (seconds, result) tuple, after calling `func` once.
+    """
+
+    start = timeit.default_timer()
+    result = func()
+
+    return timeit.default_timer() - start, result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
@@ -21,8 +21,6 @@ from collections import OrderedDict, defaultdict
 from datetime import date
 from decimal import Decimal
 
-import requests
-from PyPDF2 import PdfFileReader, PdfFileMerger
 from dal import autocomplete
 from django.contrib.admin.utils import model_ngettext
 from django_fsm import TransitionNotAllowed
@@ -625,7 +623,7 @@ class DocumentEntryInline(TabularInline):
 
 class BillingDocumentForm(forms.ModelForm):
     transaction_currency = ChoiceField(
-        choices=(BLANK_CHOICE_DASH + list(currencies)), required=False,
+        choices=lambda: BLANK_CHOICE_DASH + list(currencies), required=False,
     )
 
     def __init__(self, *args, **kwargs):
@@ -889,6 +887,37 @@ class BillingDocumentAdmin(ModelAdmin):
     def _model_name(self):
         raise NotImplementedError
 
+    def _log_action(self, request, document, action):
+        LogEntry.objects.log_action(
+            user_id=request.user.id,
+            content_type_id=ContentType.objects.get_for_model(document).pk,
+            object_id=document.id,
+            object_repr=force_str(document),
+            action_flag=CHANGE,
+            change_message='{action} action initiated by user.'.format(
+                action=action.replace('_', ' ').strip().capitalize()
+            )
+        )
+
+    def _call_bulk_method_on_queryset(self, request, bulk_method, method, queryset, action):
+        """
+            Calls the multi-document variant of the action once, for all the documents. If some
+            of them can't be processed, the action is called for each document instead, to
+            report them individually.
+        """
+
+        documents = list(queryset)
+        try:
+            results = bulk_method(documents)
+        except (TransitionNotAllowed, ValueError):
+            return self._call_method_on_queryset(request, method, documents, action)
+
+        for document in documents:
+            self._log_action(request, document, action)
+
+        return OrderedDict((document, {'success': True, 'result': result})
+                           for document, result in zip(documents, results))
+
     def _call_method_on_queryset(self, request, method, queryset, action):
         results = {}
         for document in queryset:
@@ -899,16 +928,7 @@ class BillingDocumentAdmin(ModelAdmin):
 
                 document.save()
 
-                LogEntry.objects.log_action(
-                    user_id=request.user.id,
-                    content_type_id=ContentType.objects.get_for_model(document).pk,
-                    object_id=document.id,
-                    object_repr=force_str(document),
-                    action_flag=CHANGE,
-                    change_message='{action} action initiated by user.'.format(
-                        action=action.replace('_', ' ').strip().capitalize()
-                    )
-                )
+                self._log_action(request, document, action)
             except TransitionNotAllowed as error:
                 results[document]['result'] = mark_safe(error)
                 results[document]['success'] = False
@@ -940,7 +960,7 @@ class BillingDocumentAdmin(ModelAdmin):
         return parsed_results
 
     def perform_action(self, request, queryset, action,
-                       readable_action=None, readable_past_action=None):
+                       readable_action=None, readable_past_action=None, bulk_action=None):
         method = getattr(self._model, action, None)
         if not method:
             self.message_user(request, 'Illegal action.', level=messages.ERROR)
@@ -950,7 +970,12 @@ class BillingDocumentAdmin(ModelAdmin):
         readable_past_action = (readable_past_action if readable_past_action else
                                 "executed {action}".format(action=action))
 
-        results = self._call_method_on_queryset(request, method, queryset, action)
+        if bulk_action:
+            results = self._call_bulk_method_on_queryset(
+                request, getattr(self._model, bulk_action), method, queryset, action
+            )
+        else:
+            results = self._call_method_on_queryset(request, method, queryset, action)
         error_results = {document: result for document, result in results.items()
                          if not result['success']}
         success_results = {document: result for document, result in results.items()
@@ -1026,6 +1051,8 @@ class BillingDocumentAdmin(ModelAdmin):
     transactions.admin_order_field = '_total_in_transaction_currency'
 
     def _download_pdf(self, url, base_path):
+        import requests
+
         local_file_path = os.path.join(base_path, 'billing-temp-document.pdf')
         response = requests.get(url)
         response.encoding = 'utf-8'
@@ -1043,6 +1070,8 @@ class BillingDocumentAdmin(ModelAdmin):
     def download_selected_documents(self, request, queryset):
         # NOTE (important): this works only if the pdf is not stored on local
         # disk as it is fetched via HTTP
+        from PyPDF2 import PdfFileReader, PdfFileMerger
+
         now = timezone.now()
 
         queryset = queryset.filter(
@@ -1140,14 +1169,16 @@ class InvoiceAdmin(BillingDocumentAdmin):
 
     def create_storno(self, request, queryset):
         self.perform_action(request, queryset, 'create_storno', readable_action='create storno for',
-                            readable_past_action='created storno for')
+                            readable_past_action='created storno for',
+                            bulk_action='create_stornos')
 
     create_storno.short_description = 'Generate storno(s) for the selected invoice(s)'
 
     def clone(self, request, queryset):
         self.perform_action(request, queryset, 'clone_into_draft',
                             readable_action='generate draft clones for',
-                            readable_past_action='generated draft clones for')
+                            readable_past_action='generated draft clones for',
+                            bulk_action='clone_into_drafts')
 
     clone.short_description = 'Clone the selected invoice(s) into draft'
 
@@ -1209,7 +1240,8 @@ class ProformaAdmin(BillingDocumentAdmin):
     cancel.short_description = 'Cancel the selected proforma(s)'
 
     def clone(self, request, queryset):
-        self.perform_action(request, queryset, 'clone_into_draft')
+        self.perform_action(request, queryset, 'clone_into_draft',
+                            bulk_action='clone_into_drafts')
 
     clone.short_description = 'Clone the selected proforma(s) into draft'
 
@@ -0,0 +1,165 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import base64
+import heapq
+
+from collections import namedtuple
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class ChangesCursor(namedtuple('ChangesCursor', ['updated_at', 'rank', 'pk'])):
+    """
+        The position of a row within the changes feed. Rows are ordered by their modification
+        time, then by the rank of their source and finally by their primary key.
+    """
+
+    def encode(self):
+        value = '{}|{}|{}'.format(self.updated_at.isoformat(), self.rank, self.pk)
+
+        return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+    @classmethod
+    def decode(cls, value):
+        """
+            :raises ValueError: If the given value is not a valid cursor.
+        """
+
+        try:
+            updated_at, rank, pk = base64.urlsafe_b64decode(
+                value.encode('ascii')
+            ).decode('utf-8').split('|')
+            updated_at = parse_datetime(updated_at)
+            rank, pk = int(rank), int(pk)
+        except (TypeError, UnicodeError, ValueError):
+            raise ValueError('Invalid cursor.')
+
+        if not updated_at or not updated_at.tzinfo:
+            raise ValueError('Invalid cursor.')
+
+        return cls(updated_at, rank, pk)
+
+    @classmethod
+    def since(cls, updated_at):
+        """
+            :return: A cursor positioned before all the rows modified at or after the given time.
+        """
+
+        return cls(updated_at, -1, 0)
+
+
+class ChangeSource(object):
+    """
+        A model whose modified rows are part of the changes feed.
+
+        :param queryset: A callable returning the queryset used to load the rows, with the
+        relations required by the serializer.
+    """
+
+    def __init__(self, name, queryset, serializer_class, field='updated_at'):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.field = field
+
+    def get_queryset(self):
+        return self.queryset()
+
+    def modified_after(self, cursor, rank, until=None):
+        queryset = self.get_queryset().select_related(None).prefetch_related(None)
+        if until is not None:
+            queryset = queryset.filter(**{'{}__lte'.format(self.field): until})
+
+        if cursor is None:
+            return queryset
+
+        if rank > cursor.rank:
+            condition = Q(**{'{}__gte'.format(self.field): cursor.updated_at})
+        elif rank < cursor.rank:
+            condition = Q(**{'{}__gt'.format(self.field): cursor.updated_at})
+        else:
+            condition = (Q(**{'{}__gt'.format(self.field): cursor.updated_at}) |
+                         Q(**{self.field: cursor.updated_at, 'pk__gt': cursor.pk}))
+
+        return queryset.filter(condition)
+
+    def serialize(self, pks, context):
+        instances = self.get_queryset().filter(pk__in=pks)
+        data = self.serializer_class(instances, many=True, context=context).data
+
+        return {instance.pk: item for instance, item in zip(instances, data)}
+
+
+class ChangesFeed(object):
+    """
+        Lists the rows of several models modified after a cursor, in a stable order, so that
+        the feed can be consumed incrementally by passing back the cursor of the last row.
+
+        The sources' order is part of the cursors, so new sources must be appended.
+
+        The modification times are set when the rows are saved, not when their transactions are
+        committed, so a row may become visible after rows modified later than it were listed.
+        Listing only the rows modified before a settle window (see `changes`) keeps the cursors
+        from moving past such rows.
+    """
+
+    def __init__(self, sources):
+        self.sources = list(sources)
+
+    @property
+    def names(self):
+        return [source.name for source in self.sources]
+
+    def changes(self, cursor=None, limit=100, names=None, until=None):
+        """
+            :param until: If given, only the rows modified at or before it are listed.
+            :return: A tuple containing the cursors of the first `limit` rows modified after the
+            given cursor and whether there are more such rows.
+        """
+
+        keys = []
+        for rank, source in enumerate(self.sources):
+            if names and source.name not in names:
+                continue
+
+            rows = source.modified_after(cursor, rank, until) \
+                .order_by(source.field, 'pk') \
+                .values_list(source.field, 'pk')[:limit + 1]
+
+            keys.append([ChangesCursor(updated_at, rank, pk) for updated_at, pk in rows])
+
+        changes = list(islice(heapq.merge(*keys), limit + 1))
+
+        return changes[:limit], len(changes) > limit
+
+    def serialize(self, changes, context):
+        pks = {}
+        for change in changes:
+            pks.setdefault(change.rank, []).append(change.pk)
+
+        data = {
+            rank: self.sources[rank].serialize(rank_pks, context)
+            for rank, rank_pks in pks.items()
+        }
+
+        return [{
+            'type': self.sources[change.rank].name,
+            'updated_at': change.updated_at,
+            'data': data[change.rank].get(change.pk),
+        } for change in changes]
@@ -0,0 +1,100 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import hashlib
+
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def get_etag(request, *parts):
+    """
+        :return: An ETag identifying the representation of the given parts (usually a version
+        of the requested objects), as requested through the given request.
+    """
+
+    key = ':'.join([str(part) for part in parts] + [
+        request.get_host(), request.get_full_path(), request.META.get('HTTP_ACCEPT', '')
+    ])
+
+    return quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+class ConditionalGetMixin(object):
+    """
+        Adds ETag and Last-Modified headers, computed from the `updated_at` field of the
+        requested objects, to the GET responses. Conditional requests (If-None-Match,
+        If-Modified-Since) for unchanged objects are answered with 304 Not Modified, without
+        loading and serializing the objects.
+    """
+
+    last_modified_field = 'updated_at'
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return queryset.select_related(None).prefetch_related(None).order_by()
+
+    def get_conditional_validators(self, queryset):
+        validators = queryset.aggregate(last_modified=Max(self.last_modified_field),
+                                        count=Count('pk'))
+        if not validators['count']:
+            return None, None
+
+        last_modified = validators['last_modified']
+
+        # HTTP dates have a one second resolution, like the If-Modified-Since headers echoed
+        # back by the clients
+        return (get_etag(self.request, last_modified.isoformat(), validators['count']),
+                timegm(last_modified.utctimetuple()))
+
+    def conditional_response(self, queryset, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_validators(queryset)
+        if not etag:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_conditional_queryset(),
+                                         super(ConditionalListMixin, self).list,
+                                         request, *args, **kwargs)
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_conditional_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        return self.conditional_response(queryset,
+                                         super(ConditionalRetrieveMixin, self).retrieve,
+                                         request, *args, **kwargs)
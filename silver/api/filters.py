@@ -125,18 +125,26 @@ class BillingDocumentFilter(FilterSet):
     currency = MultipleCharFilter(field_name='currency')
     sales_tax_name = MultipleCharFilter(field_name='sales_tax_name')
     is_overdue = BooleanFilter(field_name='overdue', method='filter_is_overdue')
+    is_outstanding = BooleanFilter(field_name='outstanding', method='filter_is_outstanding')
 
     def filter_is_overdue(self, queryset, _, value):
         if value:
             return queryset.overdue()
         return queryset.not_overdue()
 
+    def filter_is_outstanding(self, queryset, _, value):
+        # the documents without a stored total (the drafts) are neither
+        queryset = queryset.with_balances()
+        if value:
+            return queryset.filter(outstanding_amount__gt=0)
+        return queryset.filter(outstanding_amount__lte=0)
+
     class Meta:
         model = BillingDocumentBase
         fields = ['id', 'state', 'number', 'customer_name', 'customer_company',
                   'provider_name', 'provider_company', 'issue_date', 'due_date',
                   'paid_date', 'cancel_date', 'currency', 'sales_tax_name',
-                  'is_overdue']
+                  'is_overdue', 'is_outstanding']
 
 
 class BonusFilter(FilterSet):
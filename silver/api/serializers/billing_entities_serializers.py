@@ -21,7 +21,7 @@ from rest_framework.relations import HyperlinkedRelatedField
 
 from silver.api.serializers.common import CustomerUrl
 from silver.api.serializers.subscriptions_serializers import SubscriptionUrl
-from silver.models import Provider, Customer
+from silver.models import Provider, Customer, CustomerBalance
 
 
 class ProviderSerializer(serializers.HyperlinkedModelSerializer):
@@ -97,3 +97,12 @@ class CustomerSerializer(serializers.HyperlinkedModelSerializer):
                   'sales_tax_number', 'sales_tax_name', 'sales_tax_percent',
                   'consolidated_billing', 'subscriptions', 'payment_methods',
                   'transactions', 'meta')
+
+
+class CustomerBalanceSerializer(serializers.ModelSerializer):
+    amount = serializers.DecimalField(max_digits=19, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CustomerBalance
+        fields = ('currency', 'amount', 'updated_at')
+        read_only_fields = fields
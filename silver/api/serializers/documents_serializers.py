@@ -21,7 +21,7 @@ from rest_framework.fields import JSONField, DecimalField
 from silver.api.serializers.common import CustomerUrl, PDFUrl
 from silver.api.serializers.transaction_serializers import TransactionSerializer
 from silver.models import DocumentEntry, Customer, Invoice, Proforma, BillingDocumentBase
-from silver.utils.serializers import AutoCleanSerializerMixin
+from silver.utils.serializers import AutoCleanSerializerMixin, FieldsSelectionSerializerMixin
 
 
 class DocumentEntrySerializer(AutoCleanSerializerMixin,
@@ -46,6 +46,16 @@ class DocumentEntrySerializer(AutoCleanSerializerMixin,
         }
 
 
+class DocumentEntryChangeSerializer(DocumentEntrySerializer):
+    class Meta(DocumentEntrySerializer.Meta):
+        fields = DocumentEntrySerializer.Meta.fields + ('invoice', 'proforma')
+        read_only_fields = fields
+        extra_kwargs = dict(DocumentEntrySerializer.Meta.extra_kwargs, **{
+            'invoice': {'view_name': 'invoice-detail'},
+            'proforma': {'view_name': 'proforma-detail'},
+        })
+
+
 class DocumentUrl(serializers.HyperlinkedIdentityField):
     def __init__(self, proforma_view_name, invoice_view_name, *args, **kwargs):
         # the view_name is required on HIF init, but we only know what it will
@@ -111,7 +121,7 @@ class DocumentSerializer(serializers.HyperlinkedModelSerializer):
         read_only_fields = fields
 
 
-class InvoiceSerializer(AutoCleanSerializerMixin,
+class InvoiceSerializer(FieldsSelectionSerializerMixin, AutoCleanSerializerMixin,
                         serializers.HyperlinkedModelSerializer):
     invoice_entries = DocumentEntrySerializer(many=True, required=False)
     pdf_url = PDFUrl(view_name='pdf', source='*', read_only=True)
@@ -135,8 +145,8 @@ class InvoiceSerializer(AutoCleanSerializerMixin,
                   'sales_tax_percent', 'currency', 'transaction_currency',
                   'transaction_xe_rate', 'transaction_xe_date', 'state', 'proforma',
                   'invoice_entries', 'total', 'total_in_transaction_currency',
-                  'pdf_url', 'transactions')
-        read_only_fields = ('total', 'total_in_transaction_currency')
+                  'pdf_url', 'transactions', 'updated_at')
+        read_only_fields = ('total', 'total_in_transaction_currency', 'updated_at')
         extra_kwargs = {
             'transaction_currency': {'required': False},
             'number': {'required': False},
@@ -159,6 +169,10 @@ class InvoiceSerializer(AutoCleanSerializerMixin,
 
             DocumentEntry.objects.create(**entry_dict)
 
+        if entries:
+            # the entries have touched the invoice
+            invoice.refresh_from_db(fields=['updated_at'])
+
         return invoice
 
     def update(self, instance, validated_data):
@@ -195,7 +209,7 @@ class InvoiceSerializer(AutoCleanSerializerMixin,
         return data
 
 
-class ProformaSerializer(AutoCleanSerializerMixin,
+class ProformaSerializer(FieldsSelectionSerializerMixin, AutoCleanSerializerMixin,
                          serializers.HyperlinkedModelSerializer):
     proforma_entries = DocumentEntrySerializer(many=True, required=False)
     pdf_url = PDFUrl(view_name='pdf', source='*', read_only=True)
@@ -211,9 +225,9 @@ class ProformaSerializer(AutoCleanSerializerMixin,
                   'sales_tax_percent', 'currency', 'transaction_currency',
                   'transaction_xe_rate', 'transaction_xe_date', 'state', 'invoice',
                   'proforma_entries', 'total', 'total_in_transaction_currency',
-                  'pdf_url', 'transactions')
+                  'pdf_url', 'transactions', 'updated_at')
         read_only_fields = ('archived_provider', 'archived_customer', 'total',
-                            'total_in_transaction_currency')
+                            'total_in_transaction_currency', 'updated_at')
         extra_kwargs = {
             'transaction_currency': {'required': False},
             'number': {'required': False},
@@ -234,6 +248,10 @@ class ProformaSerializer(AutoCleanSerializerMixin,
 
             DocumentEntry.objects.create(**entry_dict)
 
+        if entries:
+            # the entries have touched the proforma
+            proforma.refresh_from_db(fields=['updated_at'])
+
         return proforma
 
     def update(self, instance, validated_data):
@@ -268,3 +286,57 @@ class ProformaSerializer(AutoCleanSerializerMixin,
                   " Use the corresponding endpoint to update the state."
             raise serializers.ValidationError(msg)
         return data
+
+
+class DocumentSummarySerializer(FieldsSelectionSerializerMixin,
+                                serializers.HyperlinkedModelSerializer):
+    """
+        A read-only, list-optimized representation of Invoices and Proformas, without the
+        nested entries and transactions, but with their paid, pending and to be charged amounts.
+    """
+    pdf_url = PDFUrl(view_name='pdf', source='*', read_only=True)
+    customer = CustomerUrl(view_name='customer-detail', read_only=True)
+    total = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=True, read_only=True
+    )
+    total_in_transaction_currency = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=True, read_only=True,
+    )
+    amount_paid_in_transaction_currency = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=True, read_only=True,
+    )
+    amount_pending_in_transaction_currency = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=True, read_only=True,
+    )
+    amount_to_be_charged_in_transaction_currency = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=True, read_only=True,
+    )
+
+    class Meta:
+        fields = ('id', 'series', 'number', 'provider', 'customer', 'due_date',
+                  'issue_date', 'paid_date', 'cancel_date', 'sales_tax_name',
+                  'sales_tax_percent', 'currency', 'transaction_currency', 'state',
+                  'total', 'total_in_transaction_currency',
+                  'amount_paid_in_transaction_currency', 'amount_pending_in_transaction_currency',
+                  'amount_to_be_charged_in_transaction_currency', 'pdf_url', 'updated_at')
+        read_only_fields = fields
+
+
+class InvoiceSummarySerializer(DocumentSummarySerializer):
+    class Meta(DocumentSummarySerializer.Meta):
+        model = Invoice
+        fields = DocumentSummarySerializer.Meta.fields + ('proforma', )
+        read_only_fields = fields
+        extra_kwargs = {
+            'proforma': {'source': 'related_document', 'view_name': 'proforma-detail'}
+        }
+
+
+class ProformaSummarySerializer(DocumentSummarySerializer):
+    class Meta(DocumentSummarySerializer.Meta):
+        model = Proforma
+        fields = DocumentSummarySerializer.Meta.fields + ('invoice', )
+        read_only_fields = fields
+        extra_kwargs = {
+            'invoice': {'source': 'related_document', 'view_name': 'invoice-detail'}
+        }
@@ -18,13 +18,15 @@ from django.conf.urls import re_path
 
 from silver import views as silver_views
 from silver.api.views import billing_entities_views, bonus_views, documents_views, payment_method_views, \
-    plan_views, product_code_views, subscription_views, transaction_views, discount_views
+    plan_views, product_code_views, subscription_views, transaction_views, discount_views, changes_views
 
 urlpatterns = [
     re_path(r'^customers/$',
             billing_entities_views.CustomerList.as_view(), name='customer-list'),
     re_path(r'^customers/(?P<customer_pk>[0-9]+)/$',
             billing_entities_views.CustomerDetail.as_view(), name='customer-detail'),
+    re_path(r'^customers/(?P<customer_pk>[0-9]+)/balances/$',
+            billing_entities_views.CustomerBalanceList.as_view(), name='customer-balance-list'),
 
     re_path(r'^customers/(?P<customer_pk>[0-9]+)/subscriptions/$',
             subscription_views.SubscriptionList.as_view(), name='subscription-list'),
@@ -88,6 +90,8 @@ urlpatterns = [
 
     re_path(r'^invoices/$',
             documents_views.InvoiceListCreate.as_view(), name='invoice-list'),
+    re_path(r'^invoices/export\.(?P<export_format>csv|ndjson)$',
+            documents_views.DocumentsExportView.as_view(kind='invoice'), name='invoice-export'),
     re_path(r'^invoices/(?P<pk>[0-9]+)/$',
             documents_views.InvoiceRetrieveUpdate.as_view(), name='invoice-detail'),
     re_path(r'^invoices/(?P<document_pk>[0-9]+)/entries/$',
@@ -101,6 +105,8 @@ urlpatterns = [
 
     re_path(r'^proformas/$',
             documents_views.ProformaListCreate.as_view(), name='proforma-list'),
+    re_path(r'^proformas/export\.(?P<export_format>csv|ndjson)$',
+            documents_views.DocumentsExportView.as_view(kind='proforma'), name='proforma-export'),
     re_path(r'^proformas/(?P<pk>[0-9]+)/$',
             documents_views.ProformaRetrieveUpdate.as_view(), name='proforma-detail'),
     re_path(r'^proformas/(?P<document_pk>[0-9]+)/entries/$',
@@ -119,5 +125,10 @@ urlpatterns = [
             documents_views.PDFRetrieve.as_view(),
             name='pdf'),
     re_path(r'^documents/$',
-            documents_views.DocumentList.as_view(), name='document-list')
+            documents_views.DocumentList.as_view(), name='document-list'),
+    re_path(r'^documents/export\.(?P<export_format>csv|ndjson)$',
+            documents_views.DocumentsExportView.as_view(), name='document-export'),
+
+    re_path(r'^changes/$',
+            changes_views.ChangesList.as_view(), name='changes-list'),
 ]
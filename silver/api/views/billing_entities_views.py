@@ -15,6 +15,7 @@
 from __future__ import absolute_import
 
 from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import generics, permissions
@@ -22,9 +23,9 @@ from rest_framework_bulk import ListBulkCreateAPIView
 
 from silver.api.filters import CustomerFilter, ProviderFilter
 from silver.api.serializers.billing_entities_serializers import (
-    CustomerSerializer, ProviderSerializer
+    CustomerBalanceSerializer, CustomerSerializer, ProviderSerializer
 )
-from silver.models import Customer, Provider
+from silver.models import Customer, CustomerBalance, Provider
 
 
 class CustomerList(generics.ListCreateAPIView):
@@ -48,6 +49,21 @@ class CustomerDetail(generics.RetrieveUpdateDestroyAPIView):
     model = Customer
 
 
+class CustomerBalanceList(generics.ListAPIView):
+    """
+        Lists what the customer owes in each currency, as kept up to date by its ledger: the
+        issued documents' totals minus the settled transactions' amounts.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = CustomerBalanceSerializer
+
+    def get_queryset(self):
+        customer = get_object_or_404(Customer, pk=self.kwargs.get('customer_pk'))
+
+        return CustomerBalance.objects.filter(customer=customer)
+
+
 class ProviderListCreate(ListBulkCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ProviderSerializer
@@ -0,0 +1,148 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from rest_framework.views import APIView
+
+from silver.api.changes import ChangesCursor, ChangesFeed, ChangeSource
+from silver.api.serializers.documents_serializers import (
+    InvoiceSerializer, ProformaSerializer, DocumentEntryChangeSerializer
+)
+from silver.api.serializers.subscriptions_serializers import SubscriptionSerializer
+from silver.api.serializers.transaction_serializers import TransactionSerializer
+from silver.models import DocumentEntry, Invoice, Proforma, Subscription, Transaction
+
+
+def _transactions():
+    return Transaction.objects.select_related('payment_method__customer',
+                                              'invoice__provider', 'proforma__provider')
+
+
+def _documents(model, kind):
+    return model.objects.select_related('customer', 'provider', 'pdf', 'related_document') \
+        .prefetch_related(Prefetch('{}_transactions'.format(kind), queryset=_transactions()))
+
+
+CHANGES_FEED = ChangesFeed([
+    ChangeSource('invoice', lambda: _documents(Invoice, 'invoice'), InvoiceSerializer),
+    ChangeSource('proforma', lambda: _documents(Proforma, 'proforma'), ProformaSerializer),
+    ChangeSource('entry',
+                 lambda: DocumentEntry.objects.select_related('product_code',
+                                                              'invoice', 'proforma'),
+                 DocumentEntryChangeSerializer),
+    ChangeSource('transaction', _transactions, TransactionSerializer),
+    ChangeSource('subscription',
+                 lambda: Subscription.objects.select_related('plan', 'customer'),
+                 SubscriptionSerializer),
+])
+
+
+class ChangesList(APIView):
+    """
+        Lists the invoices, proformas, entries, transactions and subscriptions modified after
+        the given `cursor` (or at or after the `since` datetime), ordered by their modification
+        time. The returned `cursor` must be passed back to get the following changes.
+
+        Only the objects modified more than `SILVER_CHANGES_SETTLE_SECONDS` ago are listed, so
+        that the objects saved by transactions committed in the meantime are not skipped.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+    feed = CHANGES_FEED
+    page_size = api_settings.PAGE_SIZE or 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_settled_until(self):
+        settle_seconds = getattr(settings, 'SILVER_CHANGES_SETTLE_SECONDS', 60)
+
+        return timezone.now() - timedelta(seconds=settle_seconds)
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                return ChangesCursor.decode(cursor)
+            except ValueError as error:
+                raise ValidationError({'cursor': [str(error)]})
+
+        since = request.query_params.get('since')
+        if since:
+            updated_at = parse_datetime(since)
+            if not updated_at or not updated_at.tzinfo:
+                raise ValidationError({'since': ['Expected a datetime including its timezone.']})
+
+            return ChangesCursor.since(updated_at)
+
+        return None
+
+    def get_types(self, request):
+        types = request.query_params.get('types')
+        if not types:
+            return None
+
+        types = {name.strip() for name in types.split(',') if name.strip()}
+        unknown = types - set(self.feed.names)
+        if unknown:
+            raise ValidationError({'types': ['Unknown types: {}. Expected: {}.'.format(
+                ', '.join(sorted(unknown)), ', '.join(self.feed.names)
+            )]})
+
+        return types
+
+    def get(self, request, *args, **kwargs):
+        cursor = self.get_cursor(request)
+        changes, has_more = self.feed.changes(cursor, limit=self.get_page_size(request),
+                                              names=self.get_types(request),
+                                              until=self.get_settled_until())
+
+        if changes:
+            cursor = changes[-1]
+
+        results = self.feed.serialize(changes, context={'request': request, 'view': self})
+        next_cursor = cursor.encode() if cursor else None
+
+        headers = {}
+        if has_more:
+            url = remove_query_param(request.build_absolute_uri(), 'since')
+            headers['Link'] = '<{}>; rel="next"'.format(
+                replace_query_param(url, 'cursor', next_cursor)
+            )
+
+        return Response({
+            'cursor': next_cursor,
+            'has_more': has_more,
+            'results': results
+        }, headers=headers)
@@ -18,32 +18,131 @@ from django_filters.rest_framework import DjangoFilterBackend
 
 import django
 
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, Prefetch
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 
 from rest_framework import generics, permissions, filters, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404, ListAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from silver.api.conditional import ConditionalListMixin, ConditionalRetrieveMixin
 from silver.api.filters import InvoiceFilter, ProformaFilter, BillingDocumentFilter
 from silver.api.serializers.documents_serializers import (
-    InvoiceSerializer, DocumentEntrySerializer, ProformaSerializer, DocumentSerializer
+    InvoiceSerializer, DocumentEntrySerializer, ProformaSerializer, DocumentSerializer,
+    InvoiceSummarySerializer, ProformaSummarySerializer
 )
-from silver.models import Invoice, BillingDocumentBase, DocumentEntry, Proforma, PDF
+from silver.exports import DocumentsExport, EXPORT_FORMATS, filter_documents
+from silver.models import (
+    Invoice, BillingDocumentBase, DocumentEntry, Proforma, PDF, Transaction
+)
+
+
+BALANCE_FIELDS = {'amount_paid_in_transaction_currency', 'amount_pending_in_transaction_currency',
+                  'amount_to_be_charged_in_transaction_currency'}
+
+
+class DocumentListCreateMixin(object):
+    """
+        Lists documents through a fixed number of queries, prefetching only the relations needed
+        by the serialized fields.
+
+        `?view=summary` selects the slim representation of the documents, without their entries
+        and transactions, while `?fields=id,number,total` restricts the serialized fields.
+    """
+
+    summary_serializer_class = None
+
+    def get_kind(self):
+        raise NotImplementedError
+
+    @property
+    def is_listing(self):
+        return self.request is not None and self.request.method == 'GET'
+
+    def get_selected_fields(self):
+        if not self.is_listing:
+            return None
+
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+
+        return {field.strip() for field in fields.split(',') if field.strip()}
+
+    def get_serializer_class(self):
+        if self.is_listing and self.request.query_params.get('view') == 'summary':
+            return self.summary_serializer_class
+
+        return super(DocumentListCreateMixin, self).get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super(DocumentListCreateMixin, self).get_serializer_context()
+        context['fields'] = self.get_selected_fields()
 
+        return context
 
-class InvoiceListCreate(generics.ListCreateAPIView):
+    def get_queryset(self):
+        kind = self.get_kind()
+        # replace the managers' default prefetching with the one required by the fields
+        queryset = super(DocumentListCreateMixin, self).get_queryset().prefetch_related(None)
+
+        fields = set(self.get_serializer_class().Meta.fields)
+        selected_fields = self.get_selected_fields()
+        if selected_fields:
+            fields &= selected_fields
+
+        if 'customer' in fields:
+            queryset = queryset.select_related('customer')
+        if 'pdf_url' in fields:
+            queryset = queryset.select_related('pdf')
+
+        # the stored totals of the issued documents are used, but the drafts' totals are
+        # computed from their entries
+        if fields & {'{}_entries'.format(kind), 'total', 'total_in_transaction_currency',
+                     'amount_to_be_charged_in_transaction_currency'}:
+            entries = DocumentEntry.objects.select_related('product_code')
+            if kind == 'proforma':
+                # required by the entries' tax value, when they are shared with an invoice
+                entries = entries.select_related('invoice')
+
+            queryset = queryset.prefetch_related(
+                Prefetch('{}_entries'.format(kind), queryset=entries)
+            )
+
+        # the transactions' amounts are summed up by the documents' query
+        if fields & BALANCE_FIELDS:
+            queryset = queryset.with_balances()
+
+        if 'transactions' in fields:
+            transactions = Transaction.objects.select_related('payment_method__customer')
+            if kind == 'proforma':
+                # required by the transactions' provider, when they belong to an invoice too
+                transactions = transactions.select_related('invoice__provider')
+
+            queryset = queryset.select_related('provider').prefetch_related(
+                Prefetch('{}_transactions'.format(kind), queryset=transactions)
+            )
+
+        return queryset
+
+
+class InvoiceListCreate(ConditionalListMixin, DocumentListCreateMixin,
+                        generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = InvoiceSerializer
-    queryset = Invoice.objects.all()\
-        .select_related('related_document')\
-        .prefetch_related('invoice_transactions')
+    summary_serializer_class = InvoiceSummarySerializer
+    queryset = Invoice.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = InvoiceFilter
 
+    def get_kind(self):
+        return 'invoice'
 
-class InvoiceRetrieveUpdate(generics.RetrieveUpdateAPIView):
+
+class InvoiceRetrieveUpdate(ConditionalRetrieveMixin, generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = InvoiceSerializer
     queryset = Invoice.objects.all()
@@ -224,17 +323,20 @@ class InvoiceStateHandler(APIView):
         return Response(serializer.data)
 
 
-class ProformaListCreate(generics.ListCreateAPIView):
+class ProformaListCreate(ConditionalListMixin, DocumentListCreateMixin,
+                         generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ProformaSerializer
-    queryset = Proforma.objects.all()\
-        .select_related('related_document')\
-        .prefetch_related('proforma_transactions')
+    summary_serializer_class = ProformaSummarySerializer
+    queryset = Proforma.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ProformaFilter
 
+    def get_kind(self):
+        return 'proforma'
 
-class ProformaRetrieveUpdate(generics.RetrieveUpdateAPIView):
+
+class ProformaRetrieveUpdate(ConditionalRetrieveMixin, generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ProformaSerializer
     queryset = Proforma.objects.all()
@@ -392,3 +494,35 @@ class PDFRetrieve(generics.RetrieveAPIView):
     def get(self, *args, **kwargs):
         pdf = self.get_object()
         return HttpResponseRedirect(pdf.url)
+
+
+class DocumentsExportView(APIView):
+    """
+        Streams the documents matching the documents' filters, or their entries if
+        `?entries=true` is given, as CSV or NDJSON.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+    kind = None
+
+    def perform_content_negotiation(self, request, force=False):
+        # the exported formats are not DRF renderers, which are only used for errors
+        return super(DocumentsExportView, self).perform_content_negotiation(request, force=True)
+
+    def get(self, request, export_format, *args, **kwargs):
+        try:
+            queryset = filter_documents(request.query_params, kind=self.kind)
+        except DjangoValidationError as error:
+            raise ValidationError(error.message_dict)
+
+        entries = request.query_params.get('entries', '').lower() in ('true', '1')
+        export = DocumentsExport(queryset, entries=entries)
+
+        response = StreamingHttpResponse(export.lines(export_format),
+                                         content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = 'attachment; filename="{}{}.{}"'.format(
+            '{}s'.format(self.kind) if self.kind else 'documents',
+            '-entries' if entries else '', export_format
+        )
+
+        return response
@@ -26,6 +26,7 @@ from annoying.functions import get_object_or_None
 from django.utils.dateparse import parse_datetime, parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 
+from django.db.models import F
 from django.utils import timezone
 from django.utils.encoding import force_str
 
@@ -39,6 +40,7 @@ from silver.api.filters import MeteredFeaturesFilter, SubscriptionFilter
 from silver.api.serializers.common import MeteredFeatureSerializer
 from silver.api.serializers.subscriptions_serializers import SubscriptionSerializer, \
     SubscriptionDetailSerializer, MFUnitsLogSerializer
+from silver.metrics import METERED_FEATURE_UNITS_LOG_UPDATES
 from silver.models import MeteredFeature, Subscription, MeteredFeatureUnitsLog
 
 
@@ -241,9 +243,11 @@ class MeteredFeatureUnitsLogDetail(APIView):
             product_code__value=mf_product_code
         )
 
+        # ordered explicitly, as the logs' indexes don't imply an order
         logs = MeteredFeatureUnitsLog.objects.filter(
             metered_feature=metered_feature.pk,
-            subscription=subscription_pk)
+            subscription=subscription_pk
+        ).order_by('start_datetime', 'end_datetime', F('annotation').asc(nulls_first=True))
 
         serializer = MFUnitsLogSerializer(
             logs, many=True, context={'request': request}
@@ -379,6 +383,10 @@ class MeteredFeatureUnitsLogDetail(APIView):
                 annotation=annotation,
             )
 
+        METERED_FEATURE_UNITS_LOG_UPDATES.inc(
+            update_type=update_type if update_type in ('absolute', 'relative') else 'other'
+        )
+
         return Response(
             MFUnitsLogSerializer(matching_log).data,
             status=status.HTTP_200_OK
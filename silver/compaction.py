@@ -0,0 +1,136 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from silver.models import MeteredFeatureUnitsLog, MeteredFeatureUnitsLogArchive, Subscription
+from silver.models.documents.entries import OriginType
+
+
+def _billed_buckets_logs(subscription):
+    """
+        :return: An OrderedDict mapping (metered feature id, bucket start date, annotation) keys
+        to the subscription's units logs within the key's bucket, for the buckets whose metered
+        features are fully billed.
+    """
+
+    billed_up_to = subscription.latest_billing_log.metered_features_billed_up_to
+    logs = subscription.mf_log_entries.filter(
+        end_datetime__lte=datetime.combine(billed_up_to, datetime.max.time(),
+                                           tzinfo=timezone.utc)
+    ).order_by('metered_feature', 'start_datetime', 'pk')
+
+    buckets_logs = OrderedDict()
+    for log in logs:
+        reference_date = log.start_datetime.date()
+        bucket_start = subscription.bucket_start_date(reference_date=reference_date,
+                                                      origin_type=OriginType.MeteredFeature)
+        bucket_end = subscription.bucket_end_date(reference_date=reference_date,
+                                                  origin_type=OriginType.MeteredFeature)
+
+        if (not bucket_start or not bucket_end or bucket_end > billed_up_to or
+                log.end_datetime.date() > bucket_end):
+            continue
+
+        key = (log.metered_feature_id, bucket_start, log.annotation)
+        buckets_logs.setdefault(key, []).append(log)
+
+    return buckets_logs
+
+
+def compact_subscription_units_logs(subscription, archive=False, dry_run=False):
+    """
+        Replaces the subscription's units logs of each fully billed metered features bucket with
+        a single log per annotation, summing up their consumed units and spanning their
+        datetimes, so that the billing queries (filtering the logs by their datetimes) match it
+        whenever they matched all of them.
+
+        :param archive: if True, the replaced logs are copied to MeteredFeatureUnitsLogArchive.
+        :param dry_run: if True, only the statistics are computed.
+        :return: A Counter holding the number of `compacted` logs, of the `summary` logs
+            replacing them and of the `archived` logs.
+    """
+
+    stats = Counter()
+    if not subscription.latest_billing_log:
+        return stats
+
+    groups = [logs for logs in _billed_buckets_logs(subscription).values() if len(logs) > 1]
+    stats['compacted'] = sum(len(logs) for logs in groups)
+    stats['summary'] = len(groups)
+    if dry_run or not groups:
+        return stats
+
+    with transaction.atomic():
+        MeteredFeatureUnitsLog.objects.filter(
+            pk__in=[log.pk for logs in groups for log in logs]
+        ).delete()
+
+        summary_logs = []
+        for logs in groups:
+            summary_log = MeteredFeatureUnitsLog.objects.create(
+                subscription=subscription,
+                metered_feature_id=logs[0].metered_feature_id,
+                annotation=logs[0].annotation,
+                consumed_units=sum(log.consumed_units for log in logs),
+                start_datetime=min(log.start_datetime for log in logs),
+                end_datetime=max(log.end_datetime for log in logs),
+            )
+            summary_logs.append(summary_log)
+
+        if archive:
+            archived_logs = MeteredFeatureUnitsLogArchive.objects.bulk_create([
+                MeteredFeatureUnitsLogArchive(
+                    log_id=log.pk, subscription=subscription,
+                    metered_feature_id=log.metered_feature_id,
+                    consumed_units=log.consumed_units, annotation=log.annotation,
+                    start_datetime=log.start_datetime, end_datetime=log.end_datetime,
+                    summary_log=summary_log
+                )
+                for logs, summary_log in zip(groups, summary_logs) for log in logs
+            ])
+            stats['archived'] = len(archived_logs)
+
+    return stats
+
+
+def compact_units_logs(subscriptions=None, archive=False, dry_run=False):
+    """
+        Compacts the units logs of the given subscriptions (defaults to all the billed ones),
+        see `compact_subscription_units_logs`.
+
+        :return: A Counter holding the total statistics, along with the number of processed
+            `subscriptions`.
+    """
+
+    if subscriptions is None:
+        subscriptions = Subscription.objects.all()
+
+    subscriptions = subscriptions.exclude(latest_billing_log=None) \
+        .select_related('plan', 'latest_billing_log') \
+        .order_by('pk')
+
+    stats = Counter()
+    for subscription in subscriptions.iterator():
+        stats['subscriptions'] += 1
+        stats.update(compact_subscription_units_logs(subscription, archive=archive,
+                                                     dry_run=dry_run))
+
+    return stats
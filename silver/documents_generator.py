@@ -14,25 +14,35 @@
 
 from __future__ import absolute_import
 
+import cProfile
 import datetime as dt
+import json
 import logging
+import os
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 
 from decimal import Decimal
-from fractions import Fraction
 from typing import Tuple, Dict, List, Union
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.utils import timezone
 
+from silver.matching import BonusesIndex, DiscountsIndex
+from silver.metrics import DOCUMENTS_GENERATION_SECONDS
 from silver.models import (
-    Customer, Subscription, Proforma, Invoice, Provider, BillingLog, DocumentEntry, Plan
+    Customer, Subscription, Proforma, Invoice, Provider, BillingLog, DocumentEntry, Plan,
+    BillingRun
 )
-from silver.models.bonuses import Bonus
 from silver.models.discounts import Discount
+from silver.models.documents.base import deferred_billing_documents_touches
 from silver.models.documents.entries import OriginType, EntryInfo
-from silver.utils.dates import ONE_DAY
-from silver.utils.numbers import quantize_fraction
+from silver.proration import proration_cache
+from silver.utils.dates import ONE_DAY, billing_dates
+from silver.utils.numbers import quantize_product
+from silver.utils.profiling import PhaseMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +55,36 @@ class DiscountInfo:
 
 
 class DocumentsGenerator(object):
+    PHASES = ('subscription_selection', 'plan_cycles', 'metered_feature_cycles', 'discounts',
+              'finalization', 'issuing')
+
+    def __init__(self, profile_dir=None):
+        """
+        :param profile_dir: if set, each run is profiled and its cProfile output is written to
+            a file within this directory.
+        """
+
+        self.profile_dir = profile_dir
+        self.metrics = PhaseMetrics(self.PHASES)
+        self.billing_run = None
+        self._discounts_index = None
+        self._bonuses_index = None
+
+    @property
+    def discounts_index(self):
+        # built on first use, once per run
+        if self._discounts_index is None:
+            self._discounts_index = DiscountsIndex()
+
+        return self._discounts_index
+
+    @property
+    def bonuses_index(self):
+        if self._bonuses_index is None:
+            self._bonuses_index = BonusesIndex()
+
+        return self._bonuses_index
+
     def generate(self, subscription=None, billing_date=None, customers=None,
                  force_generate=False):
         """
@@ -69,15 +109,154 @@ class DocumentsGenerator(object):
                 documents for all the customers will be generated.
         """
 
-        if not subscription:
-            customers = customers or Customer.objects.all()
-            self._generate_all(billing_date=billing_date,
-                               customers=customers,
-                               force_generate=force_generate)
+        billing_date = billing_date or timezone.now().date()
+
+        self._run(billing_date, subscription=subscription, customers=customers,
+                  force_generate=force_generate)
+
+    def generate_range(self, from_date, to_date, subscription=None, customers=None,
+                       force_generate=False):
+        """
+        Catches up on the billing dates from `from_date` to `to_date` (inclusive), within a
+        single run, generating the same documents as calling `generate` for each of them, in
+        order.
+
+        The customers to bill are selected once for the whole range, along with the date from
+        which each of them may be due, so that each billing date only processes the customers
+        which may be due at that date.
+
+        :raises ValueError: if `from_date` is after `to_date`.
+        """
+
+        if from_date > to_date:
+            raise ValueError('The from date must not be after the to date.')
+
+        self._run(to_date, from_date=from_date, subscription=subscription, customers=customers,
+                  force_generate=force_generate)
+
+    def _run(self, billing_date, from_date=None, subscription=None, customers=None,
+             force_generate=False):
+        from_date = from_date or billing_date
+
+        self.metrics = PhaseMetrics(self.PHASES)
+        self._discounts_index = self._bonuses_index = None
+        started_at = timezone.now()
+        start = time.perf_counter()
+
+        profiler = cProfile.Profile() if self.profile_dir else None
+        if profiler:
+            profiler.enable()
+
+        try:
+            # the documents' entries are created in bulk, so their documents are touched at once,
+            # and the proration fractions are computed once per object, subscription and interval
+            with deferred_billing_documents_touches(), proration_cache() as cache:
+                if subscription:
+                    for date in billing_dates(from_date, billing_date):
+                        self._generate_for_single_subscription(subscription=subscription,
+                                                               billing_date=date,
+                                                               force_generate=force_generate)
+                elif from_date == billing_date:
+                    customers = customers or self._customers_to_bill(billing_date, force_generate)
+                    self._generate_all(billing_date=billing_date,
+                                       customers=customers,
+                                       force_generate=force_generate)
+                else:
+                    self._generate_all_between(from_date, billing_date, customers=customers,
+                                               force_generate=force_generate)
+
+                proration_stats = cache.as_dict()
+        finally:
+            if profiler:
+                profiler.disable()
+
+        self._report_run(billing_date, started_at, time.perf_counter() - start, profiler,
+                         proration_stats, from_date=from_date)
+
+    def _report_run(self, billing_date, started_at, duration, profiler=None,
+                    proration_stats=None, from_date=None):
+        summary = self.metrics.as_dict()
+        if proration_stats is not None:
+            summary['proration_cache'] = proration_stats
+        if from_date and from_date != billing_date:
+            summary['from_billing_date'] = from_date
+
+        if profiler:
+            profile_path = os.path.join(
+                self.profile_dir,
+                'generate_docs_{}.prof'.format(started_at.strftime('%Y%m%d%H%M%S%f'))
+            )
+            profiler.dump_stats(profile_path)
+            summary['profile'] = profile_path
+
+        DOCUMENTS_GENERATION_SECONDS.observe(duration)
+
+        self.billing_run = BillingRun.objects.create(
+            billing_date=billing_date, started_at=started_at, duration=duration, summary=summary
+        )
+
+        logger.info(json.dumps(dict(summary, event='billing_run', billing_date=billing_date,
+                                    duration=round(duration, 6)),
+                               cls=DjangoJSONEncoder, sort_keys=True))
+
+    def _customers_to_bill(self, billing_date, force_generate=False):
+        if force_generate:
+            return Customer.objects.all()
+
+        return Customer.objects.filter(pk__in=Subscription.objects.filter(
+            Subscription.possibly_due(billing_date)
+        ).values('customer'))
+
+    def _customers_due_dates(self, customer_ids, from_date):
+        """
+        :returns: A dict mapping the given customers' ids to the date from which they may have
+            to be billed, according to `Subscription.possibly_due`. The customers without any
+            active or canceled subscription are left out.
+        """
+
+        due_dates = {}
+        subscriptions = Subscription.objects.filter(
+            customer__in=customer_ids,
+            state__in=[Subscription.STATES.ACTIVE, Subscription.STATES.CANCELED]
+        ).values_list('customer', 'state', *Subscription.NEXT_BILLING_DATES_FIELDS)
+
+        for customer_id, state, plan_date, metered_features_date in subscriptions:
+            if state == Subscription.STATES.CANCELED or None in (plan_date,
+                                                                 metered_features_date):
+                due_date = from_date
+            else:
+                due_date = max(min(plan_date, metered_features_date), from_date)
+
+            if customer_id not in due_dates or due_date < due_dates[customer_id]:
+                due_dates[customer_id] = due_date
+
+        return due_dates
+
+    def _generate_all_between(self, from_date, to_date, customers=None, force_generate=False):
+        # the customers which may be due at any date of the range, in the daily runs' order
+        customers = list(customers or self._customers_to_bill(to_date, force_generate))
+
+        if force_generate:
+            due_dates = dict.fromkeys([customer.pk for customer in customers], from_date)
         else:
-            self._generate_for_single_subscription(subscription=subscription,
-                                                   billing_date=billing_date,
-                                                   force_generate=force_generate)
+            due_dates = self._customers_due_dates([customer.pk for customer in customers],
+                                                  from_date)
+
+        for billing_date in billing_dates(from_date, to_date):
+            due_customers = [customer for customer in customers
+                             if due_dates.get(customer.pk, to_date + ONE_DAY) <= billing_date]
+
+            self._generate_all(billing_date=billing_date, customers=due_customers,
+                               force_generate=force_generate)
+
+            # only the billed customers' next billing dates may have changed
+            if due_customers and not force_generate:
+                due_customer_ids = [customer.pk for customer in due_customers]
+                for customer_id in due_customer_ids:
+                    due_dates.pop(customer_id, None)
+
+                due_dates.update(self._customers_due_dates(due_customer_ids,
+                                                           billing_date + ONE_DAY))
 
     def _generate_all(self, billing_date=None, customers=None, force_generate=False):
         """
@@ -89,6 +268,8 @@ class DocumentsGenerator(object):
         # billing_date -> the date when the billing documents are issued.
 
         for customer in customers:
+            self.metrics.increment('customers')
+
             if customer.consolidated_billing:
                 self._generate_for_user_with_consolidated_billing(
                     customer, billing_date, force_generate
@@ -109,13 +290,29 @@ class DocumentsGenerator(object):
         })
 
     def get_subscriptions_prepared_for_billing(self, customer, billing_date, force_generate):
-        # Select all the active or canceled subscriptions
+        with self.metrics.phase('subscription_selection'):
+            return self._get_subscriptions_prepared_for_billing(customer, billing_date,
+                                                                force_generate)
+
+    def _get_subscriptions_prepared_for_billing(self, customer, billing_date, force_generate):
+        # Select the active or canceled subscriptions, skipping the ones whose next billing
+        # dates are not due yet
         subs_to_bill = []
-        criteria = {'state__in': [Subscription.STATES.ACTIVE,
-                                  Subscription.STATES.CANCELED]}
-        for subscription in customer.subscriptions.filter(**criteria):
+        subscriptions = customer.subscriptions.filter(
+            state__in=[Subscription.STATES.ACTIVE, Subscription.STATES.CANCELED]
+        ).select_related('latest_billing_log')
+        if not force_generate:
+            subscriptions = subscriptions.filter(Subscription.possibly_due(billing_date))
+
+        for subscription in subscriptions:
             to_bill = subscription.should_be_billed(billing_date) or force_generate
 
+            if not to_bill and subscription.state == Subscription.STATES.ACTIVE and None in (
+                subscription.next_plan_billing_date, subscription.next_metered_features_billing_date
+            ):
+                # set the unknown next billing dates, so that the subscription is skipped until due
+                subscription.update_next_billing_dates()
+
             if not to_bill and subscription.cancel_date:
                 billing_up_to_dates = subscription.billed_up_to_dates
                 to_bill = (
@@ -131,9 +328,11 @@ class DocumentsGenerator(object):
     def _bill_subscription_into_document(self, subscription, billing_date, document=None) \
             -> Tuple[Union[Invoice, Proforma], List[EntryInfo]]:
         if not document:
-            document = self._create_document(subscription, billing_date)
+            with self.metrics.phase('finalization'):
+                document = self._create_document(subscription, billing_date)
 
         self._log_subscription_billing(document, subscription)
+        self.metrics.increment('subscriptions')
 
         kwargs = subscription.billed_up_to_dates
 
@@ -145,21 +344,24 @@ class DocumentsGenerator(object):
 
         billing_log, entries_info = self.add_subscription_cycles_to_document(**kwargs)
         if subscription.state == Subscription.STATES.CANCELED:
-            subscription.end()
-            subscription.save()
+            with self.metrics.phase('finalization'):
+                subscription.end()
+                subscription.save()
 
         return document, entries_info
 
     def _create_discount_entries(self, entries_info: List[EntryInfo], invoice=None, proforma=None):
+        with self.metrics.phase('discounts'):
+            return self._create_discounts_entries(entries_info, invoice=invoice,
+                                                  proforma=proforma)
+
+    def _create_discounts_entries(self, entries_info: List[EntryInfo], invoice=None,
+                                  proforma=None):
         subscriptions = set([entry.subscription for entry in entries_info])
 
         discounts = {}
         for subscription in subscriptions:
-            sub_discounts = Discount.for_subscription(subscription).filter(
-                enabled=True
-            )
-
-            for discount in sub_discounts:
+            for discount in self.discounts_index.for_subscription(subscription):
                 if discount.id not in discounts:
                     discount.matching_subscriptions = [subscription]
                     discounts[discount.id] = discount
@@ -243,8 +445,8 @@ class DocumentsGenerator(object):
                     entry.subscription, start_date, end_date, entry.origin_type
                 )
 
-                entry_discount_amount = quantize_fraction(
-                    Fraction(str(discount.as_additive)) * Fraction(str(entry.amount)) * extra_proration_fraction
+                entry_discount_amount = quantize_product(
+                    discount.as_additive, entry.amount, extra_proration_fraction
                 )
 
                 discounts[discount] += entry_discount_amount
@@ -274,10 +476,8 @@ class DocumentsGenerator(object):
                 if not remaining_entry_amount:
                     continue
 
-                entry_discount_amount = quantize_fraction(
-                    Fraction(str(discount.as_additive)) *
-                    Fraction(str(remaining_entry_amount)) *
-                    extra_proration_fraction
+                entry_discount_amount = quantize_product(
+                    discount.as_additive, remaining_entry_amount, extra_proration_fraction
                 )
 
                 discounts[discount] += entry_discount_amount
@@ -392,12 +592,10 @@ class DocumentsGenerator(object):
 
             # TODO: Creating and then deleting the document in the DB is not ideal and this whole logic
             #       should be refactored.
-            if not document.entries.exists():
-                document.delete()
+            if self._delete_document_if_empty(document):
                 continue
 
-            if provider.default_document_state == Provider.DEFAULT_DOC_STATE.ISSUED:
-                document.issue()
+            self._issue_document(document, provider)
 
     def _generate_for_user_without_consolidated_billing(self, customer, billing_date,
                                                         force_generate):
@@ -421,12 +619,10 @@ class DocumentsGenerator(object):
 
             # TODO: Creating and then deleting the document in the DB is not ideal and this whole logic
             #       should be refactored.
-            if not document.entries.exists():
-                document.delete()
+            if self._delete_document_if_empty(document):
                 continue
 
-            if provider.default_document_state == Provider.DEFAULT_DOC_STATE.ISSUED:
-                document.issue()
+            self._issue_document(document, provider)
 
     def _generate_for_single_subscription(self, subscription=None, billing_date=None,
                                           force_generate=False):
@@ -439,14 +635,15 @@ class DocumentsGenerator(object):
 
         provider = subscription.provider
 
-        to_bill = subscription.should_be_billed(billing_date) or force_generate
+        with self.metrics.phase('subscription_selection'):
+            to_bill = subscription.should_be_billed(billing_date) or force_generate
 
-        if not to_bill and subscription.cancel_date:
-            billing_up_to_dates = subscription.billed_up_to_dates
-            to_bill = (
-                subscription.cancel_date < billing_up_to_dates["metered_features_billed_up_to"] and
-                subscription.cancel_date < billing_up_to_dates["plan_billed_up_to"]
-            )
+            if not to_bill and subscription.cancel_date:
+                billing_up_to_dates = subscription.billed_up_to_dates
+                to_bill = (
+                    subscription.cancel_date < billing_up_to_dates["metered_features_billed_up_to"] and
+                    subscription.cancel_date < billing_up_to_dates["plan_billed_up_to"]
+                )
 
         if not to_bill:
             return
@@ -458,14 +655,32 @@ class DocumentsGenerator(object):
 
         # TODO: Creating and then deleting the document in the DB is not ideal and this whole logic
         #       should be refactored.
-        if not document.entries.exists():
-            document.delete()
+        if self._delete_document_if_empty(document):
             return
 
         self._create_discount_entries(**kwargs)
 
-        if provider.default_document_state == Provider.DEFAULT_DOC_STATE.ISSUED:
+        self._issue_document(document, provider)
+
+    def _delete_document_if_empty(self, document):
+        with self.metrics.phase('finalization'):
+            entries_count = document.entries.count()
+            if entries_count:
+                self.metrics.increment('entries', entries_count)
+                return False
+
+            document.delete()
+            self.metrics.increment('documents_deleted')
+
+            return True
+
+    def _issue_document(self, document, provider):
+        if provider.default_document_state != Provider.DEFAULT_DOC_STATE.ISSUED:
+            return
+
+        with self.metrics.phase('issuing'):
             document.issue()
+            self.metrics.increment('documents_issued')
 
     def add_subscription_cycles_to_document(
             self, billing_date, metered_features_billed_up_to, plan_billed_up_to, subscription,
@@ -492,9 +707,10 @@ class DocumentsGenerator(object):
             skip_billing_plan = (still_billing_mfs and plan_now_billed_up_to > metered_features_now_billed_up_to)
 
             if still_billing_plan and not skip_billing_plan:
-                billed_up_to, entry_info = self._add_plan_cycle(
-                    billing_date, plan_now_billed_up_to, subscription, proforma=proforma, invoice=invoice
-                )
+                with self.metrics.phase('plan_cycles'):
+                    billed_up_to, entry_info = self._add_plan_cycle(
+                        billing_date, plan_now_billed_up_to, subscription, proforma=proforma, invoice=invoice
+                    )
 
                 if not billed_up_to:
                     still_billing_plan = False
@@ -507,9 +723,11 @@ class DocumentsGenerator(object):
             skip_billing_mfs = still_billing_plan and metered_features_now_billed_up_to > plan_now_billed_up_to
 
             if still_billing_mfs and not skip_billing_mfs:
-                billed_up_to, entry_info = self._add_mf_cycle(
-                    billing_date, metered_features_now_billed_up_to, subscription, proforma=proforma, invoice=invoice
-                )
+                with self.metrics.phase('metered_feature_cycles'):
+                    billed_up_to, entry_info = self._add_mf_cycle(
+                        billing_date, metered_features_now_billed_up_to, subscription,
+                        proforma=proforma, invoice=invoice
+                    )
 
                 if not billed_up_to:
                     still_billing_mfs = False
@@ -523,19 +741,32 @@ class DocumentsGenerator(object):
             if metered_features_now_billed_up_to == subscription.cancel_date:
                 break
 
-        billing_log = BillingLog.objects.create(
-            subscription=subscription,
-            invoice=invoice, proforma=proforma,
-            total=plan_amount + metered_features_amount,
-            plan_amount=plan_amount,
-            metered_features_amount=metered_features_amount,
-            billing_date=billing_date,
-            metered_features_billed_up_to=metered_features_now_billed_up_to,
-            plan_billed_up_to=plan_now_billed_up_to
-        )
+        with self.metrics.phase('finalization'):
+            billing_log = self._create_billing_log(
+                subscription, billing_date, invoice=invoice, proforma=proforma,
+                plan_amount=plan_amount, metered_features_amount=metered_features_amount,
+                plan_billed_up_to=plan_now_billed_up_to,
+                metered_features_billed_up_to=metered_features_now_billed_up_to
+            )
 
         return billing_log, entries_info
 
+    def _create_billing_log(self, subscription, billing_date, invoice, proforma, plan_amount,
+                            metered_features_amount, plan_billed_up_to,
+                            metered_features_billed_up_to):
+        # the subscription's latest billing log and next billing dates are updated along with it
+        with transaction.atomic():
+            return BillingLog.objects.create(
+                subscription=subscription,
+                invoice=invoice, proforma=proforma,
+                total=plan_amount + metered_features_amount,
+                plan_amount=plan_amount,
+                metered_features_amount=metered_features_amount,
+                billing_date=billing_date,
+                metered_features_billed_up_to=metered_features_billed_up_to,
+                plan_billed_up_to=plan_billed_up_to
+            )
+
     def _add_plan_cycle(self, billing_date, plan_billed_up_to, subscription, proforma=None, invoice=None):
         relative_start_date = plan_billed_up_to + ONE_DAY
         relative_end_date = subscription.bucket_end_date(
@@ -629,7 +860,7 @@ class DocumentsGenerator(object):
         if not should_bill_metered_features:
             return None, None
 
-        bonuses = Bonus.for_subscription(subscription)
+        bonuses = self.bonuses_index.for_subscription(subscription)
 
         if subscription.on_trial(relative_start_date):
             subscription._add_mfs_for_trial(
@@ -665,5 +896,6 @@ class DocumentsGenerator(object):
         document = DocumentModel.objects.create(provider=provider,
                                                 customer=customer,
                                                 currency=subscription.plan.currency)
+        self.metrics.increment('documents_created')
 
         return document
@@ -0,0 +1,212 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import csv
+import json
+
+from collections import OrderedDict
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q, prefetch_related_objects
+
+from silver.api.filters import BillingDocumentFilter, InvoiceFilter, ProformaFilter
+from silver.models import BillingDocumentBase, DocumentEntry, Invoice, Proforma
+
+
+EXPORT_FORMATS = OrderedDict([
+    ('csv', 'text/csv'),
+    ('ndjson', 'application/x-ndjson'),
+])
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _attribute(path):
+    def get_value(obj):
+        for name in path.split('.'):
+            obj = getattr(obj, name)
+            if obj is None:
+                return None
+
+        return obj
+
+    return get_value
+
+
+DOCUMENT_COLUMNS = OrderedDict((name, _attribute(path)) for name, path in [
+    ('id', 'id'),
+    ('kind', 'kind'),
+    ('series', 'series'),
+    ('number', 'number'),
+    ('state', 'state'),
+    ('provider_id', 'provider_id'),
+    ('provider', 'provider.billing_name'),
+    ('customer_id', 'customer_id'),
+    ('customer', 'customer.billing_name'),
+    ('customer_reference', 'customer.customer_reference'),
+    ('related_document_id', 'related_document_id'),
+    ('issue_date', 'issue_date'),
+    ('due_date', 'due_date'),
+    ('paid_date', 'paid_date'),
+    ('cancel_date', 'cancel_date'),
+    ('currency', 'currency'),
+    ('transaction_currency', 'transaction_currency'),
+    ('transaction_xe_rate', 'transaction_xe_rate'),
+    ('sales_tax_name', 'sales_tax_name'),
+    ('sales_tax_percent', 'sales_tax_percent'),
+    ('total', 'total'),
+    ('total_in_transaction_currency', 'total_in_transaction_currency'),
+])
+
+ENTRY_COLUMNS = OrderedDict((name, _attribute(path)) for name, path in [
+    ('id', 'id'),
+    ('description', 'description'),
+    ('unit', 'unit'),
+    ('quantity', 'quantity'),
+    ('unit_price', 'unit_price'),
+    ('product_code', 'product_code.value'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('prorated', 'prorated'),
+    ('total_before_tax', 'total_before_tax'),
+    ('tax_value', 'tax_value'),
+    ('total', 'total'),
+])
+
+DOCUMENT_COLUMNS_IN_ENTRIES = ('id', 'kind', 'series', 'number', 'state', 'customer_id',
+                               'currency')
+
+
+def filter_documents(data, kind=None):
+    """
+        :param data: The filters, as accepted by the documents' API endpoints.
+        :param kind: 'invoice', 'proforma' or None, for both invoices and proformas (only the
+        proformas without an invoice, like the `documents` endpoint).
+        :return: The filtered documents queryset.
+        :raises ValidationError: If the filters are not valid.
+    """
+
+    if kind == 'invoice':
+        filterset_class, queryset = InvoiceFilter, Invoice.objects.all()
+    elif kind == 'proforma':
+        filterset_class, queryset = ProformaFilter, Proforma.objects.all()
+    else:
+        filterset_class = BillingDocumentFilter
+        queryset = BillingDocumentBase.objects.filter(
+            Q(kind='invoice') | Q(kind='proforma', related_document=None)
+        )
+
+    filterset = filterset_class(data, queryset=queryset)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+
+    return filterset.qs
+
+
+class Echo(object):
+    """
+        A file-like object returning what is written to it, used to get the lines built by
+        `csv.writer` without buffering them.
+    """
+
+    def write(self, value):
+        return value
+
+
+class DocumentsExport(object):
+    """
+        Exports billing documents, or their entries, as CSV or NDJSON lines.
+
+        The documents are read through a server-side cursor, in chunks of `chunk_size`, and the
+        entries needed by each chunk are prefetched separately, so that the memory usage doesn't
+        depend on the number of exported documents.
+    """
+
+    def __init__(self, queryset, entries=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.queryset = queryset
+        self.entries = entries
+        self.chunk_size = chunk_size
+
+    @property
+    def columns(self):
+        if not self.entries:
+            return list(DOCUMENT_COLUMNS)
+
+        return (['document_{}'.format(name) for name in DOCUMENT_COLUMNS_IN_ENTRIES] +
+                list(ENTRY_COLUMNS))
+
+    def _prefetch_entries(self, documents):
+        for kind in ('invoice', 'proforma'):
+            kind_documents = [
+                document for document in documents
+                if document.kind == kind and (self.entries or document._total is None)
+            ]
+            if not kind_documents:
+                continue
+
+            entries = DocumentEntry.objects.select_related('product_code')
+            if kind == 'proforma':
+                # required by the entries' tax value, when they are shared with an invoice
+                entries = entries.select_related('invoice')
+
+            prefetch_related_objects(kind_documents,
+                                     Prefetch('{}_entries'.format(kind), queryset=entries))
+
+    def documents(self):
+        documents = self.queryset.select_related('customer', 'provider') \
+            .prefetch_related(None) \
+            .order_by('pk') \
+            .iterator(chunk_size=self.chunk_size)
+
+        while True:
+            chunk = list(islice(documents, self.chunk_size))
+            if not chunk:
+                return
+
+            self._prefetch_entries(chunk)
+            for document in chunk:
+                yield document
+
+    def rows(self):
+        for document in self.documents():
+            if not self.entries:
+                yield [get_value(document) for get_value in DOCUMENT_COLUMNS.values()]
+                continue
+
+            document_values = [DOCUMENT_COLUMNS[name](document)
+                               for name in DOCUMENT_COLUMNS_IN_ENTRIES]
+            for entry in document.entries:
+                yield document_values + [get_value(entry) for get_value in ENTRY_COLUMNS.values()]
+
+    def csv_lines(self):
+        writer = csv.writer(Echo())
+
+        yield writer.writerow(self.columns)
+        for row in self.rows():
+            yield writer.writerow(['' if value is None else value for value in row])
+
+    def ndjson_lines(self):
+        columns = self.columns
+        for row in self.rows():
+            yield json.dumps(OrderedDict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+    def lines(self, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError('Unknown export format: {}.'.format(export_format))
+
+        return getattr(self, '{}_lines'.format(export_format))()
@@ -0,0 +1,262 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import random
+
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from silver.models import (Customer, Provider, Plan, MeteredFeature, ProductCode, Subscription,
+                           MeteredFeatureUnitsLog, Discount)
+from silver.models.bonuses import Bonus
+from silver.utils.dates import ONE_DAY, ONE_MONTH
+
+
+class SyntheticDataset(object):
+    """
+        Generates a realistic billing dataset at a configurable scale: providers, customers,
+        plans with metered features, active subscriptions (some of them in trial), discounts,
+        bonuses and monthly usage logs.
+
+        The rows are inserted through `bulk_create`, skipping the models' validation and signals,
+        so that large datasets can be generated quickly. The same `seed` produces the same dataset.
+    """
+
+    def __init__(self, providers=2, customers=100, plans=5, metered_features=3,
+                 subscriptions=1000, months=3, trial_ratio=0.1, discounts=5, bonuses=5,
+                 billing_date=None, seed=0, batch_size=1000):
+        self.providers_count = providers
+        self.customers_count = customers
+        self.plans_count = plans
+        self.metered_features_count = metered_features
+        self.subscriptions_count = subscriptions
+        self.months = months
+        self.trial_ratio = trial_ratio
+        self.discounts_count = discounts
+        self.bonuses_count = bonuses
+        self.billing_date = (billing_date or timezone.now().date()).replace(day=1)
+        self.start_date = self.billing_date - ONE_MONTH * months
+        self.batch_size = batch_size
+
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.counts = OrderedDict()
+
+    def _bulk_create(self, model, objects, fetch_pks=True):
+        created = model._base_manager.bulk_create(objects, batch_size=self.batch_size)
+        name = str(model._meta.verbose_name_plural)
+        self.counts[name] = self.counts.get(name, 0) + len(created)
+
+        if fetch_pks and created and created[0].pk is None:
+            # Some databases don't return the primary keys of the bulk created rows. The rows
+            # were just inserted within the dataset's transaction, so they are the last ones.
+            pks = sorted(model._base_manager.order_by('-pk')
+                                            .values_list('pk', flat=True)[:len(created)])
+            for obj, pk in zip(created, pks):
+                obj.pk = pk
+                obj._state.adding = False
+
+        return created
+
+    def _bulk_create_relations(self, relation, pairs):
+        through = relation.through
+        source_field, target_field = (relation.field.m2m_field_name(),
+                                      relation.field.m2m_reverse_field_name())
+
+        through.objects.bulk_create(
+            [through(**{source_field: source, target_field: target}) for source, target in pairs],
+            batch_size=self.batch_size, ignore_conflicts=True
+        )
+
+    def _amount(self, low, high):
+        return Decimal(self.random.randint(low * 100, high * 100)) / 100
+
+    def generate_providers(self):
+        return self._bulk_create(Provider, [
+            Provider(name='Provider {}'.format(index), company='Provider {} SRL'.format(index),
+                     email='billing@provider{}.com'.format(index),
+                     address_1='Street {}'.format(index), city='City', country='RO',
+                     flow=self.random.choice([Provider.FLOWS.PROFORMA, Provider.FLOWS.INVOICE]),
+                     invoice_series='IS{}'.format(index), invoice_starting_number=1,
+                     proforma_series='PS{}'.format(index), proforma_starting_number=1)
+            for index in range(self.providers_count)
+        ])
+
+    def generate_plans(self, providers):
+        product_codes = self._bulk_create(ProductCode, [
+            ProductCode(value='dataset-{}-plan-{}'.format(self.seed, index))
+            for index in range(self.plans_count)
+        ] + [
+            ProductCode(value='dataset-{}-mf-{}'.format(self.seed, index))
+            for index in range(self.plans_count * self.metered_features_count)
+        ])
+        plan_product_codes = product_codes[:self.plans_count]
+        mf_product_codes = product_codes[self.plans_count:]
+
+        plans = self._bulk_create(Plan, [
+            Plan(name='Plan {}'.format(index), interval=Plan.INTERVALS.MONTH, interval_count=1,
+                 amount=self._amount(10, 500), currency='USD',
+                 trial_period_days=self.random.choice([0, 7, 14]),
+                 generate_after=0, enabled=True, private=False,
+                 product_code=product_code, provider=self.random.choice(providers))
+            for index, product_code in enumerate(plan_product_codes)
+        ])
+
+        metered_features = self._bulk_create(MeteredFeature, [
+            MeteredFeature(name='Feature {}'.format(index), unit='unit',
+                           price_per_unit=self._amount(0, 5),
+                           included_units=Decimal(self.random.randint(0, 1000)),
+                           included_units_during_trial=Decimal(self.random.randint(0, 100)),
+                           product_code=product_code)
+            for index, product_code in enumerate(mf_product_codes)
+        ])
+
+        plans_metered_features = {}
+        for index, plan in enumerate(plans):
+            plans_metered_features[plan.pk] = metered_features[
+                index * self.metered_features_count:(index + 1) * self.metered_features_count
+            ]
+
+        self._bulk_create_relations(Plan.metered_features, [
+            (plan, metered_feature)
+            for plan in plans
+            for metered_feature in plans_metered_features[plan.pk]
+        ])
+
+        return plans, plans_metered_features
+
+    def generate_customers(self):
+        return self._bulk_create(Customer, [
+            Customer(first_name='Customer', last_name=str(index),
+                     company='Customer {} SRL'.format(index),
+                     email='customer{}@example.com'.format(index),
+                     address_1='Street {}'.format(index), city='City', country='RO',
+                     consolidated_billing=self.random.random() < 0.5,
+                     customer_reference='customer-{}'.format(index),
+                     sales_tax_percent=Decimal('19.00'), sales_tax_name='VAT',
+                     payment_due_days=self.random.choice([5, 15, 30]))
+            for index in range(self.customers_count)
+        ])
+
+    def generate_subscriptions(self, plans, customers):
+        subscriptions = []
+        for index in range(self.subscriptions_count):
+            plan = self.random.choice(plans)
+            start_date = self.start_date + ONE_DAY * self.random.randint(0, 27)
+
+            trial_end = None
+            if plan.trial_period_days and self.random.random() < self.trial_ratio:
+                trial_end = start_date + ONE_DAY * (plan.trial_period_days - 1)
+
+            subscriptions.append(Subscription(
+                plan=plan, customer=self.random.choice(customers), start_date=start_date,
+                trial_end=trial_end, state=Subscription.STATES.ACTIVE,
+                reference='subscription-{}'.format(index)
+            ))
+
+        return self._bulk_create(Subscription, subscriptions)
+
+    def generate_discounts(self, plans, customers):
+        discounts = self._bulk_create(Discount, [
+            Discount(name='Discount {}'.format(index),
+                     percentage=Decimal(self.random.choice([5, 10, 15, 20, 25])),
+                     applies_to=self.random.choice(Discount.TARGET.values),
+                     discount_stacking_type=self.random.choice(Discount.STACKING_TYPES.values),
+                     duration_count=self.random.choice([None, 1, 3, 12]),
+                     duration_interval=Discount.DURATION_INTERVALS.BILLING_CYCLE)
+            for index in range(self.discounts_count)
+        ])
+
+        self._bulk_create_relations(Discount.plans, [
+            (discount, self.random.choice(plans)) for discount in discounts
+        ])
+        self._bulk_create_relations(Discount.customers, [
+            (discount, customer)
+            for discount in discounts
+            for customer in self.random.sample(customers, min(len(customers), 10))
+        ])
+
+        return discounts
+
+    def generate_bonuses(self, plans):
+        # Bonuses are not supported when billing metered features during trials
+        plans = [plan for plan in plans if not plan.trial_period_days]
+        if not plans:
+            return []
+
+        bonuses = self._bulk_create(Bonus, [
+            Bonus(name='Bonus {}'.format(index),
+                  amount=Decimal(self.random.randint(1, 100)) if index % 2 else None,
+                  amount_percentage=None if index % 2 else Decimal(self.random.randint(5, 50)))
+            for index in range(self.bonuses_count)
+        ])
+
+        self._bulk_create_relations(Bonus.filter_plans, [
+            (bonus, self.random.choice(plans)) for bonus in bonuses
+        ])
+
+        return bonuses
+
+    def _usage_logs(self, subscriptions, plans_metered_features):
+        for subscription in subscriptions:
+            month_start = subscription.start_date
+            while month_start < self.billing_date:
+                month_end = min(month_start.replace(day=1) + ONE_MONTH,
+                                self.billing_date) - ONE_DAY
+
+                for metered_feature in plans_metered_features[subscription.plan_id]:
+                    yield MeteredFeatureUnitsLog(
+                        metered_feature=metered_feature, subscription=subscription,
+                        consumed_units=Decimal(self.random.randint(0, 2000)),
+                        start_datetime=datetime.combine(month_start, datetime.min.time(),
+                                                        tzinfo=timezone.utc),
+                        end_datetime=datetime.combine(month_end, datetime.max.time(),
+                                                      tzinfo=timezone.utc).replace(microsecond=0)
+                    )
+
+                month_start = month_end + ONE_DAY
+
+    def generate_usage_logs(self, subscriptions, plans_metered_features):
+        batch = []
+        for log in self._usage_logs(subscriptions, plans_metered_features):
+            batch.append(log)
+            if len(batch) >= self.batch_size:
+                self._bulk_create(MeteredFeatureUnitsLog, batch, fetch_pks=False)
+                batch = []
+
+        if batch:
+            self._bulk_create(MeteredFeatureUnitsLog, batch, fetch_pks=False)
+
+    @transaction.atomic
+    def generate(self):
+        """
+            :return: An OrderedDict containing the number of created objects, per model.
+        """
+
+        providers = self.generate_providers()
+        plans, plans_metered_features = self.generate_plans(providers)
+        customers = self.generate_customers()
+        subscriptions = self.generate_subscriptions(plans, customers)
+
+        self.generate_discounts(plans, customers)
+        self.generate_bonuses(plans)
+        self.generate_usage_logs(subscriptions, plans_metered_features)
+
+        return self.counts
@@ -74,3 +74,20 @@ def two_pages_of_invoices(db, settings):
             lambda n: allowed_states[n % len(allowed_states)]
         )
     )
+
+
+@pytest.fixture()
+def query_budget(db):
+    from silver.utils.queries import QueryBudget
+
+    return QueryBudget
+
+
+@pytest.fixture()
+def metrics_backend(monkeypatch):
+    from silver import metrics
+
+    backend = metrics.LocalMetricsBackend()
+    monkeypatch.setattr(metrics, 'get_metrics_backend', lambda: backend)
+
+    return backend
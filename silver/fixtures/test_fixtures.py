@@ -23,6 +23,8 @@ from silver.payment_processors.views import GenericTransactionView
 triggered_processor = 'triggered'
 manual_processor = 'manual'
 failing_void_processor = 'failing_void'
+throttled_processor = 'throttled'
+batch_status_processor = 'batch_status'
 
 
 PAYMENT_PROCESSORS = {
@@ -34,6 +36,17 @@ PAYMENT_PROCESSORS = {
     },
     failing_void_processor: {
         'class': 'silver.fixtures.test_fixtures.FailingVoidTriggeredProcessor'
+    },
+    throttled_processor: {
+        'class': 'silver.fixtures.test_fixtures.TriggeredProcessor',
+        'throttling': {
+            'max_concurrency': 2,
+            'rate': 3,
+            'burst': 3
+        }
+    },
+    batch_status_processor: {
+        'class': 'silver.fixtures.test_fixtures.BatchStatusTriggeredProcessor'
     }
 }
 
@@ -67,3 +80,10 @@ class TriggeredProcessor(PaymentProcessorBase, TriggeredProcessorMixin):
 class FailingVoidTriggeredProcessor(TriggeredProcessor):
     def void_transaction(self, transaction):
         return False
+
+
+class BatchStatusTriggeredProcessor(TriggeredProcessor):
+    fetch_transactions_status_batch_size = 2
+
+    def fetch_transactions_status_batch(self, transactions):
+        return True
@@ -0,0 +1,146 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from silver.models import (
+    BillingDocumentBase, Customer, CustomerBalance, Invoice, LedgerEntry, Proforma, Transaction
+)
+from silver.models.ledger import document_ledger_amount, is_ledger_document
+
+
+def _as_datetime(value):
+    if value is None:
+        return timezone.now()
+
+    return datetime.combine(value, datetime.min.time(), tzinfo=timezone.utc)
+
+
+def customer_ledger_entries(customer):
+    """
+        :return: The (unsaved) ledger entries matching the current state of the customer's
+        documents and transactions, ordered by their creation time.
+    """
+
+    KINDS = LedgerEntry.KINDS
+    entries = []
+
+    documents = chain(*[
+        model.objects.filter(customer=customer)
+             .exclude(state=BillingDocumentBase.STATES.DRAFT)
+             .select_related('related_document')
+        for model in (Proforma, Invoice)
+    ])
+    for document in documents:
+        if not is_ledger_document(document):
+            continue
+
+        currency, amount = document_ledger_amount(document)
+        related = {document.kind: document}
+
+        entries.append(LedgerEntry(customer=customer, kind=KINDS.DOCUMENT_ISSUED,
+                                   currency=currency, amount=amount,
+                                   created_at=_as_datetime(document.issue_date), **related))
+        if document.state == BillingDocumentBase.STATES.CANCELED:
+            entries.append(LedgerEntry(customer=customer, kind=KINDS.DOCUMENT_CANCELED,
+                                       currency=currency, amount=-amount,
+                                       created_at=_as_datetime(document.cancel_date), **related))
+
+    transactions = Transaction.objects.filter(
+        payment_method__customer=customer,
+        state__in=[Transaction.States.Settled, Transaction.States.Refunded]
+    )
+    for trx in transactions:
+        related = {'transaction': trx, 'invoice_id': trx.invoice_id,
+                   'proforma_id': trx.proforma_id}
+
+        entries.append(LedgerEntry(customer=customer, kind=KINDS.TRANSACTION_SETTLED,
+                                   currency=trx.currency, amount=-trx.amount,
+                                   created_at=trx.created_at, **related))
+        if trx.state == Transaction.States.Refunded:
+            entries.append(LedgerEntry(customer=customer, kind=KINDS.TRANSACTION_REFUNDED,
+                                       currency=trx.currency, amount=trx.amount,
+                                       created_at=trx.updated_at, **related))
+
+    entries.sort(key=lambda entry: entry.created_at)
+
+    return entries
+
+
+def rebuild_customer_ledger(customer, verify=False):
+    """
+        Replaces the customer's ledger entries and balances with the ones matching the current
+        state of its documents and transactions.
+
+        :param verify: Only compare the stored balances with the expected ones.
+        :return: A list of (currency, stored balance, expected balance) tuples, for the stored
+        balances which were (or would be) fixed.
+    """
+
+    with transaction.atomic():
+        # lock the customer's balances, so that they are not updated meanwhile
+        stored = dict(CustomerBalance.objects.select_for_update()
+                                             .filter(customer=customer)
+                                             .values_list('currency', 'amount'))
+
+        entries = customer_ledger_entries(customer)
+        expected = defaultdict(Decimal)
+        for entry in entries:
+            expected[entry.currency] += entry.amount
+
+        zero = Decimal('0.00')
+        mismatches = [
+            (currency, stored.get(currency, zero), expected.get(currency, zero))
+            for currency in sorted(set(stored) | set(expected))
+            if stored.get(currency, zero) != expected.get(currency, zero)
+        ]
+
+        if verify:
+            return mismatches
+
+        LedgerEntry.objects.filter(customer=customer).delete()
+        CustomerBalance.objects.filter(customer=customer).delete()
+
+        LedgerEntry.objects.bulk_create(entries)
+        CustomerBalance.objects.bulk_create([
+            CustomerBalance(customer=customer, currency=currency, amount=amount)
+            for currency, amount in sorted(expected.items())
+        ])
+
+    return mismatches
+
+
+def rebuild_ledgers(customers=None, verify=False):
+    """
+        Rebuilds (or only verifies) the ledger of each of the given customers, defaulting to
+        all of them.
+
+        :return: A generator of (customer, mismatches) tuples, as returned by
+        `rebuild_customer_ledger`.
+    """
+
+    if customers is None:
+        customers = Customer.objects.all()
+
+    for customer in customers.order_by('pk').iterator():
+        yield customer, rebuild_customer_ledger(customer, verify=verify)
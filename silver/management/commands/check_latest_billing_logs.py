@@ -0,0 +1,74 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, OuterRef, Q, Subquery
+
+from silver.models import BillingLog, Subscription
+
+
+def inconsistent_subscriptions():
+    """
+        :return: The subscriptions whose `latest_billing_log` is not their billing log with the
+        latest billing date, annotated with the latter's id as `expected_billing_log_id`.
+    """
+
+    latest_billing_logs = BillingLog.objects.filter(subscription=OuterRef('pk')) \
+        .order_by('-billing_date', '-pk') \
+        .values('pk')[:1]
+    points_elsewhere = ~Q(latest_billing_log=F('expected_billing_log_id'))
+
+    return Subscription.objects.annotate(
+        expected_billing_log_id=Subquery(latest_billing_logs)
+    ).filter(
+        Q(latest_billing_log__isnull=True, expected_billing_log_id__isnull=False) |
+        Q(latest_billing_log__isnull=False, expected_billing_log_id__isnull=True) |
+        (Q(latest_billing_log__isnull=False, expected_billing_log_id__isnull=False) &
+         points_elsewhere)
+    ).order_by('pk')
+
+
+class Command(BaseCommand):
+    help = ("Checks that the subscriptions point to their billing log with the latest billing "
+            "date, which is used to find their billed up to dates.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix',
+                            action='store_true', dest='fix',
+                            help='Point the inconsistent subscriptions to their latest billing '
+                                 'log and update their next billing dates.')
+
+    def handle(self, *args, **options):
+        subscriptions = list(inconsistent_subscriptions().select_related('plan'))
+
+        for subscription in subscriptions:
+            self.stdout.write(
+                'Subscription {}: latest billing log {}, expected {}.'.format(
+                    subscription.pk, subscription.latest_billing_log_id,
+                    subscription.expected_billing_log_id
+                )
+            )
+
+            if options['fix']:
+                subscription.set_latest_billing_log(subscription.find_latest_billing_log())
+
+        if not subscriptions:
+            self.stdout.write('All the subscriptions are consistent.')
+        elif options['fix']:
+            self.stdout.write('Fixed {} subscription(s).'.format(len(subscriptions)))
+        else:
+            raise CommandError('Found {} inconsistent subscription(s). Run the command with '
+                               '--fix to fix them.'.format(len(subscriptions)))
@@ -0,0 +1,54 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand
+
+from silver.compaction import compact_units_logs
+from silver.models import Subscription
+
+
+class Command(BaseCommand):
+    help = ("Rolls up the metered feature units logs of the fully billed buckets into a single "
+            "log per subscription, metered feature, bucket and annotation.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscription',
+                            action='append', dest='subscription_ids', type=int,
+                            help='The id of a subscription whose logs are compacted. Can be '
+                                 'given multiple times (defaults to all the subscriptions).')
+        parser.add_argument('--archive',
+                            action='store_true', dest='archive',
+                            help='Copy the compacted logs to the archive table.')
+        parser.add_argument('--dry-run',
+                            action='store_true', dest='dry_run',
+                            help='Only report how many logs would be compacted.')
+
+    def handle(self, *args, **options):
+        subscriptions = None
+        if options['subscription_ids']:
+            subscriptions = Subscription.objects.filter(pk__in=options['subscription_ids'])
+
+        stats = compact_units_logs(subscriptions, archive=options['archive'],
+                                   dry_run=options['dry_run'])
+
+        self.stdout.write(
+            '{verb} {compacted} log(s) into {summary} log(s), for {subscriptions} '
+            'subscription(s); {archived} log(s) archived.'.format(
+                verb='Would compact' if options['dry_run'] else 'Compacted',
+                compacted=stats['compacted'], summary=stats['summary'],
+                subscriptions=stats['subscriptions'], archived=stats['archived']
+            )
+        )
@@ -0,0 +1,85 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import argparse
+import io
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from silver.exports import DEFAULT_CHUNK_SIZE, DocumentsExport, EXPORT_FORMATS, filter_documents
+
+
+def document_filter(filter_str):
+    name, separator, value = filter_str.partition('=')
+    if not separator or not name:
+        msg = "Not a valid filter: '{filter_str}'. "\
+              "Expected format: name=value.".format(filter_str=filter_str)
+        raise argparse.ArgumentTypeError(msg)
+
+    return name, value
+
+
+class Command(BaseCommand):
+    help = 'Exports the billing documents (Invoices, Proformas), or their entries, as CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format',
+                            action='store', dest='export_format', default='csv',
+                            choices=list(EXPORT_FORMATS),
+                            help='The export format (defaults to csv).')
+        parser.add_argument('--kind',
+                            action='store', dest='kind', choices=['invoice', 'proforma'],
+                            help='Export only invoices or only proformas. By default, invoices '
+                                 'and the proformas without an invoice are exported.')
+        parser.add_argument('--entries',
+                            action='store_true', dest='entries',
+                            help="Export the documents' entries instead of the documents.")
+        parser.add_argument('--filter',
+                            action='append', dest='filters', type=document_filter, default=[],
+                            help='A documents filter, as accepted by the API (e.g. state=issued '
+                                 'or customer=1). Can be given multiple times.')
+        parser.add_argument('--output',
+                            action='store', dest='output',
+                            help='The file to write the export to (defaults to stdout).')
+        parser.add_argument('--chunk-size',
+                            action='store', dest='chunk_size', type=int,
+                            default=DEFAULT_CHUNK_SIZE,
+                            help='The number of documents read from the database at once.')
+
+    def handle(self, *args, **options):
+        filters = QueryDict(mutable=True)
+        for name, value in options['filters']:
+            filters.appendlist(name, value)
+
+        try:
+            queryset = filter_documents(filters, kind=options['kind'])
+        except ValidationError as error:
+            raise CommandError('Invalid filters: {}'.format(error.message_dict))
+
+        export = DocumentsExport(queryset, entries=options['entries'],
+                                 chunk_size=options['chunk_size'])
+        lines = export.lines(options['export_format'])
+
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with io.open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
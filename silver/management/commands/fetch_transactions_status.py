@@ -16,6 +16,8 @@ from __future__ import absolute_import
 
 import logging
 
+from collections import defaultdict
+
 from six.moves import map
 
 from django.core.management.base import BaseCommand
@@ -52,12 +54,38 @@ class Command(BaseCommand):
                 pk__in=options['transactions']
             )
 
+        batches = defaultdict(list)
+
         for transaction in eligible_transactions:
             try:
                 payment_processor = transaction.payment_method.get_payment_processor()
                 if payment_processor.type != PaymentProcessorTypes.Triggered:
                     continue
+
+                if payment_processor.supports_batch_status_fetching:
+                    processor_name = transaction.payment_method.payment_processor
+                    batches[processor_name].append(transaction)
+                    if (len(batches[processor_name]) >=
+                            payment_processor.fetch_transactions_status_batch_size):
+                        self.fetch_transactions_status_batch(payment_processor,
+                                                             batches.pop(processor_name))
+                    continue
+
                 payment_processor.fetch_transaction_status(transaction)
             except Exception:
                 logger.error('Encountered exception while updating transaction '
                              'with id=%s.', transaction.id, exc_info=True)
+
+        for processor_name, batch in batches.items():
+            if batch:
+                self.fetch_transactions_status_batch(
+                    payment_processors.get_instance(processor_name), batch
+                )
+
+    def fetch_transactions_status_batch(self, payment_processor, transactions):
+        try:
+            payment_processor.fetch_transactions_status_batch(transactions)
+        except Exception:
+            logger.error('Encountered exception while updating transactions '
+                         'with ids=%s.', [transaction.id for transaction in transactions],
+                         exc_info=True)
@@ -0,0 +1,62 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand
+
+from silver.fixtures.datasets import SyntheticDataset
+from silver.management.commands.generate_docs import date
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic billing dataset, for benchmarking purposes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=2)
+        parser.add_argument('--customers', type=int, default=100)
+        parser.add_argument('--plans', type=int, default=5)
+        parser.add_argument('--metered-features', type=int, default=3,
+                            dest='metered_features',
+                            help='The number of metered features of each plan.')
+        parser.add_argument('--subscriptions', type=int, default=1000)
+        parser.add_argument('--months', type=int, default=3,
+                            help='How many months of usage to generate, before the billing date.')
+        parser.add_argument('--trial-ratio', type=float, default=0.1, dest='trial_ratio',
+                            help='The ratio of subscriptions starting with a trial.')
+        parser.add_argument('--discounts', type=int, default=5)
+        parser.add_argument('--bonuses', type=int, default=5)
+        parser.add_argument('--date', type=date, dest='billing_date',
+                            help='The billing date (format YYYY-MM-DD) the dataset is generated '
+                                 'for. Defaults to today.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        dataset = SyntheticDataset(
+            providers=options['providers'],
+            customers=options['customers'],
+            plans=options['plans'],
+            metered_features=options['metered_features'],
+            subscriptions=options['subscriptions'],
+            months=options['months'],
+            trial_ratio=options['trial_ratio'],
+            discounts=options['discounts'],
+            bonuses=options['bonuses'],
+            billing_date=options['billing_date'],
+            seed=options['seed'],
+        )
+
+        for name, count in dataset.generate().items():
+            self.stdout.write('Created {} {}.'.format(count, name))
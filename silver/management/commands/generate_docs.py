@@ -19,8 +19,8 @@ import argparse
 
 from datetime import datetime as dt
 
-from django.core.management.base import BaseCommand
-from django.utils import translation
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone, translation
 
 from silver.documents_generator import DocumentsGenerator
 from silver.models import Subscription
@@ -48,9 +48,21 @@ class Command(BaseCommand):
         parser.add_argument('--date',
                             action='store', dest='billing_date', type=date,
                             help='The billing date (format YYYY-MM-DD).')
+        parser.add_argument('--from-date',
+                            action='store', dest='from_date', type=date,
+                            help='Catch up on the billing dates starting with this one, up to '
+                                 '--to-date, within a single run (format YYYY-MM-DD).')
+        parser.add_argument('--to-date',
+                            action='store', dest='to_date', type=date,
+                            help='The last billing date to catch up on, when --from-date is '
+                                 'given (format YYYY-MM-DD, defaults to today).')
         parser.add_argument('--force',
                             action='store', dest='force_generate', type=bool,
                             help='Bill subscriptions even in situations when they would be skipped.')
+        parser.add_argument('--profile',
+                            action='store', dest='profile_dir', nargs='?', const='.',
+                            help='Profile the run and write the cProfile output to a file within '
+                                 'the given directory (defaults to the current directory).')
 
     def handle(self, *args, **options):
         translation.activate('en-us')
@@ -58,8 +70,33 @@ class Command(BaseCommand):
         billing_date = options['billing_date']
         force_generate = options.get('force_generate', False)
 
-        docs_generator = DocumentsGenerator()
-        if options['subscription_id']:
+        from_date, to_date = options.get('from_date'), options.get('to_date')
+        if to_date and not from_date:
+            raise CommandError('--to-date requires --from-date.')
+        if from_date and billing_date:
+            raise CommandError('--date cannot be used along with --from-date.')
+        if from_date:
+            to_date = to_date or timezone.now().date()
+            if from_date > to_date:
+                raise CommandError('--from-date must not be after --to-date.')
+
+        docs_generator = DocumentsGenerator(profile_dir=options.get('profile_dir'))
+        if from_date:
+            subscription = None
+            if options['subscription_id']:
+                subscription = Subscription.objects.filter(id=options['subscription_id']).first()
+                if not subscription:
+                    self.stdout.write('The subscription with the provided id does not exist.')
+                    return
+
+            logger.info('Generating for the billing dates from %s to %s; subscription=%s; '
+                        'force_generate=%s.', from_date, to_date, options['subscription_id'],
+                        force_generate)
+
+            docs_generator.generate_range(from_date, to_date, subscription=subscription,
+                                          force_generate=force_generate)
+            self.stdout.write('Done. You can have a Club-Mate now. :)')
+        elif options['subscription_id']:
             try:
                 subscription_id = options['subscription_id']
                 logger.info('Generating for subscription with id=%s; '
@@ -80,3 +117,8 @@ class Command(BaseCommand):
 
             docs_generator.generate(billing_date=billing_date, force_generate=force_generate)
             self.stdout.write('Done. You can have a Club-Mate now. :)')
+
+        if docs_generator.billing_run and 'profile' in docs_generator.billing_run.summary:
+            self.stdout.write('Profile written to {}.'.format(
+                docs_generator.billing_run.summary['profile']
+            ))
@@ -0,0 +1,61 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand, CommandError
+
+from silver.ledger import rebuild_ledgers
+from silver.models import Customer
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the customers' ledger entries and balances out of their documents and "
+            "transactions, which backfills them for the existing data.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customer',
+                            action='append', dest='customer_ids', type=int,
+                            help='The id of a customer whose ledger is rebuilt. Can be given '
+                                 'multiple times (defaults to all the customers).')
+        parser.add_argument('--verify',
+                            action='store_true', dest='verify',
+                            help='Only check that the stored balances match the documents and '
+                                 'transactions.')
+
+    def handle(self, *args, **options):
+        customers = None
+        if options['customer_ids']:
+            customers = Customer.objects.filter(pk__in=options['customer_ids'])
+
+        customers_count = mismatches_count = 0
+        for customer, mismatches in rebuild_ledgers(customers, verify=options['verify']):
+            customers_count += 1
+            mismatches_count += len(mismatches)
+
+            for currency, stored, expected in mismatches:
+                self.stdout.write('Customer {}: {} balance {}, expected {}.'.format(
+                    customer.pk, currency, stored, expected
+                ))
+
+        if not options['verify']:
+            self.stdout.write('Rebuilt the ledgers of {} customer(s), fixing {} balance(s).'.format(
+                customers_count, mismatches_count
+            ))
+        elif not mismatches_count:
+            self.stdout.write("All the customers' balances are consistent.")
+        else:
+            raise CommandError('Found {} inconsistent balance(s). Run the command without '
+                               '--verify to rebuild them.'.format(mismatches_count))
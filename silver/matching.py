@@ -0,0 +1,149 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from collections import defaultdict
+
+from silver.models.bonuses import Bonus
+from silver.models.discounts import Discount
+
+
+def _shallow_copy(obj):
+    # much cheaper than copy.copy, which pickles the model instances
+    clone = obj.__class__.__new__(obj.__class__)
+    clone.__dict__.update(obj.__dict__)
+
+    return clone
+
+
+class MatchingIndex(object):
+    """
+        Matches subscriptions to the objects (discounts, bonuses) restricted through many to many
+        filters (customers, subscriptions, plans...), without querying the database for every
+        subscription. An object applies to a subscription if, for each of its filters, it is
+        either not restricted or restricted to the subscription's value.
+
+        The objects and their filters are loaded once, through a query per filter, so the index
+        is meant to be built once per billing run.
+
+        `for_subscription` returns copies of the objects, annotated like the equivalent
+        queryset's results.
+    """
+
+    model = None
+    # (many to many field name, function returning the subscription's matching value id)
+    filters = ()
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = self.model.objects.all()
+
+        self.objects = {obj.pk: obj for obj in queryset}
+        self.restrictions = defaultdict(dict)
+        self._matches = {}
+
+        self._unrestricted = {}
+        self._by_value = {}
+        for field_name, _ in self.filters:
+            self._index_filter(field_name, queryset)
+
+    def _index_filter(self, field_name, queryset):
+        field = self.model._meta.get_field(field_name)
+        through = field.remote_field.through
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+
+        by_value = defaultdict(set)
+        restricted = set()
+        rows = []
+        if self.objects:
+            rows = through.objects.filter(**{'{}__in'.format(source): queryset.values('pk')}) \
+                .values_list('{}_id'.format(source), '{}_id'.format(target))
+
+        for pk, value in rows:
+            by_value[value].add(pk)
+            restricted.add(pk)
+            self.restrictions[pk].setdefault(field_name, set()).add(value)
+
+        self._by_value[field_name] = by_value
+        self._unrestricted[field_name] = set(self.objects) - restricted
+
+    def annotate(self, obj, subscription, values):
+        pass
+
+    def for_subscription(self, subscription):
+        """
+            :return: The list of objects applying to the given subscription, ordered by their
+            primary keys.
+        """
+
+        values = {field_name: get_value(subscription) for field_name, get_value in self.filters}
+        key = tuple(sorted(values.items()))
+
+        if key not in self._matches:
+            matches = set(self.objects)
+            for field_name, value in values.items():
+                matches &= (self._by_value[field_name].get(value, set()) |
+                            self._unrestricted[field_name])
+
+            self._matches[key] = sorted(matches)
+
+        matches = []
+        for pk in self._matches[key]:
+            obj = _shallow_copy(self.objects[pk])
+            self.annotate(obj, subscription, values)
+            matches.append(obj)
+
+        return matches
+
+
+class DiscountsIndex(MatchingIndex):
+    """
+        Equivalent of `Discount.for_subscription(subscription).filter(enabled=True)`.
+    """
+
+    model = Discount
+    filters = (
+        ('customers', lambda subscription: subscription.customer_id),
+        ('subscriptions', lambda subscription: subscription.pk),
+        ('plans', lambda subscription: subscription.plan_id),
+    )
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = Discount.objects.filter(enabled=True)
+
+        super(DiscountsIndex, self).__init__(queryset)
+
+    def annotate(self, discount, subscription, values):
+        restricted = 'subscriptions' in self.restrictions[discount.pk]
+        discount.matched_subscriptions = values['subscriptions'] if restricted else None
+
+
+class BonusesIndex(MatchingIndex):
+    """
+        Equivalent of `Bonus.for_subscription(subscription)`.
+    """
+
+    model = Bonus
+    filters = (
+        ('filter_customers', lambda subscription: subscription.customer_id),
+        ('filter_subscriptions', lambda subscription: subscription.pk),
+        ('filter_plans', lambda subscription: subscription.plan_id),
+        ('filter_product_codes', lambda subscription: subscription.plan.product_code_id),
+    )
+
+    def annotate(self, bonus, subscription, values):
+        restricted = 'filter_product_codes' in self.restrictions[bonus.pk]
+        bonus._filtered_product_codes = values['filter_product_codes'] if restricted else None
@@ -0,0 +1,313 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import json
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float('inf'))
+
+KEY_PREFIX = 'silver:metrics'
+
+
+class LocalMetricsBackend(object):
+    """
+        Keeps the metrics in memory. Each process (web worker, Celery worker) exposes only its
+        own metrics, so it is only suitable for single process deployments, development and tests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(float)
+
+    def increment(self, samples):
+        """
+            :param samples: A list of ((sample name, labels), value) tuples, where labels is a
+            tuple of (label name, label value) pairs.
+        """
+
+        with self._lock:
+            for key, value in samples:
+                self._samples[key] += value
+
+    def collect(self):
+        with self._lock:
+            return dict(self._samples)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+class RedisMetricsBackend(object):
+    """
+        Keeps the metrics in a Redis hash, so that they are aggregated across all the web and
+        Celery workers.
+    """
+
+    def __init__(self, connection=None):
+        if connection is None:
+            from silver.vendors.redis_server import redis as connection
+
+        self.connection = connection
+
+    @staticmethod
+    def _field(key):
+        name, labels = key
+        return json.dumps([name, labels])
+
+    @staticmethod
+    def _key(field):
+        name, labels = json.loads(field)
+        return name, tuple(tuple(label) for label in labels)
+
+    def increment(self, samples):
+        pipeline = self.connection.pipeline(transaction=False)
+        for key, value in samples:
+            pipeline.hincrbyfloat(KEY_PREFIX, self._field(key), value)
+        pipeline.execute()
+
+    def collect(self):
+        return {
+            self._key(field): float(value)
+            for field, value in self.connection.hgetall(KEY_PREFIX).items()
+        }
+
+    def clear(self):
+        self.connection.delete(KEY_PREFIX)
+
+
+_backends = {}
+
+
+def get_metrics_backend():
+    backend_path = getattr(settings, 'SILVER_METRICS_BACKEND',
+                           'silver.metrics.LocalMetricsBackend')
+
+    if backend_path not in _backends:
+        _backends[backend_path] = import_string(backend_path)()
+
+    return _backends[backend_path]
+
+
+REGISTRY = []
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+        registry.append(self)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError('Expected the {} labels for the {} metric, got {}.'.format(
+                self.labels, self.name, tuple(labels)
+            ))
+
+        return tuple((label, str(labels[label])) for label in self.labels)
+
+    def _increment(self, samples):
+        # Metrics must never break the code paths they instrument
+        try:
+            get_metrics_backend().increment(samples)
+        except Exception:
+            logger.warning('Could not record the %s metric.', self.name, exc_info=True)
+
+    def samples(self, collected):
+        """
+            :param collected: The samples collected from the metrics backend.
+            :return: A list of ((sample name, labels), value) tuples belonging to this metric.
+        """
+
+        return [(key, value) for key, value in collected.items() if key[0] == self.name]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, value=1, **labels):
+        self._increment([((self.name, self._labels(labels)), value)])
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS,
+                 registry=REGISTRY):
+        super(Histogram, self).__init__(name, documentation, labels, registry)
+
+        self.buckets = tuple(sorted(set(buckets) | {float('inf')}))
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+
+        samples = [
+            (('{}_bucket'.format(self.name), labels + (('le', _format_value(bucket)), )), 1)
+            for bucket in self.buckets if value <= bucket
+        ]
+        samples.append((('{}_sum'.format(self.name), labels), value))
+        samples.append((('{}_count'.format(self.name), labels), 1))
+
+        self._increment(samples)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, collected):
+        sample_names = {'{}_{}'.format(self.name, suffix) for suffix in ('bucket', 'sum', 'count')}
+
+        return [(key, value) for key, value in collected.items() if key[0] in sample_names]
+
+
+class Gauge(Metric):
+    """
+        A metric whose value is computed when the metrics are exposed, by calling `function`.
+        The function returns either a number, or a dict mapping label values tuples to numbers.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function, labels=(), registry=REGISTRY):
+        super(Gauge, self).__init__(name, documentation, labels, registry)
+
+        self.function = function
+
+    def samples(self, collected):
+        values = self.function()
+        if not isinstance(values, dict):
+            values = {(): values}
+
+        return [
+            ((self.name, tuple(zip(self.labels, label_values))), value)
+            for label_values, value in values.items()
+        ]
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+
+    if float(value).is_integer():
+        return '{}.0'.format(int(value))
+
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _sort_key(sample):
+    (name, labels), _ = sample
+    # buckets are sorted by their upper bound, instead of the formatted one
+    return name, tuple((label, float(value) if label == 'le' else 0, value)
+                       for label, value in labels)
+
+
+def render_metrics(registry=REGISTRY):
+    """
+        :return: The metrics, in the Prometheus text exposition format.
+    """
+
+    collected = get_metrics_backend().collect()
+
+    lines = []
+    for metric in registry:
+        lines.append('# HELP {} {}'.format(metric.name, metric.documentation))
+        lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+
+        for (name, labels), value in sorted(metric.samples(collected), key=_sort_key):
+            if labels:
+                name = '{}{{{}}}'.format(name, ','.join(
+                    '{}="{}"'.format(label, _escape(label_value))
+                    for label, label_value in labels
+                ))
+
+            lines.append('{} {}'.format(name, _format_value(value)))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _dirty_pdfs():
+    from silver.models import PDF
+
+    return PDF.objects.filter(dirty__gt=0).count()
+
+
+def _transactions_backlog():
+    from django.db.models import Count
+    from silver.models import Transaction
+
+    states = [Transaction.States.Initial, Transaction.States.Pending]
+    counts = dict(Transaction.objects.filter(state__in=states)
+                                     .values_list('state')
+                                     .annotate(count=Count('id'))
+                                     .order_by())
+
+    return {(state, ): counts.get(state, 0) for state in states}
+
+
+DOCUMENTS_GENERATION_SECONDS = Histogram(
+    'silver_documents_generation_seconds',
+    'Duration of the billing documents generation runs.'
+)
+PDF_RENDER_SECONDS = Histogram(
+    'silver_pdf_render_seconds',
+    'Duration of the billing documents PDF rendering.'
+)
+TRANSACTION_PROCESSING_SECONDS = Histogram(
+    'silver_transaction_processing_seconds',
+    'Duration of the payment processors calls made for transactions.',
+    labels=('processor', 'operation')
+)
+METERED_FEATURE_UNITS_LOG_UPDATES = Counter(
+    'silver_metered_feature_units_log_updates_total',
+    'Number of ingested metered feature usage updates.',
+    labels=('update_type', )
+)
+DIRTY_PDFS = Gauge(
+    'silver_dirty_pdfs',
+    'Number of PDFs waiting to be (re)rendered.',
+    _dirty_pdfs
+)
+TRANSACTIONS_BACKLOG = Gauge(
+    'silver_transactions_backlog',
+    'Number of transactions waiting to be executed (initial) or settled (pending).',
+    _transactions_backlog,
+    labels=('state', )
+)
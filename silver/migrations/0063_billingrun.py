@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-19 06:55
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0062_auto_20240703_1116'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('billing_date', models.DateField(help_text='The billing date the documents were generated for.')),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField(help_text='How long the documents generation took, in seconds.')),
+                ('summary', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='The time spent and the queries made in each phase of the run, and the number of customers, subscriptions, entries and documents processed.')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:11
+
+from django.db import migrations
+import django.utils.timezone
+import silver.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0063_billingrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingdocumentbase',
+            name='updated_at',
+            field=silver.utils.models.AutoDateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
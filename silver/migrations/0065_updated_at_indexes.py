@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:22
+
+from django.db import migrations
+import django.utils.timezone
+import silver.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0064_billingdocumentbase_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documententry',
+            name='updated_at',
+            field=silver.utils.models.AutoDateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='updated_at',
+            field=silver.utils.models.AutoDateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='billingdocumentbase',
+            name='updated_at',
+            field=silver.utils.models.AutoDateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='updated_at',
+            field=silver.utils.models.AutoDateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0065_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='next_metered_features_billing_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='The date before which the metered features cannot be billed, if known.', null=True),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='next_plan_billing_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='The date before which the plan cannot be billed, if known.', null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:06
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_latest_billing_logs(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+
+    Subscription = apps.get_model('silver', 'Subscription')
+    BillingLog = apps.get_model('silver', 'BillingLog')
+
+    latest_billing_logs = BillingLog.objects.using(db_alias) \
+        .filter(subscription=OuterRef('pk')) \
+        .order_by('-billing_date', '-pk') \
+        .values('pk')[:1]
+
+    Subscription.objects.using(db_alias).update(
+        latest_billing_log=Subquery(latest_billing_logs)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0066_subscription_next_billing_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='latest_billing_log',
+            field=models.ForeignKey(blank=True, editable=False, help_text='The billing log with the latest billing date.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='silver.billinglog'),
+        ),
+        migrations.RunPython(backfill_latest_billing_logs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0067_subscription_latest_billing_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeteredFeatureUnitsLogArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_id', models.IntegerField(help_text='The id of the compacted log.')),
+                ('consumed_units', models.DecimalField(decimal_places=4, max_digits=19)),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField()),
+                ('annotation', models.CharField(blank=True, max_length=256, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='meteredfeatureunitslog',
+            index=models.Index(fields=['subscription', 'metered_feature', 'start_datetime', 'end_datetime'], name='silver_mful_sub_mf_dates_idx'),
+        ),
+        migrations.AddField(
+            model_name='meteredfeatureunitslogarchive',
+            name='metered_feature',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='silver.meteredfeature'),
+        ),
+        migrations.AddField(
+            model_name='meteredfeatureunitslogarchive',
+            name='subscription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_mf_log_entries', to='silver.subscription'),
+        ),
+        migrations.AddField(
+            model_name='meteredfeatureunitslogarchive',
+            name='summary_log',
+            field=models.ForeignKey(blank=True, help_text='The log summing up the compacted logs.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_logs', to='silver.meteredfeatureunitslog'),
+        ),
+        migrations.AddIndex(
+            model_name='meteredfeatureunitslogarchive',
+            index=models.Index(fields=['subscription', 'metered_feature', 'start_datetime'], name='silver_mfula_sub_mf_start_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silver', '0068_metered_feature_units_log_compaction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='billingdocumentbase',
+            index=models.Index(condition=models.Q(('state', 'issued')), fields=['kind', 'due_date'], name='silver_doc_issued_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='billingdocumentbase',
+            index=models.Index(fields=['customer', 'kind', 'state'], name='silver_doc_cust_kind_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdf',
+            index=models.Index(condition=models.Q(('dirty__gt', 0)), fields=['dirty'], name='silver_pdf_dirty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('state', 'initial')), fields=['id'], name='silver_trx_initial_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('state', 'pending')), fields=['id'], name='silver_trx_pending_idx'),
+        ),
+    ]
@@ -16,8 +16,12 @@ from silver.models.billing_entities import Customer, Provider
 from silver.models.documents import Proforma, Invoice, BillingDocumentBase, DocumentEntry, PDF
 from silver.models.plans import Plan, MeteredFeature
 from silver.models.product_codes import ProductCode
-from silver.models.subscriptions import Subscription, MeteredFeatureUnitsLog, BillingLog
+from silver.models.subscriptions import (
+    Subscription, MeteredFeatureUnitsLog, MeteredFeatureUnitsLogArchive, BillingLog
+)
 from silver.models.payment_methods import PaymentMethod
 from silver.models.transactions import Transaction
 from silver.models.discounts import Discount
 from silver.models.bonuses import Bonus
+from silver.models.billing_runs import BillingRun
+from silver.models.ledger import LedgerEntry, CustomerBalance
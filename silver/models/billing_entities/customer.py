@@ -14,8 +14,6 @@
 
 from __future__ import absolute_import
 
-from pyvat import is_vat_number_format_valid
-
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
@@ -90,6 +88,9 @@ class Customer(BaseBillingEntity):
         company_field.help_text = "The company to which the bill is issued."
 
     def clean(self):
+        # pyvat loads requests and pycountry, which aren't needed otherwise
+        from pyvat import is_vat_number_format_valid
+
         if (self.sales_tax_number and
             is_vat_number_format_valid(self.sales_tax_number,
                                        self.country) is False):
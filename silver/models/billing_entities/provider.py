@@ -23,6 +23,7 @@ from django.db import models
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
@@ -156,26 +157,22 @@ class Provider(BaseBillingEntity):
 
 @receiver(pre_save, sender=Provider)
 def update_draft_billing_documents(sender, instance, **kwargs):
-    Invoice = apps.get_model('silver', 'Invoice')
-    Proforma = apps.get_model('silver', 'Proforma')
-
-    if instance.pk and not kwargs.get('raw', False):
-        provider = Provider.objects.get(pk=instance.pk)
-        old_invoice_series = provider.invoice_series
-        old_proforma_series = provider.proforma_series
-
-        if instance.invoice_series != old_invoice_series:
-            for invoice in Invoice.objects.filter(state='draft',
-                                                  provider=provider):
-                # update the series for draft invoices
-                invoice.series = instance.invoice_series
-                invoice.number = None
-                invoice.save()
-
-        if instance.proforma_series != old_proforma_series:
-            for proforma in Proforma.objects.filter(state='draft',
-                                                    provider=provider):
-                # update the series for draft invoices
-                proforma.series = instance.proforma_series
-                proforma.number = None
-                proforma.save()
+    if not instance.pk or kwargs.get('raw', False):
+        return
+
+    old_series = Provider.objects.filter(pk=instance.pk).order_by() \
+        .values('invoice_series', 'proforma_series').first()
+    if not old_series:
+        return
+
+    BillingDocumentBase = apps.get_model('silver', 'BillingDocumentBase')
+    for kind, series_field in (('invoice', 'invoice_series'), ('proforma', 'proforma_series')):
+        series = getattr(instance, series_field)
+        if series == old_series[series_field]:
+            continue
+
+        # The drafts don't have a number, a PDF or a state transition to handle yet, so their
+        # series can be updated through a single query, instead of saving each of them.
+        BillingDocumentBase.objects.filter(
+            kind=kind, provider_id=instance.pk, state=BillingDocumentBase.STATES.DRAFT
+        ).update(series=series, number=None, updated_at=timezone.now())
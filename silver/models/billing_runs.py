@@ -0,0 +1,41 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import, unicode_literals
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import JSONField
+
+
+class BillingRun(models.Model):
+    billing_date = models.DateField(
+        help_text="The billing date the documents were generated for."
+    )
+    started_at = models.DateTimeField()
+    duration = models.FloatField(
+        help_text="How long the documents generation took, in seconds."
+    )
+    summary = JSONField(
+        blank=True, default=dict, encoder=DjangoJSONEncoder,
+        help_text="The time spent and the queries made in each phase of the run, and the number "
+                  "of customers, subscriptions, entries and documents processed."
+    )
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return u'{} - {:.2f}s'.format(self.billing_date, self.duration)
@@ -10,6 +10,7 @@ from django.utils import timezone
 
 from silver.models import Subscription, Plan
 from silver.models.documents.entries import OriginType
+from silver.proration import cached_proration
 from silver.utils.dates import end_of_interval
 from silver.utils.models import AutoCleanModelMixin
 
@@ -156,6 +157,14 @@ class Bonus(AutoCleanModelMixin, models.Model):
 
     def extra_proration_fraction(
         self, subscription, start_date, end_date, entry_type: OriginType
+    ) -> Tuple[Fraction, bool]:
+        return cached_proration(
+            self, subscription, start_date, end_date, entry_type,
+            lambda: self._compute_extra_proration_fraction(subscription, start_date, end_date, entry_type)
+        )
+
+    def _compute_extra_proration_fraction(
+        self, subscription, start_date, end_date, entry_type: OriginType
     ) -> Tuple[Fraction, bool]:
         entry_start_date = start_date
         entry_end_date = end_date
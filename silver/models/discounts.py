@@ -26,6 +26,7 @@ from . import Plan
 from .subscriptions import Subscription
 from .documents.entries import OriginType
 from .fields import field_template_path
+from silver.proration import cached_proration
 from silver.utils.dates import end_of_interval, DateInterval
 from silver.utils.models import AutoCleanModelMixin
 
@@ -310,6 +311,14 @@ class Discount(AutoCleanModelMixin, models.Model):
 
     def extra_proration_fraction(
         self, subscription, start_date, end_date, entry_type: OriginType
+    ) -> Tuple[Fraction, bool, DateInterval]:
+        return cached_proration(
+            self, subscription, start_date, end_date, entry_type,
+            lambda: self._compute_extra_proration_fraction(subscription, start_date, end_date, entry_type)
+        )
+
+    def _compute_extra_proration_fraction(
+        self, subscription, start_date, end_date, entry_type: OriginType
     ) -> Tuple[Fraction, bool, DateInterval]:
         entry_start_date = start_date
         entry_end_date = end_date
@@ -14,7 +14,12 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import json
 import logging
+import threading
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 
@@ -23,16 +28,20 @@ from model_utils import Choices
 
 from django.apps import apps
 from django.db.models import JSONField
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from django.core.exceptions import ValidationError, NON_FIELD_ERRORS
 from django.core.serializers.json import DjangoJSONEncoder
 from django.urls import reverse
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models, router
 from django.db import transaction as db_transaction
-from django.db.models import Max, ForeignKey, F
+from django.db.models import (
+    Max, ForeignKey, F, Q, ExpressionWrapper, Func, OuterRef, Subquery, Value,
+    prefetch_related_objects
+)
+from django.db.models.functions import Coalesce
 from django.template.loader import select_template
 from django.utils import timezone
 from django.utils.encoding import force_str
@@ -45,9 +54,10 @@ from silver.currencies import CurrencyConverter, RateNotFound
 from silver.models.billing_entities import Customer, Provider
 from silver.models.documents.entries import DocumentEntry
 from silver.models.documents.pdf import PDF
+from silver.models.ledger import record_document_transition
 from silver.utils.decorators import require_transaction_currency_and_xe_rate
 from silver.utils.international import currencies
-from silver.utils.models import AutoCleanModelMixin
+from silver.utils.models import AutoCleanModelMixin, AutoDateTimeField
 from silver.utils.transition import locking_atomic_transition
 
 _storage = getattr(settings, 'SILVER_DOCUMENT_STORAGE', None)
@@ -71,7 +81,50 @@ def documents_pdf_path(document, filename):
     return path
 
 
+def _amount_field():
+    return models.DecimalField(max_digits=19, decimal_places=2)
+
+
+def _transactions_amount(states):
+    Transaction = apps.get_model('silver.Transaction')
+
+    # the invoices and proformas are stored in the same table, so a document's transactions
+    # are the ones referencing it either as their invoice or as their proforma
+    amounts = Transaction.objects.filter(
+        Q(invoice=OuterRef('pk')) | Q(proforma=OuterRef('pk')), state__in=states
+    ).order_by().annotate(amount_sum=Func(F('amount'), function='SUM')).values('amount_sum')
+
+    return Coalesce(Subquery(amounts, output_field=_amount_field()),
+                    Value(Decimal('0.00')), output_field=_amount_field())
+
+
 class BillingDocumentQuerySet(models.QuerySet):
+    def with_balances(self):
+        """
+            Annotates the documents with the amounts of their transactions, in the transaction
+            currency, computed by the same query: `paid_amount` (settled), `pending_amount`,
+            `charged_amount` (initial, pending and settled) and `outstanding_amount`, the stored
+            total minus the charged amount (None for the documents without a stored total).
+
+            The `amount_*_in_transaction_currency` properties use these values, as they were
+            when the documents were fetched, instead of querying each document's transactions.
+        """
+
+        if 'charged_amount' in self.query.annotations:
+            return self
+
+        States = apps.get_model('silver.Transaction').States
+        charged_amount = _transactions_amount([States.Initial, States.Pending, States.Settled])
+
+        return self.annotate(
+            paid_amount=_transactions_amount([States.Settled]),
+            pending_amount=_transactions_amount([States.Pending]),
+            charged_amount=charged_amount,
+            outstanding_amount=ExpressionWrapper(
+                F('_total_in_transaction_currency') - charged_amount, output_field=_amount_field()
+            ),
+        )
+
     def due_this_month(self):
         return self.filter(
             state=BillingDocumentBase.STATES.ISSUED,
@@ -109,6 +162,27 @@ def get_billing_documents_kinds():
             for subclass in BillingDocumentBase.__subclasses__())
 
 
+_billing_documents_classes = {}
+
+
+def get_billing_document_class(kind):
+    """
+        :return: The BillingDocumentBase subclass matching the given kind, or None.
+    """
+
+    document_class = _billing_documents_classes.get(kind)
+    if document_class is None:
+        # Rebuilt on misses, in case subclasses were defined after the last lookup
+        _billing_documents_classes.clear()
+        _billing_documents_classes.update(
+            (subclass.__name__.lower(), subclass)
+            for subclass in BillingDocumentBase.__subclasses__()
+        )
+        document_class = _billing_documents_classes.get(kind)
+
+    return document_class
+
+
 class BillingDocumentBase(AutoCleanModelMixin, models.Model):
     objects = BillingDocumentManager.from_queryset(BillingDocumentQuerySet)()
 
@@ -175,6 +249,8 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
 
     is_storno = models.BooleanField(default=False)
 
+    updated_at = AutoDateTimeField(default=timezone.now, db_index=True)
+
     _document_entries = None
 
     # These fields are not allowed to change after issuing the document, or be different in DB when
@@ -187,6 +263,15 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
     class Meta:
         unique_together = ('kind', 'provider', 'series', 'number')
         ordering = ('-issue_date', 'series', '-number')
+        indexes = [
+            # the issued documents, by due date (due_today, overdue, due_this_month...)
+            models.Index(fields=['kind', 'due_date'], condition=Q(state='issued'),
+                         name='silver_doc_issued_due_idx'),
+            # the customers' documents, by state (e.g. the ones to be paid through a new
+            # payment method)
+            models.Index(fields=['customer', 'kind', 'state'],
+                         name='silver_doc_cust_kind_state_idx'),
+        ]
 
     def __init__(self, *args, **kwargs):
         super(BillingDocumentBase, self).__init__(*args, **kwargs)
@@ -194,9 +279,9 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
         if not self.kind:
             self.kind = self.__class__.__name__.lower()
         else:
-            for subclass in BillingDocumentBase.__subclasses__():
-                if subclass.__name__.lower() == self.kind:
-                    self.__class__ = subclass
+            document_class = get_billing_document_class(self.kind)
+            if document_class:
+                self.__class__ = document_class
 
     def _get_entries(self):
         if not self._document_entries:
@@ -315,27 +400,35 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
             bound_transition_method()
 
     def clone_into_draft(self):
-        copied_fields = {
-            'customer': self.customer,
-            'provider': self.provider,
-            'currency': self.currency,
-            'sales_tax_percent': self.sales_tax_percent,
-            'sales_tax_name': self.sales_tax_name
-        }
+        return self.clone_into_drafts([self])[0]
+
+    @classmethod
+    def clone_into_drafts(cls, documents):
+        """
+            Clones the given documents into drafts, along with their entries. The drafts and
+            the entries' clones are inserted through a query each (see `create_drafts`).
 
-        clone = self.__class__._default_manager.create(**copied_fields)
-        clone.state = self.STATES.DRAFT
+            :return: The clones, in the order of the given documents.
+        """
 
-        # clone entries too
-        for entry in self._entries:
-            entry_clone = entry.clone()
-            document_type_name = self.__class__.__name__.lower()
-            setattr(entry_clone, document_type_name, clone)
-            entry_clone.save()
+        documents = list(documents)
+        prefetch_related_objects(documents, 'customer', 'provider')
+
+        with db_transaction.atomic():
+            clones = create_drafts([
+                document.__class__(
+                    customer=document.customer,
+                    provider=document.provider,
+                    currency=document.currency,
+                    sales_tax_percent=document.sales_tax_percent,
+                    sales_tax_name=document.sales_tax_name
+                )
+                for document in documents
+            ])
 
-        clone.save()
+            clone_documents_entries(documents, clones)
 
-        return clone
+        return clones
 
     def full_clean(self, *args, **kwargs):
         self.clean_defaults()
@@ -541,6 +634,9 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
                                             context=context,
                                             upload=upload)
 
+        if pdf_file_object and upload:
+            touch_billing_documents(self.pk)
+
         return pdf_file_object
 
     def generate_html(self, state=None, request=None):
@@ -604,6 +700,9 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
     @property
     @require_transaction_currency_and_xe_rate
     def amount_paid_in_transaction_currency(self):
+        if getattr(self, 'paid_amount', None) is not None:
+            return self.paid_amount
+
         Transaction = apps.get_model('silver.Transaction')
 
         return sum([transaction.amount
@@ -612,6 +711,9 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
     @property
     @require_transaction_currency_and_xe_rate
     def amount_pending_in_transaction_currency(self):
+        if getattr(self, 'pending_amount', None) is not None:
+            return self.pending_amount
+
         Transaction = apps.get_model('silver.Transaction')
 
         return sum([transaction.amount
@@ -620,6 +722,9 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
     @property
     @require_transaction_currency_and_xe_rate
     def amount_to_be_charged_in_transaction_currency(self):
+        if getattr(self, 'charged_amount', None) is not None:
+            return self.total_in_transaction_currency - self.charged_amount
+
         Transaction = apps.get_model('silver.Transaction')
 
         return self.total_in_transaction_currency - sum([
@@ -632,6 +737,153 @@ class BillingDocumentBase(AutoCleanModelMixin, models.Model):
         ])
 
 
+_BULK_CREATE_MARKER = 'bulk_create_marker'
+
+
+def _set_inserted_primary_keys(documents, connection):
+    # The database doesn't return the inserted rows' primary keys, so the documents are marked
+    # through their (draft, thus unused) archived customer, which is restored afterwards.
+    archived_customers = [document.archived_customer for document in documents]
+    marker = uuid.uuid4().hex
+    for index, document in enumerate(documents):
+        document.archived_customer = {_BULK_CREATE_MARKER: marker, 'index': index}
+
+    BillingDocumentBase._base_manager.bulk_create(documents)
+
+    inserted = BillingDocumentBase._base_manager.filter(
+        **{'archived_customer__{}'.format(_BULK_CREATE_MARKER): marker}
+    ).values_list('pk', 'archived_customer')
+    for pk, archived_customer in inserted:
+        document = documents[archived_customer['index']]
+        document.pk = pk
+        document._state.adding = False
+        document._state.db = connection.alias
+
+    pks_by_archived_customer = defaultdict(list)
+    for document, archived_customer in zip(documents, archived_customers):
+        document.archived_customer = archived_customer
+        pks_by_archived_customer[json.dumps(archived_customer, cls=DjangoJSONEncoder,
+                                            sort_keys=True)].append(document.pk)
+
+    for archived_customer, pks in pks_by_archived_customer.items():
+        BillingDocumentBase._base_manager.filter(pk__in=pks) \
+            .update(archived_customer=json.loads(archived_customer))
+
+
+def create_drafts(documents):
+    """
+        Saves the given new draft documents through a single insert query (along with a query
+        reading their primary keys, and one restoring their archived customers, on databases
+        which don't return them, e.g. SQLite and MySQL).
+
+        Their defaults are set like `save` does, but they are neither validated nor sent through
+        the `post_save` signals, whose receivers only handle the documents' transitions and the
+        invoices issued out of proformas. They are meant for drafts built out of valid documents
+        (e.g. clones and stornos).
+
+        :return: The given documents.
+    """
+
+    documents = list(documents)
+    connection = connections[router.db_for_write(BillingDocumentBase)]
+
+    for document in documents:
+        # without queries, for the documents whose customers and providers are loaded
+        document.clean_defaults()
+
+    with db_transaction.atomic(using=connection.alias, savepoint=False):
+        if connection.features.can_return_rows_from_bulk_insert:
+            BillingDocumentBase._base_manager.bulk_create(documents)
+        else:
+            _set_inserted_primary_keys(documents, connection)
+
+    for document in documents:
+        document._init_states()
+
+    return documents
+
+
+def clone_documents_entries(documents, clones, storno=False):
+    """
+        Clones the entries of each of the given documents into the clone at the same position,
+        reading the entries through a single query and inserting their clones through another.
+
+        :param storno: Negate the unit prices of the cloned entries.
+        :return: The cloned entries.
+    """
+
+    documents_ids = {kind: {document.pk for document in documents if document.kind == kind}
+                     for kind in ('invoice', 'proforma')}
+    entries = DocumentEntry.objects.filter(
+        Q(invoice__in=documents_ids['invoice']) | Q(proforma__in=documents_ids['proforma'])
+    ).order_by('pk')
+
+    # the entries of a proforma and of its invoice are shared
+    documents_entries = defaultdict(list)
+    for entry in entries:
+        if entry.invoice_id in documents_ids['invoice']:
+            documents_entries[('invoice', entry.invoice_id)].append(entry)
+        if entry.proforma_id in documents_ids['proforma']:
+            documents_entries[('proforma', entry.proforma_id)].append(entry)
+
+    entry_clones = []
+    for document, clone in zip(documents, clones):
+        for entry in documents_entries[(document.kind, document.pk)]:
+            entry_clone = entry.clone()
+            if storno:
+                entry_clone.description = 'Storno ' + entry.description
+                entry_clone.unit_price = -entry.unit_price
+
+            setattr(entry_clone, clone.kind, clone)
+            entry_clones.append(entry_clone)
+
+    DocumentEntry.objects.bulk_create(entry_clones)
+    # the entries are part of their documents' representation
+    touch_billing_documents(*[clone.pk for clone in clones])
+
+    return entry_clones
+
+
+_deferred_touches = threading.local()
+
+
+def touch_billing_documents(*document_ids):
+    """
+        Bumps the `updated_at` of the given documents, when related objects which are part of
+        their representation (entries, transactions, PDFs) change.
+    """
+
+    document_ids = {document_id for document_id in document_ids if document_id}
+    if not document_ids:
+        return
+
+    deferred_ids = getattr(_deferred_touches, 'ids', None)
+    if deferred_ids is not None:
+        deferred_ids.update(document_ids)
+        return
+
+    BillingDocumentBase.objects.filter(pk__in=document_ids).update(updated_at=timezone.now())
+
+
+@contextmanager
+def deferred_billing_documents_touches():
+    """
+        Collects the documents touched within the block and touches them through a single
+        query at its end, instead of a query per changed entry or transaction.
+    """
+
+    if getattr(_deferred_touches, 'ids', None) is not None:
+        yield
+        return
+
+    _deferred_touches.ids = set()
+    try:
+        yield
+    finally:
+        document_ids, _deferred_touches.ids = _deferred_touches.ids, None
+        touch_billing_documents(*document_ids)
+
+
 def create_transaction_for_document(document):
     # get a usable, recurring payment_method for the customer
     PaymentMethod = apps.get_model('silver.PaymentMethod')
@@ -663,6 +915,9 @@ def post_document_save(sender, instance, created=False, **kwargs):
     # The document has been transitioned before being saved
     delattr(document, 'state_recently_transitioned_to')
 
+    # Account for the issued or canceled document in its customer's balance
+    record_document_transition(document)
+
     # Transition related document too, if needed
     document.sync_related_document_state()
 
@@ -682,3 +937,9 @@ def post_document_save(sender, instance, created=False, **kwargs):
 
     # Generate a PDF
     document.mark_for_generation()
+
+
+@receiver(post_save, sender=DocumentEntry)
+@receiver(post_delete, sender=DocumentEntry)
+def post_document_entry_change(sender, instance, **kwargs):
+    touch_billing_documents(instance.invoice_id, instance.proforma_id)
@@ -23,9 +23,10 @@ from enum import Enum
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from silver.utils.decorators import require_transaction_currency_and_xe_rate
-from silver.utils.models import AutoCleanModelMixin
+from silver.utils.models import AutoCleanModelMixin, AutoDateTimeField
 
 
 class DocumentEntry(AutoCleanModelMixin, models.Model):
@@ -43,6 +44,7 @@ class DocumentEntry(AutoCleanModelMixin, models.Model):
                                 blank=True, null=True, on_delete=models.CASCADE)
     proforma = models.ForeignKey('BillingDocumentBase', related_name='proforma_entries',
                                  blank=True, null=True, on_delete=models.CASCADE)
+    updated_at = AutoDateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         verbose_name = 'Entry'
@@ -147,7 +149,7 @@ class DocumentEntry(AutoCleanModelMixin, models.Model):
             unit=self.unit,
             quantity=self.quantity,
             unit_price=self.unit_price,
-            product_code=self.product_code,
+            product_code_id=self.product_code_id,
             start_date=self.start_date,
             end_date=self.end_date,
             prorated=self.prorated
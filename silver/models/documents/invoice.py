@@ -16,13 +16,15 @@ from __future__ import absolute_import
 
 from django.apps import apps
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.db.models.signals import pre_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from silver.models.documents.base import (
-    BillingDocumentBase, BillingDocumentManager, BillingDocumentQuerySet
+    BillingDocumentBase, BillingDocumentManager, BillingDocumentQuerySet,
+    clone_documents_entries, create_drafts
 )
-from silver.models.documents.entries import DocumentEntry
 from silver.models.billing_entities import Provider
 from silver.utils.transition import locking_atomic_transition
 
@@ -74,7 +76,7 @@ class Invoice(BillingDocumentBase):
     def entries(self):
         return self.invoice_entries.all()
 
-    def create_storno(self):
+    def _check_storno_allowed(self):
         if self.is_storno:
             raise ValueError("This invoice is already a storno one.")
 
@@ -83,32 +85,47 @@ class Invoice(BillingDocumentBase):
                 "The invoice state must either be canceled or paid in order to create a storno."
             )
 
+    def create_storno(self):
+        return self.create_stornos([self])[0]
+
+    @classmethod
+    def create_stornos(cls, invoices):
+        """
+            Creates a storno for each of the given canceled or paid invoices, holding their
+            entries with negated unit prices. The stornos and their entries are inserted
+            through a query each (see `create_drafts`).
+
+            :raises ValueError: If any of the invoices can't be reverted, before creating any
+            storno.
+            :return: The stornos, in the order of the given invoices.
+        """
+
+        invoices = list(invoices)
+        for invoice in invoices:
+            invoice._check_storno_allowed()
+
+        prefetch_related_objects(invoices, 'customer', 'provider')
+
         with transaction.atomic():
-            storno_invoice = Invoice.objects.create(
-                related_document=self,
-                provider=self.provider,
-                customer=self.customer,
-                is_storno=True,
-                sales_tax_name=self.sales_tax_name,
-                sales_tax_percent=self.sales_tax_percent,
-                currency=self.currency,
-                transaction_currency=self.transaction_currency,
-                transaction_xe_date=self.transaction_xe_date,
-                transaction_xe_rate=self.transaction_xe_rate,
-            )
-            storno_invoice.invoice_entries.add(*[DocumentEntry.objects.create(
-                description="Storno " + entry.description,
-                unit_price=-entry.unit_price,
-                unit=entry.unit,
-                quantity=entry.quantity,
-                product_code=entry.product_code,
-                start_date=entry.start_date,
-                end_date=entry.end_date,
-                prorated=entry.prorated,
-                invoice=storno_invoice,
-            ) for entry in self.entries])
-
-            return storno_invoice
+            stornos = create_drafts([
+                Invoice(
+                    related_document=invoice,
+                    provider=invoice.provider,
+                    customer=invoice.customer,
+                    is_storno=True,
+                    sales_tax_name=invoice.sales_tax_name,
+                    sales_tax_percent=invoice.sales_tax_percent,
+                    currency=invoice.currency,
+                    transaction_currency=invoice.transaction_currency,
+                    transaction_xe_date=invoice.transaction_xe_date,
+                    transaction_xe_rate=invoice.transaction_xe_rate,
+                )
+                for invoice in invoices
+            ])
+
+            clone_documents_entries(invoices, stornos, storno=True)
+
+        return stornos
 
     @property
     def proforma(self):
@@ -133,6 +150,8 @@ def post_invoice_save(sender, instance, created=False, **kwargs):
     invoice = instance
     proforma = invoice.related_document
 
-    if proforma:
-        Transaction.objects.filter(proforma=proforma).update(invoice=invoice)
+    # the stornos are related to the invoices they revert
+    if proforma and not invoice.is_storno:
+        Transaction.objects.filter(proforma=proforma).update(invoice=invoice,
+                                                             updated_at=timezone.now())
         BillingLog.objects.filter(proforma=proforma).update(invoice=invoice)
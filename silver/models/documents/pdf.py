@@ -18,17 +18,16 @@ import logging
 import uuid
 from io import BytesIO, SEEK_SET
 
-from xhtml2pdf import pisa
-
 from django.conf import settings
 from django.db import transaction
 from django.db.models import (
-    Model, FileField, TextField, UUIDField, PositiveIntegerField, F, IntegerField
+    Model, FileField, TextField, UUIDField, PositiveIntegerField, F, IntegerField, Index, Q
 )
 from django.db.models.functions import Greatest, Cast
 from django.utils.module_loading import import_string
 from django.core.files import File
 
+from silver.metrics import PDF_RENDER_SECONDS
 from silver.utils.pdf import fetch_resources
 
 logger = logging.getLogger(__name__)
@@ -43,6 +42,14 @@ def get_storage():
     return storage_class(*storage_settings[1], **storage_settings[2])
 
 
+def pisa_document(*args, **kwargs):
+    # xhtml2pdf and reportlab are slow to import, so they are only loaded by the processes
+    # which render PDFs
+    from xhtml2pdf import pisa
+
+    return pisa.pisaDocument(*args, **kwargs)
+
+
 def get_upload_path(instance, filename):
     return instance.upload_path
 
@@ -54,19 +61,26 @@ class PDF(Model):
     dirty = PositiveIntegerField(default=0)
     upload_path = TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # only the PDFs waiting to be generated
+            Index(fields=['dirty'], condition=Q(dirty__gt=0), name='silver_pdf_dirty_idx'),
+        ]
+
     @property
     def url(self):
         return self.pdf_file.url if self.pdf_file else None
 
     def generate(self, template, context, upload=True):
-        html = template.render(context)
-        pdf_file_object = BytesIO()
-        pisa_status = pisa.pisaDocument(
-            src=BytesIO(html.encode("UTF-8")),
-            dest=pdf_file_object,
-            encoding='UTF-8',
-            link_callback=fetch_resources
-        )
+        with PDF_RENDER_SECONDS.time():
+            html = template.render(context)
+            pdf_file_object = BytesIO()
+            pisa_status = pisa_document(
+                src=BytesIO(html.encode("UTF-8")),
+                dest=pdf_file_object,
+                encoding='UTF-8',
+                link_callback=fetch_resources
+            )
 
         if pisa_status.err:
             logger.error(
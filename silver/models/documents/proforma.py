@@ -19,6 +19,7 @@ from django_fsm import TransitionNotAllowed
 from django.core.exceptions import ValidationError
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 from silver.models.billing_entities import Provider
 from silver.models.documents.base import (
@@ -113,7 +114,8 @@ class Proforma(BillingDocumentBase):
 
         # For all the entries in the proforma => add the link to the new
         # invoice
-        DocumentEntry.objects.filter(proforma=self).update(invoice=invoice)
+        DocumentEntry.objects.filter(proforma=self).update(invoice=invoice,
+                                                           updated_at=timezone.now())
         return invoice
 
     @property
@@ -0,0 +1,226 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import, unicode_literals
+
+from django.db import connections, models, router, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from model_utils import Choices
+
+from silver.utils.international import currencies
+from silver.utils.models import AutoDateTimeField
+
+
+class LedgerEntry(models.Model):
+    """
+        A change of what a customer owes: a document being issued or canceled, or a transaction
+        being settled or refunded. Positive amounts increase what the customer owes.
+    """
+
+    class KINDS(object):
+        DOCUMENT_ISSUED = 'document_issued'
+        DOCUMENT_CANCELED = 'document_canceled'
+        TRANSACTION_SETTLED = 'transaction_settled'
+        TRANSACTION_REFUNDED = 'transaction_refunded'
+
+    KIND_CHOICES = Choices(
+        (KINDS.DOCUMENT_ISSUED, _('Document issued')),
+        (KINDS.DOCUMENT_CANCELED, _('Document canceled')),
+        (KINDS.TRANSACTION_SETTLED, _('Transaction settled')),
+        (KINDS.TRANSACTION_REFUNDED, _('Transaction refunded'))
+    )
+
+    customer = models.ForeignKey('Customer', on_delete=models.CASCADE,
+                                 related_name='ledger_entries')
+    kind = models.CharField(choices=KIND_CHOICES, max_length=20)
+    currency = models.CharField(choices=currencies, max_length=4)
+    amount = models.DecimalField(max_digits=19, decimal_places=2)
+    invoice = models.ForeignKey('BillingDocumentBase', null=True, blank=True,
+                                on_delete=models.SET_NULL, related_name='+')
+    proforma = models.ForeignKey('BillingDocumentBase', null=True, blank=True,
+                                 on_delete=models.SET_NULL, related_name='+')
+    transaction = models.ForeignKey('Transaction', null=True, blank=True,
+                                    on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['customer', 'currency', 'created_at'],
+                         name='silver_ledger_cust_cur_idx'),
+        ]
+
+    def __str__(self):
+        return u'{} {} {}'.format(self.get_kind_display(), self.amount, self.currency)
+
+
+class CustomerBalance(models.Model):
+    """
+        The sum of a customer's ledger entries in a currency, updated along with each entry.
+    """
+
+    customer = models.ForeignKey('Customer', on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(choices=currencies, max_length=4)
+    amount = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    updated_at = AutoDateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['currency']
+        unique_together = ('customer', 'currency')
+
+    def __str__(self):
+        return u'{} {}'.format(self.amount, self.currency)
+
+
+def is_ledger_document(document):
+    """
+        Invoices issued from proformas are accounted through their proformas, and the stornos
+        of canceled invoices through the invoices' cancellation.
+    """
+
+    if document.kind != 'invoice' or not document.related_document_id:
+        return True
+
+    related_document = document.related_document
+    if document.is_storno:
+        return related_document.state != related_document.STATES.CANCELED
+
+    return related_document.kind != 'proforma'
+
+
+def document_ledger_amount(document):
+    """
+        :return: The (currency, amount) a document accounts for, preferably in its transaction
+        currency, which is the one its transactions are made in.
+    """
+
+    amount = document.total_in_transaction_currency
+    if amount is None:
+        return document.currency, document.total
+
+    return document.transaction_currency or document.currency, amount
+
+
+_BALANCE_UPSERTS = {
+    'postgresql': 'ON CONFLICT ({customer}, {currency}) '
+                  'DO UPDATE SET {amount} = {table}.{amount} + EXCLUDED.{amount}, '
+                  '{updated_at} = EXCLUDED.{updated_at}',
+    'sqlite': 'ON CONFLICT ({customer}, {currency}) '
+              'DO UPDATE SET {amount} = {table}.{amount} + excluded.{amount}, '
+              '{updated_at} = excluded.{updated_at}',
+    'mysql': 'ON DUPLICATE KEY UPDATE {amount} = {amount} + VALUES({amount}), '
+             '{updated_at} = VALUES({updated_at})',
+}
+
+
+def _supports_balance_upsert(connection):
+    if connection.vendor == 'sqlite':
+        # ON CONFLICT ... DO UPDATE was added in SQLite 3.24
+        return connection.Database.sqlite_version_info >= (3, 24)
+
+    return connection.vendor in _BALANCE_UPSERTS
+
+
+def add_to_customer_balance(customer_id, currency, amount):
+    """
+        Adds the given amount to the customer's balance in the given currency, creating the
+        balance if needed, through a single upsert query where the database supports it.
+    """
+
+    connection = connections[router.db_for_write(CustomerBalance)]
+    updated_at = timezone.now()
+
+    if not _supports_balance_upsert(connection):
+        balances = CustomerBalance.objects.filter(customer_id=customer_id, currency=currency)
+        if not balances.update(amount=F('amount') + amount, updated_at=updated_at):
+            balance, created = CustomerBalance.objects.get_or_create(
+                customer_id=customer_id, currency=currency, defaults={'amount': amount}
+            )
+            if not created:
+                # concurrently created
+                balances.update(amount=F('amount') + amount, updated_at=updated_at)
+
+        return
+
+    opts = CustomerBalance._meta
+    fields = [opts.get_field(name) for name in ('customer', 'currency', 'amount', 'updated_at')]
+    columns = {field.name: connection.ops.quote_name(field.column) for field in fields}
+    table = connection.ops.quote_name(opts.db_table)
+
+    sql = 'INSERT INTO {table} ({customer}, {currency}, {amount}, {updated_at}) ' \
+          'VALUES (%s, %s, %s, %s) '.format(table=table, **columns) + \
+          _BALANCE_UPSERTS[connection.vendor].format(table=table, **columns)
+    params = [field.get_db_prep_save(value, connection)
+              for field, value in zip(fields, (customer_id, currency, amount, updated_at))]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_ledger_entry(customer_id, kind, currency, amount, **related):
+    """
+        Creates a ledger entry and adds its amount to the customer's balance in its currency,
+        in the same database transaction. Usually called within the transition's transaction,
+        which is rolled back along with the entry if any of them fails.
+    """
+
+    with db_transaction.atomic(savepoint=False):
+        entry = LedgerEntry.objects.create(customer_id=customer_id, kind=kind,
+                                           currency=currency, amount=amount, **related)
+
+        add_to_customer_balance(customer_id, currency, amount)
+
+    return entry
+
+
+def record_document_transition(document):
+    kind = {
+        document.STATES.ISSUED: LedgerEntry.KINDS.DOCUMENT_ISSUED,
+        document.STATES.CANCELED: LedgerEntry.KINDS.DOCUMENT_CANCELED,
+    }.get(document.state)
+    if not kind or not is_ledger_document(document):
+        return None
+
+    currency, amount = document_ledger_amount(document)
+    if kind == LedgerEntry.KINDS.DOCUMENT_CANCELED:
+        amount = -amount
+
+    return record_ledger_entry(document.customer_id, kind, currency, amount,
+                               **{document.kind: document})
+
+
+def record_transaction_transition(transaction, previous_state=None):
+    """
+        Accounts for the transaction reaching its current state from the given one (None for
+        new transactions), through FSM transitions or not, e.g. a transaction created already
+        settled is accounted like a settled one.
+    """
+
+    States = transaction.States
+    changes = []
+    if (transaction.state in (States.Settled, States.Refunded) and
+            previous_state not in (States.Settled, States.Refunded)):
+        changes.append((LedgerEntry.KINDS.TRANSACTION_SETTLED, -transaction.amount))
+    if transaction.state == States.Refunded and previous_state != States.Refunded:
+        changes.append((LedgerEntry.KINDS.TRANSACTION_REFUNDED, transaction.amount))
+
+    return [
+        record_ledger_entry(transaction.payment_method.customer_id, kind, transaction.currency,
+                            amount, transaction=transaction, invoice_id=transaction.invoice_id,
+                            proforma_id=transaction.proforma_id)
+        for kind, amount in changes
+    ]
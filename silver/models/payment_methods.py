@@ -14,6 +14,8 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import logging
+
 from typing import Union
 
 from itertools import chain
@@ -26,17 +28,22 @@ from model_utils.managers import InheritanceManager
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, transaction as db_transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from silver import payment_processors
-from silver.models import Invoice, Proforma
+from silver.models import DocumentEntry, Invoice, Proforma
 from silver.models.billing_entities import Customer
+from silver.models.documents.base import touch_billing_documents
 from silver.models.transactions import Transaction
 
 
+logger = logging.getLogger(__name__)
+
+
 class PaymentMethodInvalid(Exception):
     pass
 
@@ -197,25 +204,109 @@ class PaymentMethod(models.Model):
                                       self.pk)
 
 
+def _prefetch_entries(documents):
+    # the documents' totals are computed out of their entries, unless they are stored already
+    for kind, other_kind in (('invoice', 'proforma'), ('proforma', 'invoice')):
+        kind_documents = [
+            document for document in documents
+            if document.kind == kind and document._total_in_transaction_currency is None
+        ]
+        if kind_documents:
+            prefetch_related_objects(kind_documents, Prefetch(
+                '{}_entries'.format(kind),
+                queryset=DocumentEntry.objects.select_related(other_kind)
+            ))
+
+
+def _select_documents_for_update(queryset):
+    if connections[queryset.db].features.has_select_for_update_of:
+        # the related documents are joined through a nullable join, which can't be locked
+        return queryset.select_for_update(of=('self',))
+
+    # e.g. MySQL 5.7 and MariaDB, which lock the joined customers and providers rows too
+    return queryset.select_for_update()
+
+
 def create_transactions_for_issued_documents(payment_method):
+    """
+        Creates a transaction through the given payment method for each of its customer's
+        issued documents which still have to be charged.
+
+        The documents are checked like `Transaction.clean` does, but their amounts to be
+        charged are computed for all of them at once and the transactions are created in bulk.
+
+        :return: The created transactions.
+    """
+
     customer = payment_method.customer
 
     if payment_method.canceled or not payment_method.verified:
         return []
 
-    transactions = []
-
-    for document in chain(
-        Proforma.objects.filter(related_document=None, customer=customer,
-                                state=Proforma.STATES.ISSUED),
-        Invoice.objects.filter(state=Invoice.STATES.ISSUED, customer=customer)
-    ):
-        try:
-            transactions.append(Transaction.objects.create(
-                document=document, payment_method=payment_method
-            ))
-        except ValidationError:
-            continue
+    with db_transaction.atomic():
+        # lock the documents, so that they are not charged twice by concurrent calls
+        documents = list(chain(
+            _select_documents_for_update(
+                Proforma.objects.filter(related_document=None, customer=customer,
+                                        state=Proforma.STATES.ISSUED).with_balances()
+            ),
+            _select_documents_for_update(
+                Invoice.objects.filter(state=Invoice.STATES.ISSUED, customer=customer)
+                               .with_balances()
+            )
+        ))
+        if not documents:
+            return []
+
+        _prefetch_entries(documents)
+
+        transactions = []
+        for document in documents:
+            currency = document.transaction_currency
+            if (payment_method.allowed_currencies and
+                    currency not in payment_method.allowed_currencies):
+                continue
+
+            amount = document.amount_to_be_charged_in_transaction_currency
+            if amount is None:
+                # the transaction currency exchange rate is missing
+                continue
+
+            if amount < 0:
+                continue
+
+            transaction = Transaction(payment_method=payment_method, currency=currency,
+                                      amount=amount)
+            if document.kind == 'invoice':
+                transaction.invoice = document
+                transaction.proforma = document.related_document
+            else:
+                transaction.proforma = document
+
+            transactions.append(transaction)
+
+        if not transactions:
+            return []
+
+        Transaction.objects.bulk_create(transactions)
+        if transactions[0].pk is None:
+            # the database doesn't return the primary keys of the inserted rows
+            transactions = list(Transaction.objects.filter(
+                uuid__in=[transaction.uuid for transaction in transactions]
+            ).order_by('pk'))
+
+        touch_billing_documents(*chain.from_iterable(
+            (transaction.invoice_id, transaction.proforma_id) for transaction in transactions
+        ))
+
+    for transaction in transactions:
+        logger.info('[Models][Transaction]: %s', {
+            'detail': 'A transaction was created.',
+            'transaction_id': transaction.id,
+            'customer_id': customer.id,
+            'invoice_id': transaction.invoice_id,
+            'proforma_id': transaction.proforma_id
+        })
 
     return transactions
 
@@ -253,4 +344,11 @@ def post_payment_method_save(sender, instance, **kwargs):
         return
 
     if not previous_instance or not previous_instance.verified:
-        create_transactions_for_issued_documents(payment_method)
+        if getattr(settings, 'SILVER_CREATE_TRANSACTIONS_ASYNC', False):
+            from silver.tasks import create_transactions_for_payment_method
+
+            db_transaction.on_commit(
+                lambda: create_transactions_for_payment_method.delay(payment_method.pk)
+            )
+        else:
+            create_transactions_for_issued_documents(payment_method)
@@ -35,7 +35,7 @@ from model_utils import Choices
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -47,9 +47,11 @@ from silver.models.documents.entries import OriginType
 from silver.models.billing_entities import Customer
 from silver.models.documents import DocumentEntry
 from silver.models.fields import field_template_path
+from silver.proration import cached_proration
 from silver.utils.dates import ONE_DAY, first_day_of_month, first_day_of_interval, end_of_interval, monthdiff, \
     monthdiff_as_fraction
-from silver.utils.numbers import quantize_fraction
+from silver.utils.models import AutoDateTimeField
+from silver.utils.numbers import quantize_fraction, quantize_product, to_fraction
 from silver.validators import validate_reference
 
 
@@ -71,6 +73,12 @@ class MeteredFeatureUnitsLog(models.Model):
     class Meta:
         unique_together = ('metered_feature', 'subscription', 'start_datetime', 'end_datetime',
                            'annotation')
+        indexes = [
+            # the consumption queries filter by subscription, metered feature and datetimes
+            models.Index(fields=['subscription', 'metered_feature', 'start_datetime',
+                                 'end_datetime'],
+                         name='silver_mful_sub_mf_dates_idx'),
+        ]
 
     def clean(self):
         super(MeteredFeatureUnitsLog, self).clean()
@@ -120,6 +128,37 @@ class MeteredFeatureUnitsLog(models.Model):
         return self.metered_feature.name
 
 
+class MeteredFeatureUnitsLogArchive(models.Model):
+    """
+    The metered feature units logs replaced by a summary log when compacting the billed ones.
+    """
+
+    log_id = models.IntegerField(help_text='The id of the compacted log.')
+    metered_feature = models.ForeignKey('MeteredFeature', related_name='+',
+                                        on_delete=models.CASCADE)
+    subscription = models.ForeignKey('Subscription', related_name='archived_mf_log_entries',
+                                     on_delete=models.CASCADE)
+    consumed_units = models.DecimalField(max_digits=19, decimal_places=4)
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+    annotation = models.CharField(max_length=256, null=True, blank=True)
+
+    summary_log = models.ForeignKey(
+        'MeteredFeatureUnitsLog', related_name='archived_logs', null=True, blank=True,
+        on_delete=models.SET_NULL, help_text='The log summing up the compacted logs.'
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subscription', 'metered_feature', 'start_datetime'],
+                         name='silver_mfula_sub_mf_start_idx'),
+        ]
+
+    def __str__(self):
+        return self.metered_feature.name
+
+
 @dataclass
 class OverageInfo:
     extra_consumed_units: Decimal
@@ -188,6 +227,54 @@ class Subscription(models.Model):
         help_text='The state the subscription is in.'
     )
     meta = JSONField(blank=True, null=True, default=dict, encoder=DjangoJSONEncoder)
+    updated_at = AutoDateTimeField(default=timezone.now, db_index=True)
+    next_plan_billing_date = models.DateField(
+        blank=True, null=True, db_index=True, editable=False,
+        help_text='The date before which the plan cannot be billed, if known.'
+    )
+    next_metered_features_billing_date = models.DateField(
+        blank=True, null=True, db_index=True, editable=False,
+        help_text='The date before which the metered features cannot be billed, if known.'
+    )
+
+    latest_billing_log = models.ForeignKey(
+        'BillingLog', blank=True, null=True, editable=False, on_delete=models.SET_NULL,
+        related_name='+', help_text='The billing log with the latest billing date.'
+    )
+
+    NEXT_BILLING_DATES_FIELDS = ('next_plan_billing_date', 'next_metered_features_billing_date')
+    # the fields the next billing dates depend on, along with the latest billing log
+    BILLING_DATES_DEPENDENCIES = ('plan', 'trial_end', 'start_date', 'cancel_date', 'ended_at',
+                                  'state')
+
+    _loaded_billing_values = None
+    _skipped_update_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Subscription, cls).from_db(db, field_names, values)
+        instance._loaded_billing_values = instance._get_billing_values()
+
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super(Subscription, self).refresh_from_db(*args, **kwargs)
+
+        self._loaded_billing_values = self._get_billing_values()
+
+    def _next_billing_dates_unknown(self):
+        # e.g. reset after changing the plan, and recomputed once the subscription is saved
+        return self.state == self.STATES.ACTIVE and any(
+            getattr(self, field) is None for field in self.NEXT_BILLING_DATES_FIELDS
+        )
+
+    def _get_billing_values(self):
+        fields = (self.BILLING_DATES_DEPENDENCIES + self.NEXT_BILLING_DATES_FIELDS +
+                  ('latest_billing_log',))
+
+        return {
+            field: self.__dict__.get(self._meta.get_field(field).attname) for field in fields
+        }
 
     def clean(self):
         errors = dict()
@@ -212,6 +299,73 @@ class Subscription(models.Model):
         if errors:
             raise ValidationError(errors)
 
+    def save(self, *args, **kwargs):
+        """
+        The latest billing log and the next billing dates are maintained by the billing logs'
+        receivers, so an instance loaded before the last billing must not overwrite them. When
+        no `update_fields` are given, they are left out of the update, unless they were changed
+        on the instance or the next billing dates have to be recomputed (because they are
+        unknown or the fields they depend on changed). In the latter case, the latest billing
+        log is read from the database first.
+        """
+
+        update_fields = kwargs.get('update_fields')
+        loaded_values = self._loaded_billing_values
+        skipped_fields = set()
+
+        if self._state.adding or kwargs.get('force_insert'):
+            recompute = True
+        elif loaded_values is None:
+            # not loaded from the database, so nothing is known about the saved values
+            self.latest_billing_log_id = Subscription.objects.filter(pk=self.pk) \
+                .values_list('latest_billing_log', flat=True).first()
+            recompute = True
+        else:
+            values = self._get_billing_values()
+            changed_fields = {field for field, value in values.items()
+                              if value != loaded_values[field]}
+
+            if changed_fields & set(self.NEXT_BILLING_DATES_FIELDS):
+                # set by the caller
+                recompute = False
+            elif 'latest_billing_log' in changed_fields:
+                recompute = True
+            elif changed_fields or self._next_billing_dates_unknown():
+                self.latest_billing_log_id = Subscription.objects.filter(pk=self.pk) \
+                    .values_list('latest_billing_log', flat=True).first()
+                recompute = True
+            else:
+                recompute = False
+
+            if update_fields is None:
+                skipped_fields = {'latest_billing_log'} - changed_fields
+                if not recompute:
+                    skipped_fields |= set(self.NEXT_BILLING_DATES_FIELDS) - changed_fields
+
+        if recompute:
+            # the next billing dates depend on the state, the dates and the plan
+            for field, value in self.get_next_billing_dates().items():
+                setattr(self, field, value)
+
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.NEXT_BILLING_DATES_FIELDS)
+
+        self._skipped_update_fields = skipped_fields
+        try:
+            super(Subscription, self).save(*args, **kwargs)
+        finally:
+            self._skipped_update_fields = ()
+
+        self._loaded_billing_values = self._get_billing_values()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Leaves the fields skipped by `save` out of the update. If no row is updated (e.g. it
+        # was deleted), the subscription is inserted along with all its fields.
+        values = [value for value in values if value[0].name not in self._skipped_update_fields]
+
+        return super(Subscription, self)._do_update(base_qs, using, pk_val, values,
+                                                    update_fields, forced_update)
+
     @property
     def provider(self):
         return self.plan.provider
@@ -548,6 +702,87 @@ class Subscription(models.Model):
             'plan_billed_up_to': self.start_date - ONE_DAY
         }
 
+    def get_next_billing_dates(self, billed_up_to_dates=None):
+        """
+        Computes the dates before which the plan and the metered features cannot be billed,
+        according to the `should_plan_be_billed` and `should_mfs_be_billed` conditions: the
+        cycles following the billed ones must have started.
+
+        They are lower bounds, used to skip the subscriptions which are not due, and
+        `should_be_billed` still decides if the subscription is billed on or after them. They
+        are None when they are unknown, e.g. for the canceled subscriptions.
+
+        :rtype: dict
+        """
+
+        next_billing_dates = dict.fromkeys(self.NEXT_BILLING_DATES_FIELDS)
+        if self.state != self.STATES.ACTIVE or not self.start_date:
+            return next_billing_dates
+
+        if billed_up_to_dates is None:
+            billed_up_to_dates = self.billed_up_to_dates
+
+        plan_billed_up_to = billed_up_to_dates['plan_billed_up_to']
+        if self.prebill_plan:
+            next_billing_dates['next_plan_billing_date'] = plan_billed_up_to + ONE_DAY
+        else:
+            billed_cycle_end_date = self.cycle_end_date(plan_billed_up_to + ONE_DAY)
+            if billed_cycle_end_date:
+                next_billing_dates['next_plan_billing_date'] = billed_cycle_end_date + ONE_DAY
+
+        billed_cycle_end_date = self.cycle_end_date(
+            billed_up_to_dates['metered_features_billed_up_to'] + ONE_DAY,
+            origin_type=OriginType.MeteredFeature
+        )
+        if billed_cycle_end_date:
+            next_billing_dates['next_metered_features_billing_date'] = billed_cycle_end_date + ONE_DAY
+
+        return next_billing_dates
+
+    def update_next_billing_dates(self, billed_up_to_dates=None):
+        next_billing_dates = self.get_next_billing_dates(billed_up_to_dates)
+        for field, value in next_billing_dates.items():
+            setattr(self, field, value)
+
+        # they are not part of the subscription's representation, so `updated_at` is kept
+        Subscription.objects.filter(pk=self.pk).update(**next_billing_dates)
+
+    def set_latest_billing_log(self, billing_log):
+        """
+        Points the subscription to its latest billing log and updates its next billing dates
+        accordingly, through a single query.
+        """
+
+        self.latest_billing_log = billing_log
+
+        next_billing_dates = self.get_next_billing_dates()
+        for field, value in next_billing_dates.items():
+            setattr(self, field, value)
+
+        Subscription.objects.filter(pk=self.pk).update(latest_billing_log=billing_log,
+                                                       **next_billing_dates)
+
+    def find_latest_billing_log(self):
+        return self.billing_logs.order_by('-billing_date', '-pk').first()
+
+    @classmethod
+    def possibly_due(cls, billing_date):
+        """
+        :returns: A Q object matching the active or canceled subscriptions which may have to be
+            billed at the given date, i.e. the canceled ones and the ones whose next billing
+            dates are due or unknown.
+        """
+
+        return (
+            models.Q(state=cls.STATES.CANCELED) |
+            models.Q(state=cls.STATES.ACTIVE) & (
+                models.Q(next_plan_billing_date=None) |
+                models.Q(next_plan_billing_date__lte=billing_date) |
+                models.Q(next_metered_features_billing_date=None) |
+                models.Q(next_metered_features_billing_date__lte=billing_date)
+            )
+        )
+
     def should_be_billed(self, billing_date, generate_documents_datetime=None):
         return (
             self.should_plan_be_billed(billing_date, generate_documents_datetime=generate_documents_datetime) or
@@ -680,20 +915,24 @@ class Subscription(models.Model):
 
     @property
     def is_billed_first_time(self):
-        return self.billing_logs.all().count() == 0
+        return self.latest_billing_log_id is None
 
     @property
     def last_billing_log(self):
-        return self.billing_logs.order_by('billing_date').last()
+        """
+        The billing log the subscription pointed to when it was loaded (or last billed through
+        this instance). Other instances of the subscription are not updated when it is billed,
+        so `refresh_from_db(fields=['latest_billing_log'])` may be needed to read the current
+        one.
+        """
+
+        return self.latest_billing_log
 
     @property
     def last_billing_date(self):
-        # ToDo: Improve this when dropping Django 1.8 support
-        try:
-            return self.billing_logs.all()[0].billing_date
-        except (BillingLog.DoesNotExist, IndexError):
-            # It should never get here.
-            return None
+        last_billing_log = self.last_billing_log
+
+        return last_billing_log.billing_date if last_billing_log else None
 
     def _should_activate_with_free_trial(self):
         return Subscription.objects.filter(
@@ -818,7 +1057,7 @@ class Subscription(models.Model):
         prorated, fraction = self._get_proration_status_and_fraction(start_date,
                                                                      end_date,
                                                                      OriginType.Plan)
-        plan_price = quantize_fraction(Fraction(str(self.plan.amount)) * fraction)
+        plan_price = quantize_product(self.plan.amount, fraction)
 
         context = self._build_entry_context({
             'name': self.plan.name,
@@ -1076,7 +1315,7 @@ class Subscription(models.Model):
                                                                      end_date,
                                                                      OriginType.Plan)
 
-        plan_price = quantize_fraction(Fraction(str(self.plan.amount)) * fraction)
+        plan_price = quantize_product(self.plan.amount, fraction)
 
         base_context = {
             'name': self.plan.name,
@@ -1116,8 +1355,8 @@ class Subscription(models.Model):
         return sum(
             [
                 (
-                    Fraction(str(bonus.amount)) if bonus.amount else
-                    Fraction(str(bonus.amount_percentage)) / 100 * included_units
+                    to_fraction(bonus.amount) if bonus.amount else
+                    to_fraction(bonus.amount_percentage) / 100 * included_units
                 ) * bonus.extra_proration_fraction(self, start_date, end_date, OriginType.MeteredFeature)[0]
                 for bonus in bonuses
             ]
@@ -1266,6 +1505,13 @@ class Subscription(models.Model):
         return mfs_total, entries
 
     def _get_proration_status_and_fraction(self, start_date, end_date, entry_type: OriginType) -> Tuple[bool, Fraction]:
+        return cached_proration(
+            self, self, start_date, end_date, entry_type,
+            lambda: self._compute_proration_status_and_fraction(start_date, end_date, entry_type)
+        )
+
+    def _compute_proration_status_and_fraction(self, start_date, end_date,
+                                               entry_type: OriginType) -> Tuple[bool, Fraction]:
         """
         Returns the proration percent (how much of the interval will be billed)
         and the status (if the subscription is prorated or not).
@@ -1387,6 +1633,45 @@ class BillingLog(models.Model):
             inv=self.invoice, date=self.billing_date)
 
 
+@receiver(post_save, sender=BillingLog)
+def update_latest_billing_log(sender, instance, created=False, **kwargs):
+    if kwargs.get('raw', False):
+        return
+
+    subscription = instance.subscription
+    if not created:
+        subscription.set_latest_billing_log(subscription.find_latest_billing_log())
+        return
+
+    latest_billing_log = subscription.latest_billing_log
+    if (not latest_billing_log or
+            (instance.billing_date, instance.pk) >
+            (latest_billing_log.billing_date, latest_billing_log.pk)):
+        subscription.set_latest_billing_log(instance)
+
+
+@receiver(post_delete, sender=BillingLog)
+def update_latest_billing_log_on_delete(sender, instance, **kwargs):
+    # the subscription may be deleted along with its billing logs
+    subscription = Subscription.objects.filter(pk=instance.subscription_id).first()
+    if subscription:
+        subscription.set_latest_billing_log(subscription.find_latest_billing_log())
+
+
+@receiver(post_save, sender=Plan)
+@receiver(post_save, sender='silver.Provider')
+def reset_next_billing_dates(sender, instance, **kwargs):
+    # the billing cycles depend on the plans' and providers' settings, so the next billing
+    # dates are recomputed once the subscriptions are billed or saved again
+    if kwargs.get('raw', False) or kwargs.get('created', False):
+        return
+
+    lookup = 'plan' if sender is Plan else 'plan__provider'
+    Subscription.objects.filter(**{lookup: instance}).exclude(
+        next_plan_billing_date=None, next_metered_features_billing_date=None
+    ).update(next_plan_billing_date=None, next_metered_features_billing_date=None)
+
+
 @receiver(pre_delete, sender=Customer)
 def cancel_billing_documents(sender, instance, **kwargs):
     if instance.pk and not kwargs.get('raw', False):
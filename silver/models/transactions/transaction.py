@@ -33,6 +33,8 @@ from django.utils.encoding import force_str
 from django.utils.translation import gettext_lazy as _
 
 from silver.models import Invoice, Proforma
+from silver.models.documents.base import touch_billing_documents
+from silver.models.ledger import record_transaction_transition
 from silver.models.transactions.codes import FAIL_CODES, REFUND_CODES, CANCEL_CODES
 from silver.utils.international import currencies
 from silver.utils.models import AutoDateTimeField, AutoCleanModelMixin
@@ -55,6 +57,13 @@ class Transaction(AutoCleanModelMixin, models.Model):
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # the transactions to be executed and the ones whose status is to be fetched
+            models.Index(fields=['id'], condition=Q(state='initial'),
+                         name='silver_trx_initial_idx'),
+            models.Index(fields=['id'], condition=Q(state='pending'),
+                         name='silver_trx_pending_idx'),
+        ]
 
     class States:
         Initial = 'initial'
@@ -91,7 +100,7 @@ class Transaction(AutoCleanModelMixin, models.Model):
     last_access = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(default=timezone.now)
-    updated_at = AutoDateTimeField(default=timezone.now)
+    updated_at = AutoDateTimeField(default=timezone.now, db_index=True)
 
     fail_code = models.CharField(
         choices=[(code, code) for code in FAIL_CODES.keys()], max_length=64,
@@ -292,9 +301,16 @@ class Transaction(AutoCleanModelMixin, models.Model):
 
 
 @receiver(post_save, sender=Transaction)
-def post_transaction_save(sender, instance, **kwargs):
+def post_transaction_save(sender, instance, created=False, **kwargs):
     transaction = instance
 
+    touch_billing_documents(transaction.invoice_id, transaction.proforma_id)
+
+    # the saved state is only updated after the post_save signal
+    previous_state = None if created else transaction.saved_state.get('state')
+    if transaction.state != previous_state:
+        record_transaction_transition(transaction, previous_state)
+
     if hasattr(transaction, 'state_recently_transitioned_to'):
         delattr(transaction, 'state_recently_transitioned_to')
         transaction.update_document_state()
@@ -109,6 +109,31 @@ class BaseActionableProcessor(object):
 
         return True
 
+    fetch_transactions_status_batch_size = 100
+
+    def fetch_transactions_status_batch(self, transactions):
+        """
+            Implementation is optional.
+
+            Same as `fetch_transaction_status`, but obtains the status of multiple
+            transactions through a single interrogation, for payment processors
+            that offer bulk status lookups.
+
+            When implemented, the pending transactions will be sent in batches of
+            at most `fetch_transactions_status_batch_size` transactions, instead
+            of being sent one by one to `fetch_transaction_status`.
+
+            :param transactions: A list of pending Silver Transaction objects.
+            :return: True on success, False on failure.
+        """
+
+        raise NotImplementedError
+
+    @property
+    def supports_batch_status_fetching(self):
+        return (type(self).fetch_transactions_status_batch is not
+                BaseActionableProcessor.fetch_transactions_status_batch)
+
 
 class AutomaticProcessorMixin(BaseActionableProcessor):
     type = PaymentProcessorTypes.Automatic
@@ -0,0 +1,372 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import math
+import threading
+import time
+import uuid
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DEFAULT_SLOT_TTL = 60  # seconds
+
+KEY_PREFIX = 'silver:payment_processors'
+QUEUE_DEPTHS_KEY = '{}:queue_depths'.format(KEY_PREFIX)
+
+
+def _refill(tokens, timestamp, now, rate, burst):
+    if tokens is None:
+        return burst
+
+    return min(burst, tokens + max(0, now - timestamp) * rate)
+
+
+class LocalThrottleBackend(object):
+    """
+        Keeps the throttling state in memory. Only suitable for a single process (development,
+        tests), as limits are not shared between workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = defaultdict(dict)
+        self._buckets = {}
+        self._queue_depths = {}
+
+    def _expire_slots(self, name, now):
+        slots = self._slots[name]
+        for slot_id, expires_at in list(slots.items()):
+            if expires_at <= now:
+                del slots[slot_id]
+
+    def acquire(self, name, slot_id, now, slot_ttl, max_concurrency=None, rate=None, burst=None):
+        with self._lock:
+            if max_concurrency:
+                self._expire_slots(name, now)
+                if len(self._slots[name]) >= max_concurrency:
+                    return False
+
+            if rate:
+                tokens, timestamp = self._buckets.get(name, (None, now))
+                tokens = _refill(tokens, timestamp, now, rate, burst)
+                if tokens < 1:
+                    return False
+
+                self._buckets[name] = (tokens - 1, now)
+
+            if max_concurrency:
+                self._slots[name][slot_id] = now + slot_ttl
+
+            return True
+
+    def release(self, name, slot_id):
+        with self._lock:
+            self._slots[name].pop(slot_id, None)
+
+    def capacity(self, name, now, max_concurrency=None, rate=None, burst=None):
+        with self._lock:
+            limits = []
+
+            if max_concurrency:
+                self._expire_slots(name, now)
+                limits.append(max_concurrency - len(self._slots[name]))
+
+            if rate:
+                tokens, timestamp = self._buckets.get(name, (None, now))
+                limits.append(int(_refill(tokens, timestamp, now, rate, burst)))
+
+            return max(0, min(limits)) if limits else None
+
+    def set_queue_depth(self, name, depth):
+        with self._lock:
+            self._queue_depths[name] = depth
+
+    def get_queue_depths(self):
+        with self._lock:
+            return dict(self._queue_depths)
+
+
+class RedisThrottleBackend(object):
+    """
+        Keeps the throttling state in Redis, so that the limits are shared between all the Celery
+        workers. Slots and tokens are acquired atomically through a Lua script.
+    """
+
+    ACQUIRE_SCRIPT = """
+        local slots_key = KEYS[1]
+        local bucket_key = KEYS[2]
+        local slot_id = ARGV[1]
+        local now = tonumber(ARGV[2])
+        local slot_ttl = tonumber(ARGV[3])
+        local max_concurrency = tonumber(ARGV[4])
+        local rate = tonumber(ARGV[5])
+        local burst = tonumber(ARGV[6])
+
+        if max_concurrency > 0 then
+            redis.call('ZREMRANGEBYSCORE', slots_key, '-inf', now)
+            if redis.call('ZCARD', slots_key) >= max_concurrency then
+                return 0
+            end
+        end
+
+        if rate > 0 then
+            local bucket = redis.call('HMGET', bucket_key, 'tokens', 'timestamp')
+            local tokens = burst
+            if bucket[1] then
+                local elapsed = math.max(0, now - tonumber(bucket[2]))
+                tokens = math.min(burst, tonumber(bucket[1]) + elapsed * rate)
+            end
+
+            if tokens < 1 then
+                return 0
+            end
+
+            redis.call('HMSET', bucket_key, 'tokens', tokens - 1, 'timestamp', now)
+            redis.call('EXPIRE', bucket_key, math.ceil(burst / rate) + 1)
+        end
+
+        if max_concurrency > 0 then
+            redis.call('ZADD', slots_key, now + slot_ttl, slot_id)
+            redis.call('EXPIRE', slots_key, math.ceil(slot_ttl) + 1)
+        end
+
+        return 1
+    """
+
+    def __init__(self, connection=None):
+        if connection is None:
+            from silver.vendors.redis_server import redis as connection
+
+        self.connection = connection
+        self._acquire = connection.register_script(self.ACQUIRE_SCRIPT)
+
+    @staticmethod
+    def _slots_key(name):
+        return '{}:{}:slots'.format(KEY_PREFIX, name)
+
+    @staticmethod
+    def _bucket_key(name):
+        return '{}:{}:bucket'.format(KEY_PREFIX, name)
+
+    def acquire(self, name, slot_id, now, slot_ttl, max_concurrency=None, rate=None, burst=None):
+        return bool(self._acquire(
+            keys=[self._slots_key(name), self._bucket_key(name)],
+            args=[slot_id, now, slot_ttl, max_concurrency or 0, rate or 0, burst or 0]
+        ))
+
+    def release(self, name, slot_id):
+        self.connection.zrem(self._slots_key(name), slot_id)
+
+    def capacity(self, name, now, max_concurrency=None, rate=None, burst=None):
+        pipeline = self.connection.pipeline(transaction=False)
+        pipeline.zcount(self._slots_key(name), '({}'.format(now), '+inf')
+        pipeline.hmget(self._bucket_key(name), 'tokens', 'timestamp')
+        active_slots, (tokens, timestamp) = pipeline.execute()
+
+        limits = []
+        if max_concurrency:
+            limits.append(max_concurrency - active_slots)
+
+        if rate:
+            tokens = float(tokens) if tokens is not None else None
+            timestamp = float(timestamp) if timestamp is not None else now
+            limits.append(int(_refill(tokens, timestamp, now, rate, burst)))
+
+        return max(0, min(limits)) if limits else None
+
+    def set_queue_depth(self, name, depth):
+        self.connection.hset(QUEUE_DEPTHS_KEY, name, depth)
+
+    def get_queue_depths(self):
+        return {
+            name.decode('utf-8'): int(depth)
+            for name, depth in self.connection.hgetall(QUEUE_DEPTHS_KEY).items()
+        }
+
+
+_backends = {}
+
+
+def get_throttle_backend():
+    backend_path = getattr(settings, 'SILVER_PAYMENT_PROCESSORS_THROTTLE_BACKEND',
+                           'silver.payment_processors.throttling.RedisThrottleBackend')
+
+    if backend_path not in _backends:
+        _backends[backend_path] = import_string(backend_path)()
+
+    return _backends[backend_path]
+
+
+def get_queue_depths():
+    """
+        :return: A dict containing the number of transactions that were left waiting for each
+        throttled payment processor during the last scheduling round.
+    """
+
+    return get_throttle_backend().get_queue_depths()
+
+
+class ProcessorThrottle(object):
+    """
+        Limits the number of concurrent calls (`max_concurrency`) and the rate of the calls
+        (`rate` per second, with bursts of up to `burst` calls) made to a payment processor.
+
+        The limits are read from the `throttling` key of the payment processor's
+        `PAYMENT_PROCESSORS` setting entry. A processor without limits is never throttled.
+    """
+
+    def __init__(self, processor_name, max_concurrency=None, rate=None, burst=None,
+                 slot_ttl=DEFAULT_SLOT_TTL, backend=None):
+        self.processor_name = processor_name
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = max(burst or 0, 1) if rate else None
+        self.slot_ttl = slot_ttl
+        self._backend = backend
+
+    @classmethod
+    def for_processor(cls, processor_name, slot_ttl=DEFAULT_SLOT_TTL):
+        processor_settings = settings.PAYMENT_PROCESSORS.get(processor_name, {})
+        throttling = processor_settings.get('throttling', {})
+
+        return cls(processor_name,
+                   max_concurrency=throttling.get('max_concurrency'),
+                   rate=throttling.get('rate'),
+                   burst=throttling.get('burst', math.ceil(throttling.get('rate') or 0)),
+                   slot_ttl=throttling.get('slot_ttl', slot_ttl))
+
+    @property
+    def backend(self):
+        return self._backend or get_throttle_backend()
+
+    @property
+    def is_limited(self):
+        return bool(self.max_concurrency or self.rate)
+
+    @property
+    def _limits(self):
+        return {
+            'max_concurrency': self.max_concurrency,
+            'rate': self.rate,
+            'burst': self.burst
+        }
+
+    def acquire(self):
+        """
+            :return: A slot identifier, which must be passed to `release` once the call to the
+            payment processor is done, or None if the limits don't allow another call right now.
+        """
+
+        slot_id = uuid.uuid4().hex
+        if not self.is_limited:
+            return slot_id
+
+        acquired = self.backend.acquire(self.processor_name, slot_id, time.time(), self.slot_ttl,
+                                        **self._limits)
+
+        return slot_id if acquired else None
+
+    def release(self, slot_id):
+        if not self.is_limited or not slot_id:
+            return
+
+        self.backend.release(self.processor_name, slot_id)
+
+    def capacity(self):
+        """
+            :return: How many calls could be made right now, or None if the processor is not
+            throttled.
+        """
+
+        if not self.is_limited:
+            return None
+
+        return self.backend.capacity(self.processor_name, time.time(), **self._limits)
+
+    def set_queue_depth(self, depth):
+        if not self.is_limited:
+            return
+
+        self.backend.set_queue_depth(self.processor_name, depth)
+
+
+TRANSACTIONS_PRIORITIES = {
+    'oldest': ('created_at', 'id'),
+    'amount': ('-amount', 'created_at', 'id'),
+}
+
+
+def order_transactions_by_priority(transactions):
+    priority = getattr(settings, 'SILVER_TRANSACTIONS_PRIORITY', 'oldest')
+
+    return transactions.order_by(*TRANSACTIONS_PRIORITIES[priority])
+
+
+def schedule_transactions(transactions, batch_size=None):
+    """
+        Orders the given transactions by priority and splits them into batches of transactions
+        belonging to the same payment processor. For each payment processor, only as many batches
+        as the processor's throttle currently allows are kept, and the number of transactions left
+        waiting is recorded as the processor's queue depth.
+
+        :param batch_size: An optional callable receiving a payment processor name and returning
+        how many transactions can be handled through a single call to that payment processor.
+        By default, each transaction is handled through a separate call.
+        :return: A list of (payment processor name, list of transaction ids) tuples, in priority
+        order.
+    """
+
+    rows = order_transactions_by_priority(transactions).values_list(
+        'id', 'payment_method__payment_processor'
+    )
+
+    throttles = {}
+    capacities = {}
+    batch_sizes = {}
+    open_batches = {}
+    waiting = defaultdict(int)
+    scheduled = []
+
+    for transaction_id, processor_name in rows:
+        if processor_name not in throttles:
+            throttles[processor_name] = ProcessorThrottle.for_processor(processor_name)
+            capacities[processor_name] = throttles[processor_name].capacity()
+            batch_sizes[processor_name] = batch_size(processor_name) if batch_size else 1
+
+        batch = open_batches.get(processor_name)
+        if batch and len(batch) < batch_sizes[processor_name]:
+            batch.append(transaction_id)
+            continue
+
+        capacity = capacities[processor_name]
+        if capacity is not None:
+            if capacity <= 0:
+                waiting[processor_name] += 1
+                continue
+
+            capacities[processor_name] = capacity - 1
+
+        open_batches[processor_name] = [transaction_id]
+        scheduled.append((processor_name, open_batches[processor_name]))
+
+    for processor_name, throttle in throttles.items():
+        throttle.set_queue_depth(waiting[processor_name])
+
+    return scheduled
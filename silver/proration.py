@@ -0,0 +1,151 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import threading
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+_active = threading.local()
+
+
+class ProrationCache(object):
+    """
+        Memoizes the proration fractions computed during a billing run, keyed on the prorated
+        object (subscription, discount or bonus), the subscription, the billed interval and the
+        entries' origin type.
+
+        The cached values only depend on the objects' fields, so they must be invalidated when
+        those change; saving or deleting a subscription, plan, discount or bonus while the cache
+        is active does that automatically.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._keys_by_object = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    @staticmethod
+    def _object_key(obj):
+        return obj._meta.label_lower, obj.pk
+
+    def get(self, obj, subscription, start_date, end_date, origin_type, compute):
+        """
+            :return: The cached result of `compute()` for the given arguments, computing it on a
+            cache miss. Unsaved objects are never cached.
+        """
+
+        if obj.pk is None or subscription.pk is None:
+            return compute()
+
+        object_key, subscription_key = self._object_key(obj), self._object_key(subscription)
+        key = (object_key, subscription_key, start_date, end_date, origin_type)
+
+        try:
+            value = self._values[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            return value
+
+        value = self._values[key] = compute()
+        self._keys_by_object[object_key].add(key)
+        self._keys_by_object[subscription_key].add(key)
+
+        return value
+
+    def invalidate(self, obj):
+        """
+            Drops the values computed for the given object, or for its subscriptions, when the
+            object is a subscription.
+        """
+
+        for key in self._keys_by_object.pop(self._object_key(obj), ()):
+            self._values.pop(key, None)
+
+    def clear(self):
+        self._values.clear()
+        self._keys_by_object.clear()
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+
+def get_proration_cache():
+    """
+        :return: The ProrationCache active in the current thread, or None.
+    """
+
+    return getattr(_active, 'cache', None)
+
+
+@contextmanager
+def proration_cache():
+    """
+        Activates a ProrationCache within the block, for the current thread. Nested blocks
+        reuse the outer cache.
+    """
+
+    cache = get_proration_cache()
+    if cache is not None:
+        yield cache
+        return
+
+    _active.cache = cache = ProrationCache()
+    try:
+        yield cache
+    finally:
+        _active.cache = None
+        cache.clear()
+
+
+def cached_proration(obj, subscription, start_date, end_date, origin_type, compute):
+    cache = get_proration_cache()
+    if cache is None:
+        return compute()
+
+    return cache.get(obj, subscription, start_date, end_date, origin_type, compute)
+
+
+@receiver(post_save, sender='silver.Subscription')
+@receiver(post_delete, sender='silver.Subscription')
+@receiver(post_save, sender='silver.Discount')
+@receiver(post_delete, sender='silver.Discount')
+@receiver(post_save, sender='silver.Bonus')
+@receiver(post_delete, sender='silver.Bonus')
+def invalidate_proration_cache(sender, instance, **kwargs):
+    cache = get_proration_cache()
+    if cache is not None:
+        cache.invalidate(instance)
+
+
+@receiver(post_save, sender='silver.Plan')
+@receiver(post_delete, sender='silver.Plan')
+def clear_proration_cache(sender, instance, **kwargs):
+    # the plan's intervals are used for all of its subscriptions
+    cache = get_proration_cache()
+    if cache is not None:
+        cache.clear()
@@ -14,6 +14,8 @@
 
 from __future__ import absolute_import
 
+import logging
+
 from itertools import chain
 
 from celery import group, shared_task
@@ -23,12 +25,21 @@ from redis.exceptions import LockError
 from django.conf import settings
 from django.utils import timezone
 
+from silver import payment_processors
 from silver.documents_generator import DocumentsGenerator
-from silver.models import Invoice, Proforma, Transaction, BillingDocumentBase, Customer
+from silver.metrics import TRANSACTION_PROCESSING_SECONDS
+from silver.models import (
+    Invoice, Proforma, Transaction, BillingDocumentBase, Customer, PaymentMethod
+)
+from silver.models.payment_methods import create_transactions_for_issued_documents
 from silver.payment_processors.mixins import PaymentProcessorTypes
+from silver.payment_processors.throttling import ProcessorThrottle, schedule_transactions
 from silver.vendors.redis_server import redis
 
 
+logger = logging.getLogger(__name__)
+
+
 PDF_GENERATION_TIME_LIMIT = getattr(settings, 'PDF_GENERATION_TIME_LIMIT',
                                     60)  # default 60s
 
@@ -51,6 +62,13 @@ def generate_pdfs():
           for document in dirty_documents)()
 
 
+@shared_task(ignore_result=True)
+def create_transactions_for_payment_method(payment_method_id):
+    payment_method = PaymentMethod.objects.filter(id=payment_method_id).first()
+    if payment_method:
+        create_transactions_for_issued_documents(payment_method)
+
+
 DOCS_GENERATION_TIME_LIMIT = getattr(settings, 'DOCS_GENERATION_TIME_LIMIT',
                                      60 * 60)  # default 60m
 
@@ -85,7 +103,73 @@ def fetch_transaction_status(transaction_id):
     if payment_processor.type != PaymentProcessorTypes.Triggered:
         return
 
-    payment_processor.fetch_transaction_status(transaction)
+    throttle = ProcessorThrottle.for_processor(transaction.payment_method.payment_processor,
+                                               slot_ttl=FETCH_TRANSACTION_STATUS_TIME_LIMIT)
+    slot = throttle.acquire()
+    if not slot:
+        # The transaction stays pending and will be picked up by the next fetch round
+        logger.info('Throttled status fetching for transaction with id=%s.', transaction_id)
+        return
+
+    try:
+        with TRANSACTION_PROCESSING_SECONDS.time(
+            processor=transaction.payment_method.payment_processor, operation='fetch_status'
+        ):
+            payment_processor.fetch_transaction_status(transaction)
+    finally:
+        throttle.release(slot)
+
+
+FETCH_TRANSACTIONS_STATUS_BATCH_TIME_LIMIT = getattr(
+    settings, 'FETCH_TRANSACTIONS_STATUS_BATCH_TIME_LIMIT', 5 * 60
+)  # default 5m
+
+
+@shared_task(base=QueueOnce, once={'graceful': True},
+             time_limit=FETCH_TRANSACTIONS_STATUS_BATCH_TIME_LIMIT)
+def fetch_transactions_status_batch(transaction_ids):
+    transactions = list(
+        Transaction.objects.filter(pk__in=transaction_ids, state=Transaction.States.Pending)
+                           .select_related('payment_method')
+    )
+    if not transactions:
+        return
+
+    processor_name = transactions[0].payment_method.payment_processor
+    payment_processor = transactions[0].payment_method.get_payment_processor()
+    if (payment_processor.type != PaymentProcessorTypes.Triggered or
+            not payment_processor.supports_batch_status_fetching):
+        return
+
+    # A batch is meant to hold transactions of a single payment processor
+    transactions = [transaction for transaction in transactions
+                    if transaction.payment_method.payment_processor == processor_name]
+
+    throttle = ProcessorThrottle.for_processor(processor_name,
+                                               slot_ttl=FETCH_TRANSACTIONS_STATUS_BATCH_TIME_LIMIT)
+    slot = throttle.acquire()
+    if not slot:
+        logger.info('Throttled status fetching for transactions with ids=%s.', transaction_ids)
+        return
+
+    try:
+        with TRANSACTION_PROCESSING_SECONDS.time(processor=processor_name,
+                                                 operation='fetch_status_batch'):
+            payment_processor.fetch_transactions_status_batch(transactions)
+    finally:
+        throttle.release(slot)
+
+
+def get_status_batch_size(processor_name):
+    if processor_name not in settings.PAYMENT_PROCESSORS:
+        return 1
+
+    payment_processor = payment_processors.get_instance(processor_name)
+    if (payment_processor.type != PaymentProcessorTypes.Triggered or
+            not payment_processor.supports_batch_status_fetching):
+        return 1
+
+    return payment_processor.fetch_transactions_status_batch_size
 
 
 @shared_task(ignore_result=True)
@@ -95,7 +179,19 @@ def fetch_transactions_status(transaction_ids=None):
     if transaction_ids:
         eligible_transactions = eligible_transactions.filter(pk__in=transaction_ids)
 
-    group(fetch_transaction_status.s(transaction.id) for transaction in eligible_transactions)()
+    batch_sizes = {}
+
+    def batch_size(processor_name):
+        batch_sizes[processor_name] = get_status_batch_size(processor_name)
+        return batch_sizes[processor_name]
+
+    batches = schedule_transactions(eligible_transactions, batch_size=batch_size)
+
+    group(
+        fetch_transactions_status_batch.s(batch) if batch_sizes[processor_name] > 1
+        else fetch_transaction_status.s(batch[0])
+        for processor_name, batch in batches
+    )()
 
 
 EXECUTE_TRANSACTION_TIME_LIMIT = getattr(settings, 'EXECUTE_TRANSACTION_TIME_LIMIT',
@@ -116,7 +212,21 @@ def execute_transaction(transaction_id):
     if payment_processor.type != PaymentProcessorTypes.Triggered:
         return
 
-    payment_processor.process_transaction(transaction)
+    throttle = ProcessorThrottle.for_processor(transaction.payment_method.payment_processor,
+                                               slot_ttl=EXECUTE_TRANSACTION_TIME_LIMIT)
+    slot = throttle.acquire()
+    if not slot:
+        # The transaction stays in the initial state and will be picked up by the next run
+        logger.info('Throttled execution of transaction with id=%s.', transaction_id)
+        return
+
+    try:
+        with TRANSACTION_PROCESSING_SECONDS.time(
+            processor=transaction.payment_method.payment_processor, operation='execute'
+        ):
+            payment_processor.process_transaction(transaction)
+    finally:
+        throttle.release(slot)
 
 
 @shared_task(ignore_result=True)
@@ -126,4 +236,5 @@ def execute_transactions(transaction_ids=None):
     if transaction_ids:
         executable_transactions = executable_transactions.filter(pk__in=transaction_ids)
 
-    group(execute_transaction.s(transaction.id) for transaction in executable_transactions)()
+    group(execute_transaction.s(transaction_id)
+          for _, (transaction_id, ) in schedule_transactions(executable_transactions))()
@@ -54,6 +54,11 @@ class InvoiceAdminTestCase(TestCase):
         mock_invoice.pay = mock_action
         mock_invoice.clone_into_draft = mock_action
         mock_invoice.create_storno = mock_action
+        # the multi-document variants of the actions
+        mock_bulk_action = Mock(side_effect=lambda documents: [mock_action(document)
+                                                               for document in documents])
+        mock_invoice.clone_into_drafts = mock_bulk_action
+        mock_invoice.create_stornos = mock_bulk_action
 
         with patch.multiple('silver.admin',
                             LogEntry=mock_log_entry,
@@ -105,6 +110,8 @@ class InvoiceAdminTestCase(TestCase):
         mock_invoice.cancel = mock_action
         mock_invoice.pay = mock_action
         mock_invoice.clone_into_draft = mock_action
+        # the multi-document variants fall back to the per document actions
+        mock_invoice.clone_into_drafts = MagicMock(side_effect=ValueError)
         mock_invoice.create_invoice = mock_action
 
         with patch.multiple('silver.admin',
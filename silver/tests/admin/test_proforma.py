@@ -52,6 +52,10 @@ class ProformaAdminTestCase(TestCase):
         mock_proforma.cancel = mock_action
         mock_proforma.pay = mock_action
         mock_proforma.clone_into_draft = mock_action
+        # the multi-document variants of the actions
+        mock_bulk_action = Mock(side_effect=lambda documents: [mock_action(document)
+                                                               for document in documents])
+        mock_proforma.clone_into_drafts = mock_bulk_action
         mock_proforma.create_invoice = mock_action
 
         with patch.multiple('silver.admin',
@@ -104,6 +108,8 @@ class ProformaAdminTestCase(TestCase):
         mock_proforma.cancel = mock_action
         mock_proforma.pay = mock_action
         mock_proforma.clone_into_draft = mock_action
+        # the multi-document variants fall back to the per document actions
+        mock_proforma.clone_into_drafts = MagicMock(side_effect=ValueError)
         mock_proforma.create_invoice = mock_action
 
         with patch.multiple('silver.admin',
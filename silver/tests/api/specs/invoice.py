@@ -8,7 +8,9 @@ from silver.tests.api.specs.document_entry import spec_document_entry, document_
 from silver.tests.api.specs.provider import spec_archived_provider
 from silver.tests.api.specs.transaction import spec_transaction
 from silver.tests.api.specs.url import spec_customer_url, spec_provider_url, spec_proforma_url
-from silver.tests.api.specs.utils import date_to_str, decimal_string_or_none, ResourceDefinition
+from silver.tests.api.specs.utils import (
+    date_to_str, datetime_to_str, decimal_string_or_none, ResourceDefinition
+)
 from silver.tests.api.utils.path import absolute_url
 
 # required is True by default, (a default must be specified otherwise)
@@ -250,6 +252,10 @@ invoice_definition = ResourceDefinition("invoice", {
             None if not (invoice.pdf and invoice.pdf.url) else
             absolute_url(invoice.pdf.url)
         )
+    },
+    'updated_at': {
+        'read_only': True,
+        'output': lambda invoice: datetime_to_str(invoice.updated_at)
     }
 })
 
@@ -0,0 +1,186 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from freezegun import freeze_time
+
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from silver.api.changes import ChangesCursor
+from silver.fixtures.factories import (DocumentEntryFactory, InvoiceFactory, ProformaFactory,
+                                       SubscriptionFactory, PaymentMethodFactory,
+                                       TransactionFactory)
+from silver.fixtures.test_fixtures import PAYMENT_PROCESSORS, manual_processor
+
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def at(minutes):
+    return freeze_time(START + timedelta(minutes=minutes))
+
+
+def get_all_changes(client, **params):
+    changes = []
+    while True:
+        response = client.get(reverse('changes-list'), params)
+        assert response.status_code == status.HTTP_200_OK
+
+        changes += response.data['results']
+        params['cursor'] = response.data['cursor']
+        if not response.data['has_more']:
+            return changes, params['cursor']
+
+        assert 'rel="next"' in response['Link']
+
+
+@pytest.fixture()
+def changes(db):
+    with at(0):
+        subscription = SubscriptionFactory.create()
+    with at(1):
+        invoice = InvoiceFactory.create()
+        proforma = ProformaFactory.create()
+    with at(2):
+        entry = DocumentEntryFactory.create(invoice=invoice)
+
+    return subscription, invoice, proforma, entry
+
+
+def test_changes_are_listed_in_order(authenticated_api_client, changes):
+    subscription, invoice, proforma, entry = changes
+
+    results, cursor = get_all_changes(authenticated_api_client, page_size=2)
+
+    # the invoice was modified along with its entry
+    assert [(change['type'], change['data']['id']) for change in results] == [
+        ('subscription', subscription.pk),
+        ('proforma', proforma.pk),
+        ('invoice', invoice.pk),
+        ('entry', entry.pk),
+    ]
+    assert results[0]['updated_at'] == START
+    assert results[2]['data']['invoice_entries'][0]['id'] == entry.pk
+    assert results[3]['data']['invoice'].endswith(
+        reverse('invoice-detail', kwargs={'pk': invoice.pk})
+    )
+    assert ChangesCursor.decode(cursor).updated_at == START + timedelta(minutes=2)
+
+
+def test_changes_continuation(authenticated_api_client, changes):
+    subscription, invoice, proforma, entry = changes
+
+    _, cursor = get_all_changes(authenticated_api_client)
+
+    results, same_cursor = get_all_changes(authenticated_api_client, cursor=cursor)
+    assert results == []
+    assert same_cursor == cursor
+
+    with at(3):
+        proforma.customer_reference = 'new reference'
+        proforma.save()
+        subscription.activate()
+        subscription.save()
+
+    results, cursor = get_all_changes(authenticated_api_client, cursor=cursor)
+    assert [change['type'] for change in results] == ['proforma', 'subscription']
+    assert results[1]['data']['state'] == 'active'
+
+
+def test_changes_within_the_settle_window_are_not_listed(authenticated_api_client, changes,
+                                                         settings):
+    subscription, invoice, proforma, entry = changes
+    settings.SILVER_CHANGES_SETTLE_SECONDS = 60
+
+    with freeze_time(START + timedelta(minutes=2, seconds=30)):
+        results, cursor = get_all_changes(authenticated_api_client)
+
+    assert [change['type'] for change in results] == ['subscription', 'proforma']
+    assert ChangesCursor.decode(cursor).updated_at == START + timedelta(minutes=1)
+
+    # saved before the previous request, but committed after it
+    with freeze_time(START + timedelta(minutes=1, seconds=45)):
+        late_proforma = ProformaFactory.create()
+
+    results, _ = get_all_changes(authenticated_api_client, cursor=cursor)
+
+    assert [(change['type'], change['data']['id']) for change in results] == [
+        ('proforma', late_proforma.pk),
+        ('invoice', invoice.pk),
+        ('entry', entry.pk),
+    ]
+
+
+def test_changes_since_and_types(authenticated_api_client, changes):
+    subscription, invoice, proforma, entry = changes
+
+    results, _ = get_all_changes(authenticated_api_client,
+                                 since=(START + timedelta(minutes=1)).isoformat(),
+                                 types='proforma,entry')
+
+    assert [change['type'] for change in results] == ['proforma', 'entry']
+
+
+def test_changes_transactions_identified_by_uuid(authenticated_api_client, issued_invoice,
+                                                 settings):
+    settings.PAYMENT_PROCESSORS = PAYMENT_PROCESSORS
+    settings.SILVER_CHANGES_SETTLE_SECONDS = 0
+    transaction = TransactionFactory.create(
+        invoice=issued_invoice,
+        payment_method=PaymentMethodFactory.create(customer=issued_invoice.customer,
+                                                   payment_processor=manual_processor)
+    )
+
+    results, _ = get_all_changes(authenticated_api_client, types='transaction')
+
+    assert [change['data']['id'] for change in results] == [str(transaction.uuid)]
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': 'invalid'},
+    {'since': '2024-01-01T00:00:00'},
+    {'types': 'invoice,customer'},
+])
+def test_changes_invalid_parameters(authenticated_api_client, params):
+    response = authenticated_api_client.get(reverse('changes-list'), params)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert list(response.data) == list(params)
+
+
+def test_changes_require_authentication(anonymous_api_client):
+    response = anonymous_api_client.get(reverse('changes-list'))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_changes_page_query_budget(authenticated_api_client, query_budget):
+    for minutes in range(10):
+        with at(minutes):
+            DocumentEntryFactory.create(invoice=InvoiceFactory.create())
+
+    # 1 (auth) + 5 (sources) + 6 (invoices: documents, entries, transactions; entries)
+    with query_budget(12):
+        response = authenticated_api_client.get(reverse('changes-list'),
+                                                {'page_size': 20, 'types': 'invoice,entry'})
+
+    assert len(response.data['results']) == 20
@@ -0,0 +1,133 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from django.test import override_settings
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from silver.fixtures.factories import (DocumentEntryFactory, InvoiceFactory, ProformaFactory,
+                                       TransactionFactory, PaymentMethodFactory)
+from silver.fixtures.test_fixtures import PAYMENT_PROCESSORS, manual_processor
+from silver.models import PDF
+
+
+def test_document_detail_conditional_get(authenticated_api_client, query_budget, invoice):
+    url = reverse('invoice-detail', kwargs={'pk': invoice.pk})
+
+    response = authenticated_api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Last-Modified'] == http_date(invoice.updated_at.timestamp())
+    etag = response['ETag']
+
+    with query_budget(1, 'not modified'):
+        response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert not response.content
+
+    # the entries are part of the document's representation
+    DocumentEntryFactory.create(invoice=invoice)
+
+    response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+
+
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_document_detail_is_modified_by_transactions(authenticated_api_client, issued_invoice):
+    url = reverse('invoice-detail', kwargs={'pk': issued_invoice.pk})
+    etag = authenticated_api_client.get(url)['ETag']
+
+    TransactionFactory.create(
+        invoice=issued_invoice,
+        payment_method=PaymentMethodFactory.create(customer=issued_invoice.customer,
+                                                   payment_processor=manual_processor)
+    )
+
+    response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data['transactions']) == 1
+
+
+def test_document_detail_if_modified_since(authenticated_api_client, invoice):
+    url = reverse('invoice-detail', kwargs={'pk': invoice.pk})
+
+    response = authenticated_api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = authenticated_api_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = authenticated_api_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=http_date(invoice.updated_at.timestamp() - 60)
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_missing_document_is_not_found(authenticated_api_client, db):
+    url = reverse('proforma-detail', kwargs={'pk': 1})
+
+    response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH='"etag"')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_document_list_conditional_get(authenticated_api_client, query_budget):
+    proformas = ProformaFactory.create_batch(2)
+    url = reverse('proforma-list')
+
+    response = authenticated_api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response['ETag']
+
+    with query_budget(1, 'not modified'):
+        response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # the representation depends on the query parameters too
+    response = authenticated_api_client.get(url + '?view=summary', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    proformas[0].delete()
+
+    response = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 1
+
+
+def test_document_pdf_conditional_get(authenticated_client):
+    invoice = InvoiceFactory.create()
+    invoice.pdf = PDF.objects.create(upload_path=invoice.get_pdf_upload_path())
+    invoice.save()
+    invoice.generate_pdf()
+    url = reverse('invoice-pdf', kwargs={'invoice_id': invoice.pk})
+
+    response = authenticated_client.get(url)
+    assert response.status_code == status.HTTP_302_FOUND
+    etag = response['ETag']
+
+    response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    invoice.generate_pdf()
+
+    response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_302_FOUND
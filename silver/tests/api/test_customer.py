@@ -17,13 +17,15 @@ from __future__ import absolute_import
 import json
 import pytest
 
+from decimal import Decimal
+
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from django.conf import settings
 
-from silver.models import Customer
+from silver.models import Customer, CustomerBalance
 from silver.fixtures.factories import AdminUserFactory, CustomerFactory
 from silver.tests.utils import build_absolute_test_url
 
@@ -129,6 +131,23 @@ class TestCustomerEndpoints(APITestCase):
         self.assertNotEqual(response.data, [])
         self.assertEqual(response.data['phone'], customer.phone)
 
+    def test_get_customer_balances(self):
+        customer = CustomerFactory.create()
+        CustomerBalance.objects.create(customer=customer, currency='USD',
+                                       amount=Decimal('10.50'))
+        CustomerBalance.objects.create(customer=customer, currency='EUR',
+                                       amount=Decimal('-2.00'))
+
+        url = reverse('customer-balance-list', kwargs={'customer_pk': customer.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(balance['currency'], balance['amount']) for balance in response.data],
+                         [('EUR', '-2.00'), ('USD', '10.50')])
+
+        url = reverse('customer-balance-list', kwargs={'customer_pk': customer.pk + 1})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_customer_detail_unexisting(self):
         url = reverse('customer-detail',
                       kwargs={'customer_pk': 42})
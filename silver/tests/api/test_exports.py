@@ -0,0 +1,125 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import csv
+import json
+
+from io import StringIO
+
+import pytest
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from silver.exports import DocumentsExport
+from silver.fixtures.factories import DocumentEntryFactory, InvoiceFactory, ProformaFactory
+from silver.models import Invoice
+from silver.utils.queries import QueryCounter
+
+
+def read_csv(response):
+    return list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in
+            b''.join(response.streaming_content).decode('utf-8').splitlines()]
+
+
+@pytest.fixture()
+def documents(db):
+    issued_invoice = InvoiceFactory.create(invoice_entries=DocumentEntryFactory.create_batch(2),
+                                           state=Invoice.STATES.ISSUED)
+    draft_invoice = InvoiceFactory.create(invoice_entries=DocumentEntryFactory.create_batch(1))
+    proforma = ProformaFactory.create(proforma_entries=DocumentEntryFactory.create_batch(3))
+
+    return issued_invoice, draft_invoice, proforma
+
+
+def test_export_documents_csv(authenticated_api_client, documents):
+    issued_invoice, draft_invoice, proforma = documents
+
+    response = authenticated_api_client.get(reverse('document-export',
+                                                    kwargs={'export_format': 'csv'}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv'
+    assert response['Content-Disposition'] == 'attachment; filename="documents.csv"'
+
+    rows = read_csv(response)
+    assert [(row['kind'], int(row['id'])) for row in rows] == [
+        ('invoice', issued_invoice.pk), ('invoice', draft_invoice.pk), ('proforma', proforma.pk)
+    ]
+    assert rows[0]['total'] == str(issued_invoice.total)
+    assert rows[1]['total'] == str(draft_invoice.total)
+    assert rows[1]['issue_date'] == ''
+    assert rows[2]['customer'] == proforma.customer.billing_name
+
+
+def test_export_invoices_entries_ndjson(authenticated_api_client, documents):
+    issued_invoice, draft_invoice, _ = documents
+
+    response = authenticated_api_client.get(
+        reverse('invoice-export', kwargs={'export_format': 'ndjson'}), {'entries': 'true'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    rows = read_ndjson(response)
+    assert [row['document_id'] for row in rows] == [issued_invoice.pk] * 2 + [draft_invoice.pk]
+
+    entry = issued_invoice.invoice_entries.get(pk=rows[0]['id'])
+    assert rows[0]['product_code'] == entry.product_code.value
+    assert rows[0]['total'] == str(entry.total)
+
+
+def test_export_filters(authenticated_api_client, documents):
+    issued_invoice, _, _ = documents
+
+    response = authenticated_api_client.get(
+        reverse('invoice-export', kwargs={'export_format': 'csv'}), {'state': 'issued'}
+    )
+    assert [int(row['id']) for row in read_csv(response)] == [issued_invoice.pk]
+
+    response = authenticated_api_client.get(
+        reverse('proforma-export', kwargs={'export_format': 'csv'}), {'due_date': 'invalid'}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'due_date' in response.data
+
+
+def test_export_is_read_in_chunks(db):
+    for _ in range(5):
+        InvoiceFactory.create(invoice_entries=DocumentEntryFactory.create_batch(2))
+
+    export = DocumentsExport(Invoice.objects.all(), entries=True, chunk_size=2)
+
+    with QueryCounter() as counter:
+        lines = list(export.csv_lines())
+
+    # the header, then 2 entries for each of the 5 invoices
+    assert len(lines) == 11
+    # the documents, then the entries of each of the 3 chunks
+    assert counter.count == 1 + 3
+
+
+def test_export_requires_authentication(anonymous_api_client):
+    response = anonymous_api_client.get(reverse('document-export',
+                                                kwargs={'export_format': 'csv'}))
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
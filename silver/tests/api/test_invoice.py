@@ -31,6 +31,7 @@ from django.db.models.signals import pre_save
 from django.utils import timezone
 from django.conf import settings
 
+from silver.api.serializers.documents_serializers import InvoiceSummarySerializer
 from silver.models import Invoice, Transaction, DocumentEntry
 from silver.tests.api.specs.document_entry import spec_document_entry, document_entry_definition
 from silver.tests.api.specs.invoice import spec_invoice, invoice_definition
@@ -152,6 +153,74 @@ def test_list_invoices(authenticated_api_client, two_pages_of_invoices):
         assert invoice_data == spec_invoice(invoice)
 
 
+def test_list_invoices_summary(authenticated_api_client, two_pages_of_invoices):
+    url = reverse('invoice-list')
+    response = authenticated_api_client.get(url + '?view=summary')
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert len(response.data) == settings.API_PAGE_SIZE
+    for invoice_data in response.data:
+        invoice = Invoice.objects.get(id=invoice_data['id'])
+        expected_data = spec_invoice(invoice)
+        for field in ['amount_paid_in_transaction_currency',
+                      'amount_pending_in_transaction_currency',
+                      'amount_to_be_charged_in_transaction_currency']:
+            amount = getattr(invoice, field)
+            expected_data[field] = None if amount is None else '{:.2f}'.format(amount)
+
+        assert invoice_data == {field: expected_data[field]
+                                for field in InvoiceSummarySerializer.Meta.fields}
+
+
+def test_list_invoices_fields(authenticated_api_client, two_pages_of_invoices):
+    url = reverse('invoice-list')
+    response = authenticated_api_client.get(url + '?fields=id,number,total,invoice_entries')
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    for invoice_data in response.data:
+        invoice = Invoice.objects.get(id=invoice_data['id'])
+        expected_data = spec_invoice(invoice)
+
+        assert invoice_data == {field: expected_data[field]
+                                for field in ['id', 'number', 'total', 'invoice_entries']}
+
+    response = authenticated_api_client.get(url + '?view=summary&fields=id,invoice_entries')
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert set(response.data[0]) == {'id'}
+
+
+def test_list_outstanding_invoices(authenticated_api_client):
+    paid_invoice, unpaid_invoice = InvoiceFactory.create_batch(2)
+    for invoice in [paid_invoice, unpaid_invoice]:
+        DocumentEntry.objects.create(invoice=invoice, description='Entry', quantity=1,
+                                     unit_price=Decimal('10.00'))
+        invoice.issue()
+
+    with mute_signals(pre_save):
+        TransactionFactory.create(
+            state=Transaction.States.Settled, invoice=paid_invoice,
+            amount=paid_invoice.total_in_transaction_currency,
+            payment_method=PaymentMethodFactory(customer=paid_invoice.customer)
+        )
+
+    url = reverse('invoice-list')
+    response = authenticated_api_client.get(url + '?view=summary&is_outstanding=true')
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert [invoice_data['id'] for invoice_data in response.data] == [unpaid_invoice.id]
+    assert (response.data[0]['amount_to_be_charged_in_transaction_currency'] ==
+            '{:.2f}'.format(unpaid_invoice.total_in_transaction_currency))
+
+    response = authenticated_api_client.get(url + '?view=summary&is_outstanding=false')
+
+    assert [invoice_data['id'] for invoice_data in response.data] == [paid_invoice.id]
+    assert response.data[0]['amount_paid_in_transaction_currency'] == '{:.2f}'.format(
+        paid_invoice.total_in_transaction_currency
+    )
+    assert response.data[0]['amount_to_be_charged_in_transaction_currency'] == '0.00'
+
+
 @freeze_time('2019-11-10')
 def test_get_invoice(authenticated_api_client, settings, issued_invoice):
     invoice = issued_invoice
@@ -0,0 +1,138 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime
+import json
+
+import pytest
+
+from freezegun import freeze_time
+from mock import patch
+
+from django.template.loader import get_template
+from django.test import override_settings
+from django.urls import reverse
+
+from silver.fixtures.factories import (MeteredFeatureFactory, SubscriptionFactory,
+                                       TransactionFactory, PaymentMethodFactory)
+from silver.fixtures.test_fixtures import PAYMENT_PROCESSORS, triggered_processor
+from silver.models import PDF, Transaction
+
+
+@pytest.fixture()
+def staff_client(user, client):
+    user.is_staff = True
+    user.save()
+    client.force_login(user)
+
+    return client
+
+
+@pytest.mark.django_db
+def test_metrics_require_authorization(client, authenticated_client):
+    assert client.get(reverse('metrics')).status_code == 403
+    assert authenticated_client.get(reverse('metrics')).status_code == 403
+
+
+@override_settings(SILVER_METRICS_TOKEN='secret')
+@pytest.mark.django_db
+def test_metrics_token_authorization(client, metrics_backend):
+    url = reverse('metrics')
+
+    assert client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+
+    response = client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+@pytest.mark.django_db
+def test_metrics_backlogs(staff_client, metrics_backend):
+    PDF.objects.create(dirty=1)
+    PDF.objects.create(dirty=0)
+
+    payment_method = PaymentMethodFactory.create(payment_processor=triggered_processor)
+    TransactionFactory.create_batch(2, payment_method=payment_method)
+    TransactionFactory.create(payment_method=payment_method, state=Transaction.States.Pending)
+
+    # the transactions' documents come with their own PDFs
+    dirty_pdfs = PDF.objects.filter(dirty__gt=0).count()
+    assert dirty_pdfs >= 1
+
+    lines = staff_client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+
+    assert 'silver_dirty_pdfs {}.0'.format(dirty_pdfs) in lines
+    assert 'silver_transactions_backlog{state="initial"} 2.0' in lines
+    assert 'silver_transactions_backlog{state="pending"} 1.0' in lines
+    assert '# TYPE silver_pdf_render_seconds histogram' in lines
+
+
+@pytest.mark.django_db
+def test_pdf_render_time_is_observed(staff_client, metrics_backend):
+    PDF.objects.create().generate(template=get_template('billing_documents/invoice_pdf.html'),
+                                  context={}, upload=False)
+
+    content = staff_client.get(reverse('metrics')).content.decode('utf-8')
+
+    assert 'silver_pdf_render_seconds_count 1.0' in content.splitlines()
+    assert 'silver_pdf_render_seconds_bucket{le="+Inf"} 1.0' in content.splitlines()
+
+
+@freeze_time('2022-05-02')
+@pytest.mark.django_db
+def test_usage_ingestion_is_counted(authenticated_api_client, staff_client, metrics_backend):
+    subscription = SubscriptionFactory.create()
+    metered_feature = MeteredFeatureFactory.create()
+    subscription.plan.metered_features.add(metered_feature)
+    subscription.activate()
+    subscription.save()
+
+    url = reverse('mf-log-units', kwargs={'subscription_pk': subscription.pk,
+                                          'customer_pk': subscription.customer.pk,
+                                          'mf_product_code': metered_feature.product_code})
+
+    for update_type in ['absolute', 'relative', 'relative']:
+        response = authenticated_api_client.patch(url, json.dumps({
+            'consumed_units': '10', 'date': str(datetime.date.today()),
+            'update_type': update_type
+        }), content_type='application/json')
+        assert response.status_code == 200
+
+    lines = staff_client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+
+    assert 'silver_metered_feature_units_log_updates_total{update_type="absolute"} 1.0' in lines
+    assert 'silver_metered_feature_units_log_updates_total{update_type="relative"} 2.0' in lines
+
+
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+@pytest.mark.django_db
+def test_transaction_processing_time_is_observed(staff_client, metrics_backend):
+    from silver.tasks import execute_transaction
+
+    transaction = TransactionFactory.create(
+        payment_method=PaymentMethodFactory.create(payment_processor=triggered_processor,
+                                                   verified=True)
+    )
+
+    with patch('silver.fixtures.test_fixtures.TriggeredProcessor.process_transaction'):
+        execute_transaction(transaction.pk)
+
+    lines = staff_client.get(reverse('metrics')).content.decode('utf-8').splitlines()
+
+    assert ('silver_transaction_processing_seconds_count'
+            '{processor="triggered",operation="execute"} 1.0') in lines
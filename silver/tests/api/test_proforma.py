@@ -33,6 +33,7 @@ from silver.fixtures.factories import (AdminUserFactory, CustomerFactory,
                                        ProviderFactory, ProformaFactory,
                                        SubscriptionFactory)
 from silver.tests.api.specs.document_entry import document_entry_definition
+from silver.tests.api.specs.utils import datetime_to_str
 from silver.tests.utils import build_absolute_test_url
 
 
@@ -91,7 +92,8 @@ class TestProformaEndpoints(APITestCase):
             "proforma_entries": [],
             "total": 0,
             "total_in_transaction_currency": 0,
-            "transactions": []
+            "transactions": [],
+            "updated_at": datetime_to_str(proforma.updated_at)
         }
 
     def test_post_proforma_with_proforma_entries(self):
@@ -186,7 +188,8 @@ class TestProformaEndpoints(APITestCase):
                 "proforma_entries": [],
                 "total": 0,
                 "total_in_transaction_currency": 0,
-                "transactions": []
+                "transactions": [],
+                "updated_at": datetime_to_str(proforma.updated_at)
             })
 
     def test_delete_proforma(self):
@@ -0,0 +1,100 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+from decimal import Decimal
+from io import StringIO
+
+from mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from silver.documents_generator import DocumentsGenerator
+from silver.fixtures.factories import (CustomerFactory, PlanFactory, SubscriptionFactory,
+                                       ProviderFactory)
+from silver.models import BillingRun, Subscription
+
+
+class TestBillingRuns(TestCase):
+    def setUp(self):
+        customer = CustomerFactory.create(consolidated_billing=False,
+                                          sales_tax_percent=Decimal('0.00'))
+        provider = ProviderFactory.create(default_document_state='issued')
+        plan = PlanFactory.create(interval='month', interval_count=1, generate_after=120,
+                                  enabled=True, amount=Decimal('200.00'), trial_period_days=0,
+                                  provider=provider)
+
+        self.subscription = SubscriptionFactory.create(
+            plan=plan, start_date=datetime.date(2015, 1, 1), customer=customer
+        )
+        self.subscription.activate()
+        self.subscription.save()
+
+        self.billing_date = datetime.date(2015, 2, 1)
+
+    def test_generation_run_is_recorded(self):
+        with patch('silver.documents_generator.logger') as logger:
+            DocumentsGenerator().generate(billing_date=self.billing_date)
+
+        billing_run = BillingRun.objects.get()
+        assert billing_run.billing_date == self.billing_date
+        assert billing_run.duration > 0
+
+        summary = billing_run.summary
+        assert list(summary['phases']) == list(DocumentsGenerator.PHASES)
+        assert summary['counters'] == {
+            'customers': 1, 'subscriptions': 1, 'documents_created': 1, 'entries': 2,
+            'documents_issued': 1
+        }
+        assert summary['phases']['subscription_selection']['calls'] == 1
+        assert summary['phases']['plan_cycles']['queries'] > 0
+        assert summary['phases']['issuing']['calls'] == 1
+        assert summary['proration_cache']['misses'] > 0
+
+        logged_summary = json.loads(logger.info.call_args[0][0])
+        assert logged_summary['event'] == 'billing_run'
+        assert logged_summary['billing_date'] == '2015-02-01'
+        assert logged_summary['counters'] == summary['counters']
+
+    def test_single_subscription_generation_run_is_recorded(self):
+        DocumentsGenerator().generate(subscription=self.subscription,
+                                      billing_date=self.billing_date)
+
+        summary = BillingRun.objects.get().summary
+        assert summary['counters']['subscriptions'] == 1
+        assert 'customers' not in summary['counters']
+
+    def test_generate_docs_profile(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+
+        output = StringIO()
+        call_command('generate_docs', '--date=2015-02-01', '--profile={}'.format(profile_dir),
+                     stdout=output)
+
+        profile_path = BillingRun.objects.get().summary['profile']
+        assert os.path.dirname(profile_path) == profile_dir
+        assert os.path.getsize(profile_path) > 0
+        assert 'Profile written to {}.'.format(profile_path) in output.getvalue()
+
+        assert Subscription.objects.get().billing_logs.count() == 1
@@ -0,0 +1,60 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from silver.fixtures.factories import BillingLogFactory, SubscriptionFactory
+from silver.models import Subscription
+
+
+@pytest.mark.django_db
+def test_check_latest_billing_logs():
+    consistent = BillingLogFactory.create(billing_date=dt.date(2018, 3, 1)).subscription
+    SubscriptionFactory.create()
+
+    billing_log = BillingLogFactory.create(billing_date=dt.date(2018, 3, 1))
+    subscription = billing_log.subscription
+    Subscription.objects.filter(pk=subscription.pk).update(latest_billing_log=None)
+
+    output = StringIO()
+    with pytest.raises(CommandError) as exception:
+        call_command('check_latest_billing_logs', stdout=output)
+
+    assert 'Found 1 inconsistent subscription(s)' in str(exception.value)
+    assert output.getvalue() == 'Subscription {}: latest billing log None, expected {}.\n'.format(
+        subscription.pk, billing_log.pk
+    )
+
+    output = StringIO()
+    call_command('check_latest_billing_logs', '--fix', stdout=output)
+
+    assert 'Fixed 1 subscription(s).' in output.getvalue()
+    subscription.refresh_from_db()
+    assert subscription.latest_billing_log == billing_log
+    assert consistent.billing_logs.get() == \
+        Subscription.objects.get(pk=consistent.pk).latest_billing_log
+
+    output = StringIO()
+    call_command('check_latest_billing_logs', stdout=output)
+
+    assert output.getvalue() == 'All the subscriptions are consistent.\n'
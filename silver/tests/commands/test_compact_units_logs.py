@@ -0,0 +1,67 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from silver.fixtures.factories import (MeteredFeatureFactory, MeteredFeatureUnitsLogFactory,
+                                       PlanFactory, SubscriptionFactory)
+from silver.models import BillingLog, MeteredFeatureUnitsLogArchive, Plan
+
+
+@pytest.mark.django_db
+def test_compact_units_logs_command():
+    metered_feature = MeteredFeatureFactory.create()
+    plan = PlanFactory.create(interval=Plan.INTERVALS.MONTH, interval_count=1,
+                              metered_features=[metered_feature])
+    subscription = SubscriptionFactory.create(plan=plan, start_date=dt.date(2018, 1, 1),
+                                              state='active')
+    other_subscription = SubscriptionFactory.create(plan=plan, start_date=dt.date(2018, 1, 1),
+                                                    state='active')
+
+    for billed_subscription in (subscription, other_subscription):
+        for start_day, end_day in [(1, 15), (16, 31)]:
+            MeteredFeatureUnitsLogFactory.create(
+                subscription=billed_subscription, metered_feature=metered_feature,
+                start_datetime=dt.datetime(2018, 1, start_day, tzinfo=timezone.utc),
+                end_datetime=dt.datetime(2018, 1, end_day, 23, 59, 59, tzinfo=timezone.utc)
+            )
+
+        BillingLog.objects.create(subscription=billed_subscription,
+                                  billing_date=dt.date(2018, 2, 1),
+                                  plan_billed_up_to=dt.date(2018, 2, 28),
+                                  metered_features_billed_up_to=dt.date(2018, 1, 31))
+
+    output = StringIO()
+    call_command('compact_units_logs', '--dry-run', stdout=output)
+    assert output.getvalue() == ('Would compact 4 log(s) into 2 log(s), for 2 subscription(s); '
+                                 '0 log(s) archived.\n')
+
+    output = StringIO()
+    call_command('compact_units_logs', '--archive', '--subscription', str(subscription.pk),
+                 stdout=output)
+    assert output.getvalue() == ('Compacted 2 log(s) into 1 log(s), for 1 subscription(s); '
+                                 '2 log(s) archived.\n')
+
+    assert subscription.mf_log_entries.count() == 1
+    assert other_subscription.mf_log_entries.count() == 2
+    assert MeteredFeatureUnitsLogArchive.objects.filter(subscription=subscription).count() == 2
@@ -0,0 +1,69 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import csv
+import json
+import os
+import tempfile
+
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from silver.fixtures.factories import DocumentEntryFactory, InvoiceFactory, ProformaFactory
+from silver.models import Invoice
+
+
+@pytest.mark.django_db
+def test_export_documents_to_stdout():
+    invoice = InvoiceFactory.create(invoice_entries=DocumentEntryFactory.create_batch(2),
+                                    state=Invoice.STATES.ISSUED)
+    InvoiceFactory.create()
+    ProformaFactory.create(proforma_entries=DocumentEntryFactory.create_batch(1))
+
+    output = StringIO()
+    call_command('export_documents', '--kind', 'invoice', '--filter', 'state=issued',
+                 '--format', 'ndjson', '--entries', stdout=output)
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row['document_id'] for row in rows] == [invoice.pk] * 2
+
+
+@pytest.mark.django_db
+def test_export_documents_to_file():
+    invoices = InvoiceFactory.create_batch(3)
+    proforma = ProformaFactory.create()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'documents.csv')
+    call_command('export_documents', '--output', path, '--chunk-size', '2')
+
+    with open(path) as export:
+        rows = list(csv.DictReader(export))
+
+    assert [int(row['id']) for row in rows] == [invoice.pk for invoice in invoices] + [proforma.pk]
+
+    os.remove(path)
+    os.rmdir(directory)
+
+
+@pytest.mark.django_db
+def test_export_documents_invalid_filters():
+    with pytest.raises(CommandError):
+        call_command('export_documents', '--filter', 'due_date=invalid')
@@ -0,0 +1,56 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from silver.documents_generator import DocumentsGenerator
+from silver.models import (Customer, Subscription, MeteredFeatureUnitsLog, Plan, Proforma,
+                           Invoice, BillingLog)
+
+
+class TestGenerateDatasetCommand(TestCase):
+    def test_generate_dataset(self):
+        output = StringIO()
+        call_command('generate_dataset', '--customers=5', '--plans=2', '--metered-features=2',
+                     '--subscriptions=10', '--months=2', '--date=2018-03-01', stdout=output)
+
+        self.assertIn('Created 10 subscriptions.', output.getvalue())
+        self.assertEqual(Customer.objects.count(), 5)
+        self.assertEqual(Subscription.objects.filter(state=Subscription.STATES.ACTIVE).count(), 10)
+
+        for plan in Plan.objects.all():
+            self.assertEqual(plan.metered_features.count(), 2)
+
+        # two months of usage, for each of the subscription plan's metered features
+        self.assertEqual(MeteredFeatureUnitsLog.objects.count(), 10 * 2 * 2)
+        self.assertFalse(MeteredFeatureUnitsLog.objects.filter(
+            start_datetime__gte=datetime.datetime(2018, 3, 1, tzinfo=datetime.timezone.utc)
+        ).exists())
+
+    def test_generated_dataset_can_be_billed(self):
+        call_command('generate_dataset', '--customers=3', '--subscriptions=5',
+                     '--date=2018-03-01', stdout=StringIO())
+
+        DocumentsGenerator().generate(billing_date=datetime.date(2018, 3, 1))
+
+        self.assertEqual(BillingLog.objects.count(), 5)
+        self.assertTrue(Proforma.objects.exists() or Invoice.objects.exists())
@@ -0,0 +1,139 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from freezegun import freeze_time
+
+from silver.fixtures.factories import (CustomerFactory, MeteredFeatureFactory,
+                                       MeteredFeatureUnitsLogFactory, PlanFactory,
+                                       SubscriptionFactory)
+from silver.models import BillingLog, BillingRun, DocumentEntry, Plan, Subscription
+from silver.utils.dates import billing_dates
+
+
+FROM_DATE, TO_DATE = dt.date(2018, 1, 25), dt.date(2018, 3, 3)
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_subscription(customer, start_date, cancel_date=None, **plan_kwargs):
+    plan_kwargs.setdefault('interval', Plan.INTERVALS.MONTH)
+    metered_feature = MeteredFeatureFactory.create(included_units=Decimal('0.00'))
+    plan = PlanFactory.create(generate_after=0, interval_count=1, amount=Decimal('10.00'),
+                              metered_features=[metered_feature], **plan_kwargs)
+
+    subscription = SubscriptionFactory.create(plan=plan, start_date=start_date,
+                                              customer=customer)
+    subscription.activate()
+    subscription.save()
+
+    MeteredFeatureUnitsLogFactory.create(
+        subscription=subscription, metered_feature=metered_feature,
+        start_datetime=start_date, end_datetime=start_date + dt.timedelta(days=3),
+        consumed_units=Decimal('5.00')
+    )
+
+    if cancel_date:
+        subscription.cancel(when=cancel_date)
+        subscription.save()
+
+    return subscription
+
+
+def create_subscriptions():
+    consolidated = CustomerFactory.create(consolidated_billing=True)
+    create_subscription(consolidated, dt.date(2018, 1, 10), prebill_plan=True)
+    create_subscription(consolidated, dt.date(2018, 1, 28), prebill_plan=False)
+
+    customer = CustomerFactory.create(consolidated_billing=False)
+    create_subscription(customer, dt.date(2018, 1, 15), interval=Plan.INTERVALS.WEEK)
+    create_subscription(customer, dt.date(2018, 1, 5), cancel_date=dt.date(2018, 2, 10))
+
+    # not due within the range
+    create_subscription(CustomerFactory.create(), dt.date(2018, 4, 1))
+
+
+def billed_documents():
+    billing_logs = [
+        (billing_log.subscription_id, billing_log.billing_date, billing_log.plan_billed_up_to,
+         billing_log.metered_features_billed_up_to, billing_log.total,
+         billing_log.proforma.number if billing_log.proforma else None,
+         billing_log.invoice.number if billing_log.invoice else None)
+        for billing_log in BillingLog.objects.order_by('subscription', 'billing_date')
+    ]
+    entries = [
+        (entry.proforma.number if entry.proforma else None,
+         entry.invoice.number if entry.invoice else None,
+         entry.description, entry.start_date, entry.end_date, entry.quantity, entry.unit_price)
+        for entry in DocumentEntry.objects.order_by('pk')
+    ]
+    states = list(Subscription.objects.order_by('pk')
+                  .values_list('state', 'latest_billing_log__billing_date'))
+
+    return billing_logs, entries, states
+
+
+@pytest.mark.django_db
+def test_generate_docs_range_matches_the_daily_runs():
+    with freeze_time('2018-01-01'):
+        create_subscriptions()
+
+    with freeze_time(TO_DATE):
+        try:
+            with transaction.atomic():
+                for billing_date in billing_dates(FROM_DATE, TO_DATE):
+                    call_command('generate_docs', billing_date=billing_date, stdout=StringIO())
+
+                daily_documents = billed_documents()
+                raise Rollback
+        except Rollback:
+            pass
+
+        assert not BillingLog.objects.exists()
+
+        call_command('generate_docs', from_date=FROM_DATE, to_date=TO_DATE, stdout=StringIO())
+
+    assert billed_documents() == daily_documents
+    assert len(daily_documents[0]) == 15
+
+    billing_run = BillingRun.objects.get()
+    assert billing_run.billing_date == TO_DATE
+    assert billing_run.summary['from_billing_date'] == FROM_DATE.isoformat()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('options, message', [
+    ({'to_date': TO_DATE}, '--to-date requires --from-date.'),
+    ({'from_date': FROM_DATE, 'billing_date': TO_DATE},
+     '--date cannot be used along with --from-date.'),
+    ({'from_date': TO_DATE, 'to_date': FROM_DATE}, '--from-date must not be after --to-date.'),
+])
+def test_generate_docs_range_invalid_arguments(options, message):
+    with pytest.raises(CommandError) as exception:
+        call_command('generate_docs', stdout=StringIO(), **options)
+
+    assert str(exception.value) == message
@@ -0,0 +1,61 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from silver.fixtures.factories import DocumentEntryFactory, InvoiceFactory
+from silver.models import CustomerBalance, LedgerEntry
+
+
+@pytest.mark.django_db
+def test_rebuild_ledgers():
+    invoice = InvoiceFactory.create(currency='USD', transaction_currency='USD')
+    DocumentEntryFactory.create(invoice=invoice, quantity=1, unit_price=Decimal('10.00'))
+    invoice.issue()
+    customer = invoice.customer
+
+    # the ledger of the documents issued before it existed
+    LedgerEntry.objects.all().delete()
+    CustomerBalance.objects.all().delete()
+
+    output = StringIO()
+    with pytest.raises(CommandError) as exception:
+        call_command('rebuild_ledgers', '--verify', stdout=output)
+
+    total = invoice.total_in_transaction_currency
+    assert 'Found 1 inconsistent balance(s)' in str(exception.value)
+    assert output.getvalue() == 'Customer {}: USD balance 0.00, expected {}.\n'.format(
+        customer.pk, total
+    )
+
+    output = StringIO()
+    call_command('rebuild_ledgers', '--customer', str(customer.pk), stdout=output)
+
+    assert 'Rebuilt the ledgers of 1 customer(s), fixing 1 balance(s).' in output.getvalue()
+    assert CustomerBalance.objects.get(customer=customer).amount == total
+    assert LedgerEntry.objects.get(customer=customer).invoice_id == invoice.pk
+
+    output = StringIO()
+    call_command('rebuild_ledgers', '--verify', stdout=output)
+
+    assert output.getvalue() == "All the customers' balances are consistent.\n"
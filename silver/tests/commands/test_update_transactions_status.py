@@ -22,7 +22,8 @@ from django.test import TestCase, override_settings
 from silver.models import Transaction
 from silver.fixtures.factories import TransactionFactory, PaymentMethodFactory
 from silver.fixtures.test_fixtures import (TriggeredProcessor, PAYMENT_PROCESSORS,
-                                           triggered_processor)
+                                           triggered_processor, batch_status_processor,
+                                           BatchStatusTriggeredProcessor)
 
 
 @override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
@@ -98,3 +99,31 @@ class TestUpdateTransactionsStatusCommand(TestCase):
             )
 
             self.assertEqual(expected_call, mock_logger.call_args)
+
+    def test_fetch_transactions_status_batch_call(self):
+        payment_method = PaymentMethodFactory.create(
+            payment_processor=batch_status_processor
+        )
+
+        transactions = TransactionFactory.create_batch(
+            5, payment_method=payment_method, state=Transaction.States.Pending
+        )
+
+        mock_fetch_status = MagicMock()
+        mock_fetch_status_batch = MagicMock()
+        with patch.multiple(BatchStatusTriggeredProcessor,
+                            fetch_transaction_status=mock_fetch_status,
+                            fetch_transactions_status_batch=mock_fetch_status_batch):
+            call_command('fetch_transactions_status')
+
+            batched_transactions = [
+                transaction
+                for call_args in mock_fetch_status_batch.call_args_list
+                for transaction in call_args[0][0]
+            ]
+
+            self.assertEqual(sorted(batched_transactions, key=lambda t: t.pk),
+                             sorted(transactions, key=lambda t: t.pk))
+            # batches of at most 2 transactions
+            self.assertEqual(mock_fetch_status_batch.call_count, 3)
+            self.assertFalse(mock_fetch_status.called)
@@ -0,0 +1,223 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from decimal import Decimal
+
+import pytest
+
+from django.test import override_settings
+from rest_framework.reverse import reverse
+
+from silver.documents_generator import DocumentsGenerator
+from silver.fixtures.factories import (CustomerFactory, PlanFactory, MeteredFeatureFactory,
+                                       SubscriptionFactory, MeteredFeatureUnitsLogFactory,
+                                       ProformaFactory, InvoiceFactory, DocumentEntryFactory,
+                                       TransactionFactory, PaymentMethodFactory)
+from silver.fixtures.test_fixtures import (PAYMENT_PROCESSORS, manual_processor,
+                                           triggered_processor)
+from silver.models import Customer, Invoice, Proforma
+from silver.models.payment_methods import create_transactions_for_issued_documents
+from silver.utils.queries import QueryCounter, QueryBudgetExceeded
+
+
+def create_subscriptions(customer, count):
+    metered_feature = MeteredFeatureFactory(included_units=Decimal('0.00'))
+    plan = PlanFactory.create(interval='month', interval_count=1, generate_after=120,
+                              enabled=True, amount=Decimal('200.00'),
+                              metered_features=[metered_feature])
+
+    subscriptions = SubscriptionFactory.create_batch(count, plan=plan, customer=customer,
+                                                     start_date=dt.date(2015, 1, 1))
+    for subscription in subscriptions:
+        subscription.activate()
+        subscription.save()
+
+        MeteredFeatureUnitsLogFactory.create(
+            subscription=subscription, metered_feature=metered_feature,
+            start_datetime=dt.datetime(2015, 2, 1, tzinfo=dt.timezone.utc),
+            end_datetime=dt.datetime(2015, 2, 28, tzinfo=dt.timezone.utc),
+            consumed_units=Decimal('10.00')
+        )
+
+    return subscriptions
+
+
+def test_query_budget_exceeded(query_budget):
+    with pytest.raises(QueryBudgetExceeded) as exception:
+        with query_budget(1, 'customers'):
+            for _ in range(2):
+                list(Customer.objects.all())
+
+    assert 'customers: 2 queries (2 duplicated)' in str(exception.value)
+
+
+def test_query_counter_records_duplicates(db):
+    customer = CustomerFactory.create()
+
+    with QueryCounter() as counter:
+        for _ in range(3):
+            Customer.objects.get(pk=customer.pk)
+        Customer.objects.filter(pk=customer.pk + 1).first()
+
+    assert counter.count == 4
+    assert list(counter.duplicates.values()) == [3]
+    assert list(counter.repeated_statements.values()) == [3]
+    assert counter.total_time > 0
+
+
+@pytest.mark.parametrize('count', [1, 2, 4])
+# the billed subscriptions' latest billing log and next billing dates are updated along with
+# their billing logs, in a transaction (3 queries)
+# the counts are matched exactly, so that the budgets are lowered along with the counts
+@pytest.mark.parametrize('consolidated_billing, base, per_subscription', [
+    (True, 11, 28),
+    (False, 5, 34),
+])
+def test_documents_generation_query_budget(query_budget, count, consolidated_billing,
+                                           base, per_subscription):
+    customer = CustomerFactory.create(consolidated_billing=consolidated_billing)
+    create_subscriptions(customer, count)
+
+    with query_budget(base + per_subscription * count, 'generate') as budget:
+        DocumentsGenerator().generate(billing_date=dt.date(2015, 3, 1), customers=[customer])
+
+    assert budget.count == base + per_subscription * count, budget.report()
+
+
+@pytest.mark.parametrize('count', [1, 5])
+@pytest.mark.parametrize('query, budget', [
+    ('', 5),
+    ('?view=summary', 4),
+    ('?fields=id,number,total', 4),
+    ('?fields=id,transactions', 4),
+])
+@pytest.mark.parametrize('url_name, document_factory', [
+    ('invoice-list', InvoiceFactory),
+    ('proforma-list', ProformaFactory),
+])
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_documents_list_query_budget(authenticated_api_client, query_budget, count, query, budget,
+                                     url_name, document_factory):
+    for index in range(count):
+        document = document_factory.create()
+        DocumentEntryFactory.create_batch(2, **{document.kind: document})
+
+        # the drafts' totals are computed from their entries
+        if index % 2:
+            continue
+
+        document.issue()
+        TransactionFactory.create(**{
+            document.kind: document,
+            'payment_method': PaymentMethodFactory.create(customer=document.customer,
+                                                          payment_processor=manual_processor)
+        })
+
+    with query_budget(budget, url_name):
+        response = authenticated_api_client.get(reverse(url_name) + query)
+
+    assert response.status_code == 200
+    assert len(response.data) == count
+
+
+def test_invoices_summary_page_query_budget(authenticated_api_client, query_budget):
+    for invoice in InvoiceFactory.create_batch(100):
+        DocumentEntryFactory.create(invoice=invoice)
+
+    with query_budget(9, 'invoice-list'):
+        response = authenticated_api_client.get(reverse('invoice-list') +
+                                                '?view=summary&page_size=100')
+
+    assert response.status_code == 200
+    assert len(response.data) == 100
+
+
+@pytest.mark.parametrize('count', [1, 5])
+@pytest.mark.parametrize('entries', [1, 5])
+@pytest.mark.parametrize('method', ['create_stornos', 'clone_into_drafts'])
+def test_create_stornos_and_clones_query_budget(query_budget, count, entries, method):
+    invoices = []
+    for _ in range(count):
+        invoice = InvoiceFactory.create(
+            invoice_entries=DocumentEntryFactory.create_batch(entries)
+        )
+        invoice.issue()
+        invoice.pay()
+        invoices.append(invoice)
+    invoices = list(Invoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]))
+
+    # the customers and providers, the documents' insert, their primary keys and archived
+    # customers (on SQLite), the entries, their insert and the documents' touch, whatever
+    # their count
+    with query_budget(10, method):
+        documents = getattr(Invoice, method)(invoices)
+
+    assert len(documents) == count
+    assert all(document.pk for document in documents)
+
+
+@pytest.mark.parametrize('count', [1, 5])
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_transactions_list_query_budget(authenticated_api_client, query_budget, count):
+    customer = CustomerFactory.create()
+    TransactionFactory.create_batch(
+        count, payment_method=PaymentMethodFactory.create(customer=customer,
+                                                          payment_processor=manual_processor)
+    )
+    url = reverse('transaction-list', kwargs={'customer_pk': customer.pk})
+
+    with query_budget(2 + 4 * count, 'transaction-list'):
+        response = authenticated_api_client.get(url)
+
+    assert response.status_code == 200
+    assert len(response.data) == count
+
+
+@pytest.mark.parametrize('entries', [1, 5])
+@pytest.mark.parametrize('document_factory', [InvoiceFactory, ProformaFactory])
+def test_document_issue_query_budget(query_budget, entries, document_factory):
+    document = document_factory.create()
+    DocumentEntryFactory.create_batch(entries, **{document.kind: document})
+
+    # including the ledger entry and the customer's balance upsert
+    with query_budget(27, 'issue'):
+        document.issue()
+
+
+@pytest.mark.parametrize('count', [1, 5])
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_payment_method_transactions_query_budget(query_budget, count):
+    customer = CustomerFactory.create()
+    for _ in range(count):
+        InvoiceFactory.create(customer=customer, state=Invoice.STATES.ISSUED,
+                              transaction_currency='USD', transaction_xe_rate=Decimal('1.0'),
+                              invoice_entries=DocumentEntryFactory.create_batch(2))
+        ProformaFactory.create(customer=customer, state=Proforma.STATES.ISSUED,
+                               transaction_currency='USD', transaction_xe_rate=Decimal('1.0'))
+
+    payment_method = PaymentMethodFactory.create(customer=customer, verified=False,
+                                                 payment_processor=triggered_processor)
+    payment_method.verified = True
+
+    # the documents (along with their charged amounts) and their entries per kind, the bulk
+    # insert, the inserted rows (on SQLite) and the documents' touch, whatever their count
+    with query_budget(10, 'transactions'):
+        transactions = create_transactions_for_issued_documents(payment_method)
+
+    assert len(transactions) == 2 * count
@@ -0,0 +1,82 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import pytest
+
+from django.db import connection
+
+from silver.fixtures.factories import (CustomerFactory, InvoiceFactory, ProformaFactory,
+                                       ProviderFactory, TransactionFactory)
+from silver.models import PDF, Invoice, Proforma, Transaction
+
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql',
+                                reason='The query plans are checked on PostgreSQL only.')
+
+
+def query_plan(queryset):
+    # the test tables are tiny, so sequential scans would always be cheaper
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    return queryset.order_by().explain()
+
+
+@pytest.fixture
+def documents():
+    customer = CustomerFactory.create()
+    provider = ProviderFactory.create()
+
+    InvoiceFactory.create_batch(3, customer=customer, provider=provider,
+                                state=Invoice.STATES.ISSUED)
+    ProformaFactory.create_batch(3, customer=customer, provider=provider,
+                                 state=Proforma.STATES.ISSUED)
+    TransactionFactory.create_batch(3)
+
+    return customer, provider
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('queryset, index_name', [
+    (lambda customer, provider: Invoice.objects.due_today(), 'silver_doc_issued_due_idx'),
+    (lambda customer, provider: Invoice.objects.overdue(), 'silver_doc_issued_due_idx'),
+    (lambda customer, provider: Proforma.objects.due_this_month(),
+     'silver_doc_issued_due_idx'),
+    (lambda customer, provider: PDF.objects.filter(dirty__gt=0), 'silver_pdf_dirty_idx'),
+    (lambda customer, provider: Proforma.objects.filter(related_document=None,
+                                                        customer=customer,
+                                                        state=Proforma.STATES.ISSUED),
+     'silver_doc_cust_kind_state_idx'),
+    (lambda customer, provider: Transaction.objects.filter(state=Transaction.States.Initial),
+     'silver_trx_initial_idx'),
+    (lambda customer, provider: Transaction.objects.filter(state=Transaction.States.Pending),
+     'silver_trx_pending_idx'),
+])
+def test_hot_queries_use_their_indexes(documents, queryset, index_name):
+    plan = query_plan(queryset(*documents))
+
+    assert index_name in plan, plan
+
+
+@pytest.mark.django_db
+def test_document_number_generation_uses_an_index_scan(documents):
+    customer, provider = documents
+
+    # `_generate_number` uses the (kind, provider, series, number) unique index
+    plan = query_plan(Invoice.objects.filter(provider=provider, series=provider.invoice_series)
+                      .values('number'))
+
+    assert 'Index' in plan and 'Seq Scan' not in plan, plan
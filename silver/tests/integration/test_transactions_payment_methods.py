@@ -16,14 +16,19 @@ from __future__ import absolute_import
 
 from decimal import Decimal
 
+from mock import patch
+
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
-from silver.models import Invoice, Proforma
+from silver.models import Invoice, Proforma, Transaction
 from silver.fixtures.factories import (PaymentMethodFactory, InvoiceFactory,
                                        ProformaFactory, TransactionFactory,
-                                       CustomerFactory)
+                                       CustomerFactory, DocumentEntryFactory)
+from silver.models.payment_methods import _select_documents_for_update
+from silver.tasks import create_transactions_for_payment_method
 from silver.fixtures.test_fixtures import (PAYMENT_PROCESSORS, triggered_processor)
 
 
@@ -139,3 +144,86 @@ class TestDocumentsTransactions(TestCase):
                          list(paired_proforma.transactions))
 
         self.assertEqual(paired_invoice.transactions.count(), 1)
+
+    def test_create_transactions_charges_the_remaining_amounts(self):
+        customer = CustomerFactory.create()
+        invoice = InvoiceFactory.create(
+            transaction_currency='USD', transaction_xe_rate=Decimal('1.0'),
+            state=Invoice.STATES.ISSUED, customer=customer,
+            invoice_entries=DocumentEntryFactory.create_batch(2)
+        )
+        # not allowed by the payment processor
+        InvoiceFactory.create(transaction_currency='EUR', transaction_xe_rate=Decimal('1.0'),
+                              state=Invoice.STATES.ISSUED, customer=customer)
+
+        payment_method = PaymentMethodFactory.create(
+            payment_processor=triggered_processor, customer=customer,
+            canceled=False, verified=False
+        )
+        Transaction.objects.create(invoice=invoice, payment_method=payment_method,
+                                   amount=Decimal('10.00'))
+        Transaction.objects.create(invoice=invoice, payment_method=payment_method,
+                                   amount=Decimal('5.00'), state=Transaction.States.Failed)
+
+        payment_method.verified = True
+        payment_method.save()
+
+        transaction = invoice.transactions.get(amount__gt=Decimal('10.00'))
+        self.assertEqual(transaction.amount,
+                         invoice.total_in_transaction_currency - Decimal('10.00'))
+        self.assertEqual(transaction.currency, 'USD')
+        self.assertEqual(transaction.state, Transaction.States.Initial)
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    @override_settings(SILVER_CREATE_TRANSACTIONS_ASYNC=True)
+    def test_create_transactions_asynchronously(self):
+        customer = CustomerFactory.create()
+        invoice = InvoiceFactory.create(transaction_currency='USD',
+                                        transaction_xe_rate=Decimal('1.0'),
+                                        state=Invoice.STATES.ISSUED, customer=customer)
+
+        with patch('silver.tasks.create_transactions_for_payment_method.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            payment_method = PaymentMethodFactory.create(
+                payment_processor=triggered_processor, customer=customer,
+                canceled=False, verified=True
+            )
+
+        delay.assert_called_once_with(payment_method.pk)
+        self.assertEqual(invoice.transactions.count(), 0)
+
+        create_transactions_for_payment_method(payment_method.pk)
+        self.assertEqual(invoice.transactions.count(), 1)
+
+    def test_documents_are_locked_without_select_for_update_of_support(self):
+        # e.g. MySQL 5.7 and MariaDB
+        with patch.object(connection.features, 'has_select_for_update', True), \
+                patch.object(connection.features, 'has_select_for_update_of', False):
+            queryset = _select_documents_for_update(
+                Invoice.objects.filter(state=Invoice.STATES.ISSUED).with_balances()
+            )
+
+            # compiling raises NotSupportedError if the locked tables are given
+            sql, _ = queryset.query.get_compiler(connection=connection).as_sql()
+
+        assert queryset.query.select_for_update_of == ()
+        assert 'FOR UPDATE' in sql
+
+        with patch.object(connection.features, 'has_select_for_update_of', True):
+            queryset = _select_documents_for_update(Invoice.objects.all())
+
+        assert queryset.query.select_for_update_of == ('self',)
+
+    def test_create_transactions_without_select_for_update_of_support(self):
+        customer = CustomerFactory.create()
+        InvoiceFactory.create(customer=customer, state=Invoice.STATES.ISSUED,
+                              transaction_currency='USD', transaction_xe_rate=Decimal('1.0'),
+                              invoice_entries=[DocumentEntryFactory.create()])
+
+        with patch.object(connection.features, 'has_select_for_update_of', False):
+            payment_method = PaymentMethodFactory.create(
+                payment_processor=triggered_processor, customer=customer,
+                canceled=False, verified=True
+            )
+
+        assert Transaction.objects.filter(payment_method=payment_method).count() == 1
@@ -75,8 +75,7 @@ def test_generate_pdf_task(settings, tmpdir, monkeypatch):
 
     pisa_document_mock = MagicMock(return_value=MagicMock(err=False))
 
-    monkeypatch.setattr('silver.models.documents.pdf.pisa.pisaDocument',
-                        pisa_document_mock)
+    monkeypatch.setattr('silver.models.documents.pdf.pisa_document', pisa_document_mock)
 
     generate_pdf(invoice.id, invoice.kind)
 
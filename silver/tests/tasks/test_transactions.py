@@ -0,0 +1,197 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+
+import pytest
+
+from mock import patch, MagicMock
+
+from django.test import override_settings
+
+from silver.fixtures.factories import TransactionFactory, PaymentMethodFactory
+from silver.fixtures.test_fixtures import (PAYMENT_PROCESSORS, TriggeredProcessor,
+                                           BatchStatusTriggeredProcessor, triggered_processor,
+                                           throttled_processor, batch_status_processor)
+from silver.models import Transaction
+from silver.payment_processors.throttling import LocalThrottleBackend, get_queue_depths
+from silver.tasks import (execute_transactions, execute_transaction,
+                          fetch_transactions_status, fetch_transaction_status,
+                          fetch_transactions_status_batch)
+
+
+@pytest.fixture
+def throttle_backend(monkeypatch):
+    backend = LocalThrottleBackend()
+    monkeypatch.setattr('silver.payment_processors.throttling.get_throttle_backend',
+                        lambda: backend)
+
+    return backend
+
+
+def _scheduled_ids(mocked_group):
+    return [signature.args[0] for signature in mocked_group.call_args[0][0]]
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_execute_transactions_is_capped_per_processor(throttle_backend):
+    throttled_transactions = TransactionFactory.create_batch(
+        5, payment_method=PaymentMethodFactory.create(payment_processor=throttled_processor,
+                                                      verified=True)
+    )
+    triggered_transactions = TransactionFactory.create_batch(
+        3, payment_method=PaymentMethodFactory.create(payment_processor=triggered_processor,
+                                                      verified=True)
+    )
+
+    with patch('silver.tasks.group') as mocked_group:
+        execute_transactions()
+
+    scheduled_ids = _scheduled_ids(mocked_group)
+
+    # max_concurrency is 2 for the throttled processor, while the other one is not limited
+    assert scheduled_ids == [transaction.id for transaction in throttled_transactions[:2]] + \
+        [transaction.id for transaction in triggered_transactions]
+    assert get_queue_depths() == {throttled_processor: 3}
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS,
+                   SILVER_TRANSACTIONS_PRIORITY='amount')
+def test_execute_transactions_priority_by_amount(throttle_backend):
+    payment_method = PaymentMethodFactory.create(payment_processor=throttled_processor,
+                                                 verified=True)
+    transactions = TransactionFactory.create_batch(3, payment_method=payment_method)
+    for transaction, amount in zip(transactions, ('10.00', '30.00', '20.00')):
+        Transaction.objects.filter(pk=transaction.pk).update(amount=Decimal(amount))
+
+    with patch('silver.tasks.group') as mocked_group:
+        execute_transactions()
+
+    assert _scheduled_ids(mocked_group) == [transactions[1].id, transactions[2].id]
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_fetch_transactions_status_is_capped_per_processor(throttle_backend):
+    transactions = TransactionFactory.create_batch(
+        4, payment_method=PaymentMethodFactory.create(payment_processor=throttled_processor,
+                                                      verified=True),
+        state=Transaction.States.Pending
+    )
+
+    with patch('silver.tasks.group') as mocked_group:
+        fetch_transactions_status()
+
+    assert _scheduled_ids(mocked_group) == [transaction.id for transaction in transactions[:2]]
+    assert get_queue_depths() == {throttled_processor: 2}
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_execute_transaction_skips_throttled_transaction(throttle_backend):
+    transaction = TransactionFactory.create(
+        payment_method=PaymentMethodFactory.create(payment_processor=throttled_processor,
+                                                   verified=True)
+    )
+
+    for slot_id in ('first', 'second'):
+        throttle_backend.acquire(throttled_processor, slot_id, now=0, slot_ttl=10 ** 12,
+                                 max_concurrency=2)
+
+    mock_execute = MagicMock()
+    with patch.multiple(TriggeredProcessor, execute_transaction=mock_execute):
+        execute_transaction(transaction.id)
+
+        assert not mock_execute.called
+
+        throttle_backend.release(throttled_processor, 'first')
+        execute_transaction(transaction.id)
+
+        mock_execute.assert_called_once_with(transaction)
+
+    # the slot is released once the processor call is done
+    assert throttle_backend.acquire(throttled_processor, 'third', now=0, slot_ttl=10 ** 12,
+                                    max_concurrency=2)
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_fetch_transaction_status_releases_slot_on_error(throttle_backend):
+    transaction = TransactionFactory.create(
+        payment_method=PaymentMethodFactory.create(payment_processor=throttled_processor,
+                                                   verified=True),
+        state=Transaction.States.Pending
+    )
+
+    mock_fetch = MagicMock(side_effect=Exception)
+    with patch.multiple(TriggeredProcessor, fetch_transaction_status=mock_fetch):
+        with pytest.raises(Exception):
+            fetch_transaction_status(transaction.id)
+
+    assert throttle_backend.capacity(throttled_processor, now=0, max_concurrency=2) == 2
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_fetch_transactions_status_groups_batches_per_processor(throttle_backend):
+    batch_transactions = TransactionFactory.create_batch(
+        3, payment_method=PaymentMethodFactory.create(payment_processor=batch_status_processor,
+                                                      verified=True),
+        state=Transaction.States.Pending
+    )
+    single_transaction = TransactionFactory.create(
+        payment_method=PaymentMethodFactory.create(payment_processor=triggered_processor,
+                                                   verified=True),
+        state=Transaction.States.Pending
+    )
+
+    with patch('silver.tasks.group') as mocked_group:
+        fetch_transactions_status()
+
+    signatures = list(mocked_group.call_args[0][0])
+
+    assert [(signature.task, signature.args) for signature in signatures] == [
+        (fetch_transactions_status_batch.name,
+         ([transaction.id for transaction in batch_transactions[:2]], )),
+        (fetch_transactions_status_batch.name, ([batch_transactions[2].id], )),
+        (fetch_transaction_status.name, (single_transaction.id, )),
+    ]
+
+
+@pytest.mark.django_db
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_fetch_transactions_status_batch_task():
+    transactions = TransactionFactory.create_batch(
+        2, payment_method=PaymentMethodFactory.create(payment_processor=batch_status_processor,
+                                                      verified=True),
+        state=Transaction.States.Pending
+    )
+    settled_transaction = TransactionFactory.create(
+        payment_method=transactions[0].payment_method, state=Transaction.States.Settled
+    )
+
+    mock_fetch_status_batch = MagicMock()
+    with patch.multiple(BatchStatusTriggeredProcessor,
+                        fetch_transactions_status_batch=mock_fetch_status_batch):
+        fetch_transactions_status_batch(
+            [transaction.id for transaction in transactions] + [settled_transaction.id]
+        )
+
+    assert mock_fetch_status_batch.call_count == 1
+    assert sorted(mock_fetch_status_batch.call_args[0][0], key=lambda t: t.pk) == transactions
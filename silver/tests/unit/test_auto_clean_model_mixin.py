@@ -0,0 +1,92 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+
+import pytest
+
+from silver.fixtures.factories import DocumentEntryFactory, InvoiceFactory, ProformaFactory
+from silver.models import BillingDocumentBase, DocumentEntry, Invoice, Proforma
+from silver.models.documents.base import get_billing_document_class
+
+
+@pytest.mark.django_db
+def test_states_are_built_lazily():
+    entry = DocumentEntryFactory.create()
+    entry = DocumentEntry.objects.get(pk=entry.pk)
+
+    for attribute in ('_initial_state', '_cleaned_state', '_saved_state'):
+        assert attribute not in entry.__dict__
+
+    assert entry.initial_state == entry.current_state
+    assert entry.saved_state == entry.current_state
+    assert entry.get_dirty_fields() == {}
+
+
+@pytest.mark.django_db
+def test_states_reflect_loaded_values_after_mutation():
+    entry = DocumentEntryFactory.create(quantity=Decimal('1.0000'))
+    entry = DocumentEntry.objects.get(pk=entry.pk)
+
+    entry.quantity = Decimal('2.0000')
+
+    assert entry.initial_state['quantity'] == Decimal('1.0000')
+    assert entry.get_dirty_fields() == {'quantity': Decimal('1.0000')}
+    assert entry.get_unsaved_fields() == ['quantity']
+
+    entry.save()
+
+    assert entry.get_unsaved_fields() == []
+
+    entry.refresh_from_db()
+
+    assert entry.initial_state['quantity'] == Decimal('2.0000')
+    assert '_loaded_attributes' not in entry._loaded_attributes
+
+
+def test_unsaved_instance_states():
+    entry = DocumentEntryFactory.build()
+
+    assert entry.cleaned_state == {}
+    assert entry.saved_state == {}
+    assert set(entry.get_unsaved_fields()) == set(entry.current_state)
+
+
+@pytest.mark.django_db
+def test_billing_documents_are_loaded_with_their_kind_class():
+    invoice = InvoiceFactory.create()
+    proforma = ProformaFactory.create()
+
+    documents = {document.pk: document for document in BillingDocumentBase.objects.all()}
+
+    assert type(documents[invoice.pk]) is Invoice
+    assert type(documents[proforma.pk]) is Proforma
+    assert get_billing_document_class('invoice') is Invoice
+    assert get_billing_document_class('unknown') is None
+
+
+@pytest.mark.django_db
+def test_auto_updated_fields_do_not_dirty_saved_instances():
+    invoice = InvoiceFactory.create()
+    invoice = Invoice.objects.get(pk=invoice.pk)
+
+    invoice.full_clean()
+    invoice.save()
+
+    assert invoice.get_dirty_fields() == {}
+    assert invoice.is_cleaned
+    assert invoice.get_unsaved_fields() == []
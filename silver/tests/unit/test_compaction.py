@@ -0,0 +1,118 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from collections import Counter
+from decimal import Decimal
+
+import pytest
+
+from django.db.models import Sum
+from django.utils import timezone
+from freezegun import freeze_time
+
+from silver.compaction import compact_units_logs
+from silver.fixtures.factories import (MeteredFeatureFactory, MeteredFeatureUnitsLogFactory,
+                                       PlanFactory, SubscriptionFactory)
+from silver.models import (BillingLog, MeteredFeatureUnitsLog, MeteredFeatureUnitsLogArchive,
+                           Plan)
+
+
+def utc_datetime(date, end=False):
+    return dt.datetime.combine(date, dt.time.max if end else dt.time.min,
+                               tzinfo=timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def subscription():
+    metered_feature = MeteredFeatureFactory.create()
+    plan = PlanFactory.create(interval=Plan.INTERVALS.MONTH, interval_count=1,
+                              metered_features=[metered_feature])
+
+    with freeze_time('2018-01-01'):
+        subscription = SubscriptionFactory.create(plan=plan, start_date=dt.date(2018, 1, 1))
+        subscription.activate()
+        subscription.save()
+
+    for annotation, days in [(None, [(1, 10), (11, 20), (21, 31)]), ('eu', [(1, 15), (16, 31)])]:
+        for start_day, end_day in days:
+            MeteredFeatureUnitsLogFactory.create(
+                subscription=subscription, metered_feature=metered_feature,
+                annotation=annotation, consumed_units=Decimal('1.5'),
+                start_datetime=utc_datetime(dt.date(2018, 1, start_day)),
+                end_datetime=utc_datetime(dt.date(2018, 1, end_day), end=True)
+            )
+
+    # not billed yet
+    for start_day, end_day in [(1, 14), (15, 28)]:
+        MeteredFeatureUnitsLogFactory.create(
+            subscription=subscription, metered_feature=metered_feature,
+            consumed_units=Decimal('1.5'),
+            start_datetime=utc_datetime(dt.date(2018, 2, start_day)),
+            end_datetime=utc_datetime(dt.date(2018, 2, end_day), end=True)
+        )
+
+    BillingLog.objects.create(subscription=subscription, billing_date=dt.date(2018, 2, 1),
+                              plan_billed_up_to=dt.date(2018, 2, 28),
+                              metered_features_billed_up_to=dt.date(2018, 1, 31))
+
+    return subscription
+
+
+def consumed_units(subscription, start_date, end_date, **filters):
+    return subscription.mf_log_entries.filter(
+        start_datetime__gte=utc_datetime(start_date),
+        end_datetime__lte=utc_datetime(end_date, end=True),
+        **filters
+    ).aggregate(total=Sum('consumed_units'))['total']
+
+
+@pytest.mark.django_db
+def test_compact_units_logs(subscription):
+    stats = compact_units_logs(archive=True)
+
+    assert stats == Counter(subscriptions=1, compacted=5, summary=2, archived=5)
+
+    january_logs = subscription.mf_log_entries.filter(start_datetime__month=1)
+    assert sorted([(log.annotation or '', log.consumed_units, log.start_datetime.date(),
+                    log.end_datetime.date()) for log in january_logs]) == [
+        ('', Decimal('4.5000'), dt.date(2018, 1, 1), dt.date(2018, 1, 31)),
+        ('eu', Decimal('3.0000'), dt.date(2018, 1, 1), dt.date(2018, 1, 31)),
+    ]
+
+    # the billing queries match the same units
+    assert consumed_units(subscription, dt.date(2018, 1, 1), dt.date(2018, 1, 31)) == \
+        Decimal('7.5000')
+    assert subscription.mf_log_entries.filter(start_datetime__month=2).count() == 2
+
+    archived_logs = MeteredFeatureUnitsLogArchive.objects.filter(annotation='eu')
+    assert archived_logs.count() == 2
+    assert {log.summary_log.consumed_units for log in archived_logs} == {Decimal('3.0000')}
+
+    # compacting again changes nothing
+    assert compact_units_logs(archive=True) == Counter(subscriptions=1)
+
+
+@pytest.mark.django_db
+def test_compact_units_logs_dry_run_and_without_archive(subscription):
+    assert compact_units_logs(dry_run=True) == Counter(subscriptions=1, compacted=5,
+                                                       summary=2)
+    assert MeteredFeatureUnitsLog.objects.count() == 7
+
+    assert compact_units_logs() == Counter(subscriptions=1, compacted=5, summary=2)
+    assert MeteredFeatureUnitsLog.objects.count() == 4
+    assert not MeteredFeatureUnitsLogArchive.objects.exists()
@@ -0,0 +1,101 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+
+import pytest
+
+from django.db.models.signals import pre_save
+from factory.django import mute_signals
+
+from silver.fixtures.factories import (
+    DocumentEntryFactory, PaymentMethodFactory, ProformaFactory, TransactionFactory
+)
+from silver.models import BillingDocumentBase, Invoice, Proforma, Transaction
+
+
+BALANCES = ['amount_paid_in_transaction_currency', 'amount_pending_in_transaction_currency',
+            'amount_to_be_charged_in_transaction_currency']
+
+
+@pytest.fixture
+def charged_proforma():
+    proforma = ProformaFactory.create()
+    DocumentEntryFactory.create(proforma=proforma, quantity=1, unit_price=Decimal('100.00'))
+    proforma.issue()
+    proforma.create_invoice()
+
+    payment_method = PaymentMethodFactory.create(customer=proforma.customer)
+    with mute_signals(pre_save):
+        for state, amount in [(Transaction.States.Settled, Decimal('20.00')),
+                              (Transaction.States.Settled, Decimal('5.50')),
+                              (Transaction.States.Pending, Decimal('10.00')),
+                              (Transaction.States.Initial, Decimal('7.00')),
+                              (Transaction.States.Failed, Decimal('30.00'))]:
+            TransactionFactory.create(state=state, amount=amount, proforma=proforma,
+                                      invoice=proforma.related_document,
+                                      payment_method=payment_method)
+
+    return proforma
+
+
+@pytest.mark.django_db
+def test_with_balances_matches_the_documents_transactions(charged_proforma):
+    proforma = charged_proforma
+    invoice = proforma.related_document
+
+    for document in [proforma, invoice]:
+        annotated = BillingDocumentBase.objects.with_balances().get(pk=document.pk)
+
+        assert annotated.paid_amount == Decimal('25.50')
+        assert annotated.pending_amount == Decimal('10.00')
+        assert annotated.charged_amount == Decimal('42.50')
+        assert annotated.outstanding_amount == (document.total_in_transaction_currency -
+                                                Decimal('42.50'))
+
+        for balance in BALANCES:
+            assert getattr(annotated, balance) == getattr(document, balance)
+
+
+@pytest.mark.django_db
+def test_with_balances_of_documents_without_transactions():
+    proforma = ProformaFactory.create()
+    DocumentEntryFactory.create(proforma=proforma, quantity=1, unit_price=Decimal('10.00'))
+
+    annotated = Proforma.objects.with_balances().get(pk=proforma.pk)
+
+    assert annotated.paid_amount == annotated.pending_amount == Decimal('0.00')
+    # the drafts' totals are not stored
+    assert annotated.outstanding_amount is None
+    assert (annotated.amount_to_be_charged_in_transaction_currency ==
+            proforma.total_in_transaction_currency)
+
+    proforma.issue()
+
+    annotated = Proforma.objects.with_balances().get(pk=proforma.pk)
+    assert annotated.outstanding_amount == proforma.total_in_transaction_currency
+
+
+@pytest.mark.django_db
+def test_with_balances_doesnt_query_the_transactions(charged_proforma,
+                                                     django_assert_num_queries):
+    invoices = list(Invoice.objects.with_balances().prefetch_related(None))
+
+    with django_assert_num_queries(0):
+        for invoice in invoices:
+            for balance in BALANCES:
+                getattr(invoice, balance)
@@ -19,9 +19,11 @@ from decimal import Decimal
 
 from six.moves import zip
 
+from mock import patch
+
 from django.test import TestCase
 
-from silver.models import DocumentEntry, Proforma, Invoice
+from silver.models import BillingDocumentBase, DocumentEntry, Proforma, Invoice
 from silver.fixtures.factories import (ProformaFactory, InvoiceFactory,
                                        DocumentEntryFactory, CustomerFactory)
 
@@ -75,7 +77,7 @@ class TestInvoice(TestCase):
         for clone_entry, original_entry in zip(clone.invoice_entries.all(),
                                                invoice.invoice_entries.all()):
             for entry in entry_fields:
-                if entry not in ('id', 'proforma', 'invoice'):
+                if entry not in ('id', 'proforma', 'invoice', 'updated_at'):
                     assert getattr(clone_entry, entry) == \
                         getattr(original_entry, entry)
         assert invoice.state == Invoice.STATES.PAID
@@ -275,3 +277,84 @@ class TestInvoice(TestCase):
         assert storno.state == storno.STATES.ISSUED
         assert storno.issue_date == date.today()
         assert not storno.due_date
+
+    def test_create_stornos_for_multiple_invoices(self):
+        invoices = []
+        for _ in range(3):
+            invoice = InvoiceFactory.create(
+                invoice_entries=DocumentEntryFactory.create_batch(2)
+            )
+            invoice.issue()
+            invoice.pay()
+            invoices.append(invoice)
+
+        stornos = Invoice.create_stornos(invoices)
+
+        assert len(stornos) == 3
+        for invoice, storno in zip(invoices, stornos):
+            assert storno.related_document == invoice
+            assert storno.customer == invoice.customer
+            assert storno.state == storno.STATES.DRAFT
+            assert -invoice.total == storno.total != 0
+            assert all(entry.description.startswith('Storno ')
+                       for entry in storno.invoice_entries.all())
+            assert storno.invoice_entries.count() == 2
+
+    def test_create_stornos_with_unallowed_invoice(self):
+        paid_invoice = InvoiceFactory.create(invoice_entries=[DocumentEntryFactory.create()])
+        paid_invoice.issue()
+        paid_invoice.pay()
+        draft_invoice = InvoiceFactory.create()
+
+        self.assertRaises(ValueError, Invoice.create_stornos, [paid_invoice, draft_invoice])
+        assert not Invoice.objects.filter(related_document__isnull=False).exists()
+
+    def test_clone_multiple_invoices_into_drafts(self):
+        invoices = [
+            InvoiceFactory.create(invoice_entries=DocumentEntryFactory.create_batch(count))
+            for count in (1, 2, 3)
+        ]
+        for invoice in invoices:
+            invoice.issue()
+
+        clones = Invoice.clone_into_drafts(invoices)
+
+        assert len(clones) == 3
+        for invoice, clone in zip(invoices, clones):
+            assert clone.pk != invoice.pk
+            assert clone.get_dirty_fields() == {}
+
+            clone = Invoice.objects.get(pk=clone.pk)
+            assert clone.series == invoice.provider.invoice_series
+            assert clone.number is None
+            assert clone.transaction_currency == invoice.transaction_currency
+            assert clone.state == clone.STATES.DRAFT
+            assert clone.customer == invoice.customer
+            assert clone.total == invoice.total
+            assert ([entry.description for entry in clone.invoice_entries.order_by('pk')] ==
+                    [entry.description for entry in invoice.invoice_entries.order_by('pk')])
+
+    def test_clones_get_their_own_primary_keys_despite_concurrent_inserts(self):
+        invoices = [
+            InvoiceFactory.create(invoice_entries=[DocumentEntryFactory.create()])
+            for _ in range(3)
+        ]
+        manager = BillingDocumentBase._base_manager
+        bulk_create = manager.bulk_create
+        concurrent_invoices = []
+
+        def bulk_create_with_concurrent_insert(*args, **kwargs):
+            created = bulk_create(*args, **kwargs)
+            concurrent_invoices.append(InvoiceFactory.create())
+
+            return created
+
+        with patch.object(manager, 'bulk_create', bulk_create_with_concurrent_insert):
+            clones = Invoice.clone_into_drafts(invoices)
+
+        assert concurrent_invoices[0].pk not in [clone.pk for clone in clones]
+        for invoice, clone in zip(invoices, clones):
+            clone = Invoice.objects.get(pk=clone.pk)
+            assert clone.customer == invoice.customer
+            assert clone.archived_customer == {}
+            assert clone.invoice_entries.count() == 1
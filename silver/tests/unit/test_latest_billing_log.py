@@ -0,0 +1,146 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+import pytest
+
+from silver.fixtures.factories import BillingLogFactory, SubscriptionFactory
+from silver.models import Subscription
+
+
+def create_billing_log(subscription, billing_date):
+    return BillingLogFactory.create(subscription=subscription, billing_date=billing_date,
+                                    invoice=None, proforma=None,
+                                    plan_billed_up_to=billing_date,
+                                    metered_features_billed_up_to=billing_date)
+
+
+def latest_billing_log_id(subscription):
+    return Subscription.objects.values_list('latest_billing_log', flat=True) \
+        .get(pk=subscription.pk)
+
+
+@pytest.mark.django_db
+def test_latest_billing_log_follows_the_created_billing_logs():
+    subscription = SubscriptionFactory.create()
+    assert subscription.is_billed_first_time
+
+    march = create_billing_log(subscription, dt.date(2018, 3, 1))
+    # an older billing log, created afterwards
+    create_billing_log(subscription, dt.date(2018, 2, 1))
+
+    assert latest_billing_log_id(subscription) == march.pk
+
+    subscription = Subscription.objects.get(pk=subscription.pk)
+    assert not subscription.is_billed_first_time
+    assert subscription.last_billing_log == march
+    assert subscription.last_billing_date == dt.date(2018, 3, 1)
+    assert subscription.billed_up_to_dates == {
+        'plan_billed_up_to': dt.date(2018, 3, 1),
+        'metered_features_billed_up_to': dt.date(2018, 3, 1),
+    }
+
+
+@pytest.mark.django_db
+def test_latest_billing_log_follows_the_updated_and_deleted_billing_logs():
+    subscription = SubscriptionFactory.create()
+    february = create_billing_log(subscription, dt.date(2018, 2, 1))
+    march = create_billing_log(subscription, dt.date(2018, 3, 1))
+
+    february.billing_date = dt.date(2018, 4, 1)
+    february.save()
+    assert latest_billing_log_id(subscription) == february.pk
+
+    february.delete()
+    assert latest_billing_log_id(subscription) == march.pk
+
+    march.delete()
+    assert latest_billing_log_id(subscription) is None
+
+
+@pytest.mark.django_db
+def test_saving_a_stale_subscription_keeps_its_latest_billing_log():
+    subscription = SubscriptionFactory.create()
+    stale_subscription = Subscription.objects.get(pk=subscription.pk)
+
+    billing_log = create_billing_log(subscription, dt.date(2018, 3, 1))
+
+    stale_subscription.description = 'Changed'
+    stale_subscription.save()
+
+    assert latest_billing_log_id(subscription) == billing_log.pk
+
+
+@pytest.mark.django_db
+def test_saving_a_subscription_without_billing_changes(django_assert_num_queries):
+    subscription = SubscriptionFactory.create()
+    subscription = Subscription.objects.get(pk=subscription.pk)
+
+    subscription.description = 'Changed'
+    # only the UPDATE, without reading the latest billing log or writing the billing dates
+    with django_assert_num_queries(1) as context:
+        subscription.save()
+
+    update = context.captured_queries[0]['sql']
+    assert 'latest_billing_log' not in update
+    assert 'next_plan_billing_date' not in update
+
+
+@pytest.mark.django_db
+def test_saving_a_subscription_keeps_the_latest_billing_log_set_by_the_caller():
+    subscription = SubscriptionFactory.create(state=Subscription.STATES.ACTIVE,
+                                              start_date=dt.date(2018, 1, 1))
+    billing_log = create_billing_log(subscription, dt.date(2018, 3, 1))
+    other_subscription = SubscriptionFactory.create()
+    other_billing_log = create_billing_log(other_subscription, dt.date(2018, 2, 1))
+
+    subscription = Subscription.objects.get(pk=subscription.pk)
+    assert subscription.latest_billing_log == billing_log
+
+    subscription.latest_billing_log = other_billing_log
+    subscription.save()
+
+    subscription = Subscription.objects.get(pk=subscription.pk)
+    assert subscription.latest_billing_log == other_billing_log
+    assert subscription.get_next_billing_dates() == {
+        'next_plan_billing_date': subscription.next_plan_billing_date,
+        'next_metered_features_billing_date': subscription.next_metered_features_billing_date,
+    }
+
+
+@pytest.mark.django_db
+def test_saving_a_deleted_subscription_inserts_it_again():
+    subscription = SubscriptionFactory.create()
+    subscription = Subscription.objects.get(pk=subscription.pk)
+    Subscription.objects.filter(pk=subscription.pk).delete()
+
+    subscription.description = 'Changed'
+    subscription.save()
+
+    assert Subscription.objects.get(pk=subscription.pk).description == 'Changed'
+
+
+@pytest.mark.django_db
+def test_saving_a_subscription_keeps_the_billing_dates_set_by_the_caller():
+    subscription = SubscriptionFactory.create()
+    subscription = Subscription.objects.get(pk=subscription.pk)
+
+    subscription.next_plan_billing_date = dt.date(2018, 5, 1)
+    subscription.save()
+
+    subscription = Subscription.objects.get(pk=subscription.pk)
+    assert subscription.next_plan_billing_date == dt.date(2018, 5, 1)
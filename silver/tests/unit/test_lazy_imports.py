@@ -0,0 +1,62 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import pycountry
+
+from benchmarks.bench_import_time import LAZY_MODULES, eagerly_imported, import_times
+from silver.models import Customer, Plan
+from silver.utils.international import LazyChoices, countries, currencies
+
+
+def test_heavy_dependencies_are_not_imported_on_setup():
+    times, _ = import_times()
+
+    assert 'silver.models.documents.pdf' in times
+    assert eagerly_imported(times) == []
+    assert set(LAZY_MODULES) >= {'xhtml2pdf', 'PyPDF2', 'pyvat'}
+
+
+def test_lazy_choices_are_loaded_on_first_use():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [('b', 'B'), ('a', 'A')]
+
+    choices = LazyChoices(load)
+    assert loads == []
+
+    assert list(choices) == [('a', 'A'), ('b', 'B')]
+    assert len(choices) == 2
+    assert choices[0] == ('a', 'A')
+    assert loads == [1]
+
+
+def test_international_choices():
+    assert list(countries) == sorted((country.alpha_2, country.name)
+                                     for country in pycountry.countries)
+    assert ('USD', 'USD (US Dollar)') in list(currencies)
+
+
+def test_lazy_choices_are_deconstructed_as_lists():
+    # keeps the migrations unchanged
+    _, _, _, kwargs = Plan._meta.get_field('currency').deconstruct()
+    assert kwargs['choices'] == list(currencies)
+    assert isinstance(kwargs['choices'], list)
+
+    _, _, _, kwargs = Customer._meta.get_field('country').deconstruct()
+    assert kwargs['choices'] == list(countries)
@@ -0,0 +1,232 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+
+import pytest
+
+from mock import patch
+
+from django.db import DatabaseError
+from django.db.models.signals import pre_save
+from factory.django import mute_signals
+
+from silver.fixtures.factories import (
+    DocumentEntryFactory, InvoiceFactory, PaymentMethodFactory, ProformaFactory,
+    TransactionFactory
+)
+from silver.ledger import customer_ledger_entries, rebuild_customer_ledger
+from silver.models import CustomerBalance, LedgerEntry, Transaction
+from silver.models.ledger import add_to_customer_balance
+
+
+def balances(customer):
+    return dict(CustomerBalance.objects.filter(customer=customer)
+                                       .values_list('currency', 'amount'))
+
+
+def create_document(factory, unit_price):
+    document = factory.create(currency='RON', transaction_currency='RON')
+    DocumentEntryFactory.create(quantity=1, unit_price=unit_price,
+                                **{document.kind: document})
+
+    return document
+
+
+@pytest.mark.django_db
+def test_ledger_follows_the_documents_and_transactions():
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+    proforma.issue()
+
+    total = proforma.total_in_transaction_currency
+    assert balances(customer) == {'RON': total}
+
+    # the invoice is accounted through its proforma
+    invoice = proforma.create_invoice()
+    assert balances(customer) == {'RON': total}
+
+    with mute_signals(pre_save):
+        transaction = TransactionFactory.create(
+            state=Transaction.States.Pending, amount=total, currency='RON', proforma=proforma,
+            invoice=invoice, payment_method=PaymentMethodFactory.create(customer=customer)
+        )
+    transaction.settle()
+
+    assert balances(customer) == {'RON': Decimal('0.00')}
+    invoice.refresh_from_db()
+    assert invoice.state == invoice.STATES.PAID
+
+    transaction.refund()
+    assert balances(customer) == {'RON': total}
+
+    assert list(LedgerEntry.objects.filter(customer=customer)
+                                   .values_list('kind', 'amount')) == [
+        (LedgerEntry.KINDS.DOCUMENT_ISSUED, total),
+        (LedgerEntry.KINDS.TRANSACTION_SETTLED, -total),
+        (LedgerEntry.KINDS.TRANSACTION_REFUNDED, total),
+    ]
+
+
+@pytest.mark.django_db
+def test_ledger_of_canceled_invoices_and_their_stornos():
+    invoice = create_document(InvoiceFactory, Decimal('50.00'))
+    customer = invoice.customer
+    invoice.issue()
+    invoice.cancel()
+
+    assert balances(customer) == {'RON': Decimal('0.00')}
+
+    # the canceled invoice is already accounted for
+    storno = invoice.create_storno()
+    storno.issue()
+
+    assert balances(customer) == {'RON': Decimal('0.00')}
+
+    paid_invoice = create_document(InvoiceFactory, Decimal('20.00'))
+    paid_invoice.customer = customer
+    paid_invoice.save()
+    paid_invoice.issue()
+    paid_invoice.pay()
+
+    assert balances(customer) == {'RON': paid_invoice.total_in_transaction_currency}
+
+    # the storno of a paid invoice is accounted for
+    paid_invoice.create_storno().issue()
+
+    assert balances(customer) == {'RON': Decimal('0.00')}
+
+
+@pytest.mark.django_db
+def test_rebuilt_ledger_matches_the_recorded_one():
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+    proforma.issue()
+
+    invoice = create_document(InvoiceFactory, Decimal('30.00'))
+    invoice.customer = customer
+    invoice.save()
+    invoice.issue()
+    invoice.cancel()
+
+    with mute_signals(pre_save):
+        transaction = TransactionFactory.create(
+            state=Transaction.States.Pending, amount=Decimal('10.00'), currency='RON',
+            proforma=proforma, invoice=None,
+            payment_method=PaymentMethodFactory.create(customer=customer)
+        )
+    transaction.settle()
+
+    recorded = balances(customer)
+    entries = customer_ledger_entries(customer)
+
+    assert sorted((entry.kind, entry.amount) for entry in entries) == sorted(
+        LedgerEntry.objects.filter(customer=customer).values_list('kind', 'amount')
+    )
+    assert rebuild_customer_ledger(customer, verify=True) == []
+
+    CustomerBalance.objects.filter(customer=customer).update(amount=Decimal('1.00'))
+
+    assert rebuild_customer_ledger(customer, verify=True) == [
+        ('RON', Decimal('1.00'), recorded['RON'])
+    ]
+    assert balances(customer) == {'RON': Decimal('1.00')}
+
+    rebuild_customer_ledger(customer)
+
+    assert balances(customer) == recorded
+    assert LedgerEntry.objects.filter(customer=customer).count() == len(entries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('state, expected_kinds', [
+    (Transaction.States.Settled, [LedgerEntry.KINDS.TRANSACTION_SETTLED]),
+    (Transaction.States.Refunded, [LedgerEntry.KINDS.TRANSACTION_SETTLED,
+                                   LedgerEntry.KINDS.TRANSACTION_REFUNDED]),
+])
+def test_ledger_of_transactions_created_settled_or_refunded(state, expected_kinds):
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+    proforma.issue()
+
+    with mute_signals(pre_save):
+        TransactionFactory.create(
+            state=state, amount=Decimal('10.00'), currency='RON', proforma=proforma,
+            invoice=None, payment_method=PaymentMethodFactory.create(customer=customer)
+        )
+
+    assert list(LedgerEntry.objects.filter(transaction__isnull=False)
+                                   .values_list('kind', flat=True)) == expected_kinds
+    assert rebuild_customer_ledger(customer, verify=True) == []
+
+
+@pytest.mark.django_db
+def test_ledger_of_transactions_settled_without_transition():
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+    proforma.issue()
+
+    with mute_signals(pre_save):
+        transaction = TransactionFactory.create(
+            state=Transaction.States.Pending, amount=Decimal('10.00'), currency='RON',
+            proforma=proforma, invoice=None,
+            payment_method=PaymentMethodFactory.create(customer=customer)
+        )
+
+    transaction.state = Transaction.States.Settled
+    transaction.save()
+    # saving it again doesn't account for it twice
+    transaction.save()
+
+    assert balances(customer) == {'RON': proforma.total_in_transaction_currency -
+                                  Decimal('10.00')}
+    assert rebuild_customer_ledger(customer, verify=True) == []
+
+
+@pytest.mark.django_db
+def test_customer_balances_are_upserted():
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+
+    add_to_customer_balance(customer.pk, 'RON', Decimal('10.00'))
+    add_to_customer_balance(customer.pk, 'RON', Decimal('-2.50'))
+    add_to_customer_balance(customer.pk, 'EUR', Decimal('1.00'))
+
+    assert balances(customer) == {'RON': Decimal('7.50'), 'EUR': Decimal('1.00')}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_settled_transaction_is_rolled_back_along_with_its_ledger_entry():
+    proforma = create_document(ProformaFactory, Decimal('100.00'))
+    customer = proforma.customer
+    proforma.issue()
+    total = proforma.total_in_transaction_currency
+
+    with mute_signals(pre_save):
+        transaction = TransactionFactory.create(
+            state=Transaction.States.Pending, amount=None, currency='RON', proforma=proforma,
+            payment_method=PaymentMethodFactory.create(customer=customer)
+        )
+
+    with patch('silver.models.ledger.add_to_customer_balance', side_effect=DatabaseError):
+        with pytest.raises(DatabaseError):
+            transaction.settle()
+
+    transaction.refresh_from_db()
+    assert transaction.state == Transaction.States.Pending
+    assert balances(customer) == {'RON': total}
+    assert not LedgerEntry.objects.filter(kind=LedgerEntry.KINDS.TRANSACTION_SETTLED).exists()
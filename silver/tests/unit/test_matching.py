@@ -0,0 +1,103 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+from decimal import Decimal
+
+import pytest
+
+from silver.fixtures.factories import (BonusFactory, CustomerFactory, DiscountFactory,
+                                       PlanFactory, ProductCodeFactory, SubscriptionFactory)
+from silver.matching import BonusesIndex, DiscountsIndex
+from silver.models import Discount
+from silver.models.bonuses import Bonus
+
+
+@pytest.fixture()
+def subscriptions(db):
+    customers = CustomerFactory.create_batch(2)
+    plans = PlanFactory.create_batch(2)
+
+    return [SubscriptionFactory.create(customer=customer, plan=plan)
+            for customer in customers for plan in plans]
+
+
+def test_discounts_index_matches_discounts_queries(subscriptions):
+    first, second, third, _ = subscriptions
+
+    DiscountFactory.create()
+    DiscountFactory.create(enabled=False)
+    DiscountFactory.create().customers.add(first.customer)
+    DiscountFactory.create().plans.add(first.plan, third.plan)
+    DiscountFactory.create().subscriptions.add(second)
+    discount = DiscountFactory.create()
+    discount.customers.add(first.customer)
+    discount.plans.add(second.plan)
+    discount.subscriptions.add(second, third)
+
+    index = DiscountsIndex()
+    for subscription in subscriptions:
+        expected = Discount.for_subscription(subscription).filter(enabled=True).order_by('pk')
+        matches = index.for_subscription(subscription)
+
+        assert ([(discount.pk, discount.matched_subscriptions) for discount in matches] ==
+                [(discount.pk, discount.matched_subscriptions) for discount in expected])
+
+
+def test_bonuses_index_matches_bonuses_queries(subscriptions):
+    first, second, _, fourth = subscriptions
+
+    BonusFactory.create(amount=Decimal('10'))
+    BonusFactory.create(amount=Decimal('10')).filter_customers.add(fourth.customer)
+    BonusFactory.create(amount=Decimal('10')).filter_plans.add(second.plan)
+    BonusFactory.create(amount=Decimal('10')).filter_product_codes.add(
+        first.plan.product_code, ProductCodeFactory.create()
+    )
+    bonus = BonusFactory.create(amount=Decimal('10'))
+    bonus.filter_subscriptions.add(first, fourth)
+    bonus.filter_product_codes.add(fourth.plan.product_code)
+
+    index = BonusesIndex()
+    for subscription in subscriptions:
+        expected = Bonus.for_subscription(subscription).order_by('pk')
+        matches = index.for_subscription(subscription)
+
+        assert ([(bonus.pk, bonus._filtered_product_codes) for bonus in matches] ==
+                [(bonus.pk, bonus._filtered_product_codes) for bonus in expected])
+
+
+def test_index_returns_copies(subscriptions):
+    DiscountFactory.create()
+
+    index = DiscountsIndex()
+    discount = index.for_subscription(subscriptions[0])[0]
+    discount.matching_subscriptions = [subscriptions[0]]
+
+    assert not isinstance(index.for_subscription(subscriptions[1])[0].matching_subscriptions,
+                          list)
+
+
+def test_index_is_built_through_a_fixed_number_of_queries(subscriptions,
+                                                          django_assert_num_queries):
+    for _ in range(5):
+        DiscountFactory.create().customers.add(subscriptions[0].customer)
+
+    # the discounts, then one query per filter
+    with django_assert_num_queries(4):
+        index = DiscountsIndex()
+
+    with django_assert_num_queries(0):
+        for subscription in subscriptions:
+            index.for_subscription(subscription)
@@ -0,0 +1,121 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from collections import defaultdict
+
+import pytest
+
+from silver.metrics import Counter, Histogram, Gauge, RedisMetricsBackend, render_metrics
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrbyfloat(self, name, key, amount):
+        key = key.encode('utf-8')
+        self.hashes[name][key] = str(float(self.hashes[name].get(key, 0)) + amount).encode()
+
+    def hgetall(self, name):
+        return dict(self.hashes[name])
+
+
+class FakePipeline(object):
+    def __init__(self, connection):
+        self.connection = connection
+        self.calls = []
+
+    def hincrbyfloat(self, *args):
+        self.calls.append(args)
+
+    def execute(self):
+        for args in self.calls:
+            self.connection.hincrbyfloat(*args)
+
+
+def test_histogram(metrics_backend):
+    registry = []
+    histogram = Histogram('test_duration_seconds', 'Test duration.', labels=('kind', ),
+                          buckets=(0.1, 1), registry=registry)
+    histogram.observe(0.05, kind='invoice')
+    histogram.observe(0.5, kind='invoice')
+    histogram.observe(2, kind='invoice')
+
+    assert render_metrics(registry) == (
+        '# HELP test_duration_seconds Test duration.\n'
+        '# TYPE test_duration_seconds histogram\n'
+        'test_duration_seconds_bucket{kind="invoice",le="0.1"} 1.0\n'
+        'test_duration_seconds_bucket{kind="invoice",le="1.0"} 2.0\n'
+        'test_duration_seconds_bucket{kind="invoice",le="+Inf"} 3.0\n'
+        'test_duration_seconds_count{kind="invoice"} 3.0\n'
+        'test_duration_seconds_sum{kind="invoice"} 2.55\n'
+    )
+
+
+def test_counter_and_gauge(metrics_backend):
+    registry = []
+    counter = Counter('test_updates_total', 'Test updates.', labels=('type', ), registry=registry)
+    counter.inc(type='absolute')
+    counter.inc(2, type='relative')
+
+    Gauge('test_backlog', 'Test backlog.', lambda: {('initial', ): 3}, labels=('state', ),
+          registry=registry)
+
+    assert render_metrics(registry).splitlines()[2:] == [
+        'test_updates_total{type="absolute"} 1.0',
+        'test_updates_total{type="relative"} 2.0',
+        '# HELP test_backlog Test backlog.',
+        '# TYPE test_backlog gauge',
+        'test_backlog{state="initial"} 3.0',
+    ]
+
+
+def test_metric_labels_are_validated(metrics_backend):
+    counter = Counter('test_labels_total', 'Test labels.', labels=('type', ), registry=[])
+
+    with pytest.raises(ValueError):
+        counter.inc(kind='absolute')
+
+
+def test_backend_errors_are_not_propagated(monkeypatch):
+    class BrokenBackend(object):
+        def increment(self, samples):
+            raise ConnectionError
+
+    monkeypatch.setattr('silver.metrics.get_metrics_backend', lambda: BrokenBackend())
+
+    Counter('test_broken_total', 'Test broken backend.', registry=[]).inc()
+
+
+def test_redis_backend_aggregates_samples(monkeypatch):
+    connection = FakeRedis()
+    monkeypatch.setattr('silver.metrics.get_metrics_backend',
+                        lambda: RedisMetricsBackend(connection))
+
+    histogram = Histogram('test_redis_seconds', 'Test Redis.', buckets=(1, ), registry=[])
+    histogram.observe(0.5)
+    histogram.observe(0.5)
+
+    assert RedisMetricsBackend(connection).collect() == {
+        ('test_redis_seconds_bucket', (('le', '1.0'), )): 2.0,
+        ('test_redis_seconds_bucket', (('le', '+Inf'), )): 2.0,
+        ('test_redis_seconds_sum', ()): 1.0,
+        ('test_redis_seconds_count', ()): 2.0,
+    }
@@ -0,0 +1,143 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from decimal import Decimal
+
+import pytest
+
+from freezegun import freeze_time
+from mock import patch
+
+from silver.documents_generator import DocumentsGenerator
+from silver.fixtures.factories import (CustomerFactory, MeteredFeatureFactory, PlanFactory,
+                                       SubscriptionFactory)
+from silver.models import BillingLog, Plan, Subscription
+
+
+def create_subscription(start_date=dt.date(2018, 1, 10), trial_end=None, **plan_kwargs):
+    plan_kwargs.setdefault('interval', Plan.INTERVALS.MONTH)
+    plan_kwargs.setdefault('interval_count', 1)
+    plan = PlanFactory.create(generate_after=0, amount=Decimal('10.00'),
+                              metered_features=[MeteredFeatureFactory.create()], **plan_kwargs)
+
+    subscription = SubscriptionFactory.create(plan=plan, start_date=start_date,
+                                              trial_end=trial_end,
+                                              customer=CustomerFactory.create(
+                                                  consolidated_billing=False
+                                              ))
+    subscription.activate()
+    subscription.save()
+
+    return subscription
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('plan_kwargs, trial_end', [
+    ({'prebill_plan': True}, None),
+    ({'prebill_plan': False}, None),
+    ({'prebill_plan': True}, dt.date(2018, 1, 24)),
+    ({'prebill_plan': False, 'interval': Plan.INTERVALS.WEEK}, None),
+    ({'prebill_plan': True, 'alternative_metered_features_interval': Plan.INTERVALS.MONTH,
+      'alternative_metered_features_interval_count': 1, 'interval_count': 3}, None),
+])
+def test_subscriptions_are_never_billed_before_their_next_billing_dates(plan_kwargs, trial_end):
+    with freeze_time('2018-01-10'):
+        subscription = create_subscription(trial_end=trial_end, **plan_kwargs)
+
+    billing_date = subscription.start_date
+    while billing_date < dt.date(2018, 5, 1):
+        with freeze_time(billing_date + dt.timedelta(hours=1)):
+            subscription.refresh_from_db()
+            plan_due = subscription.should_plan_be_billed(billing_date)
+            mfs_due = subscription.should_mfs_be_billed(billing_date)
+
+            if plan_due:
+                assert subscription.next_plan_billing_date <= billing_date
+            if mfs_due:
+                assert subscription.next_metered_features_billing_date <= billing_date
+            if plan_due or mfs_due:
+                assert Subscription.objects.filter(Subscription.possibly_due(billing_date),
+                                                   pk=subscription.pk).exists()
+
+            DocumentsGenerator().generate(billing_date=billing_date)
+
+        billing_date += dt.timedelta(days=1)
+
+    assert BillingLog.objects.filter(subscription=subscription).count() >= 3
+
+
+@pytest.mark.django_db
+def test_not_due_subscriptions_are_not_checked():
+    with freeze_time('2018-01-10'):
+        subscription = create_subscription(prebill_plan=True)
+
+    with freeze_time('2018-01-10 01:00'):
+        DocumentsGenerator().generate(billing_date=dt.date(2018, 1, 10))
+
+    subscription.refresh_from_db()
+    assert subscription.next_plan_billing_date == dt.date(2018, 2, 1)
+    assert subscription.next_metered_features_billing_date == dt.date(2018, 2, 1)
+
+    with freeze_time('2018-01-20 01:00'), \
+            patch.object(Subscription, 'should_be_billed') as should_be_billed:
+        DocumentsGenerator().generate(billing_date=dt.date(2018, 1, 20))
+
+    assert not should_be_billed.called
+
+    with freeze_time('2018-01-20 01:00'), \
+            patch.object(Subscription, 'should_be_billed', return_value=False) as should_be_billed:
+        DocumentsGenerator().generate(billing_date=dt.date(2018, 1, 20), force_generate=True)
+
+    assert should_be_billed.called
+
+
+@pytest.mark.django_db
+def test_next_billing_dates_are_kept_in_sync():
+    with freeze_time('2018-01-10'):
+        subscription = create_subscription(prebill_plan=True)
+
+    assert subscription.next_plan_billing_date == dt.date(2018, 1, 10)
+
+    BillingLog.objects.create(subscription=subscription, billing_date=dt.date(2018, 1, 10),
+                              plan_billed_up_to=dt.date(2018, 1, 31),
+                              metered_features_billed_up_to=dt.date(2018, 1, 9))
+    subscription.refresh_from_db()
+    assert subscription.next_plan_billing_date == dt.date(2018, 2, 1)
+    assert subscription.next_metered_features_billing_date == dt.date(2018, 2, 1)
+
+    # the plan's settings may change the billing cycles
+    subscription.plan.save()
+    subscription.refresh_from_db()
+    assert subscription.next_plan_billing_date is None
+    assert Subscription.objects.filter(Subscription.possibly_due(dt.date(2018, 1, 11))).exists()
+
+    subscription.save()
+    assert subscription.next_plan_billing_date == dt.date(2018, 2, 1)
+
+    with freeze_time('2018-01-15'):
+        subscription.cancel(when=dt.date(2018, 1, 15))
+        subscription.save()
+
+    subscription.refresh_from_db()
+    assert subscription.next_plan_billing_date is None
+    assert subscription.next_metered_features_billing_date is None
+
+    BillingLog.objects.all().delete()
+    subscription.refresh_from_db()
+    assert subscription.next_plan_billing_date is None
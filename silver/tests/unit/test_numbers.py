@@ -0,0 +1,124 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import random
+
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+import pytest
+
+from silver.utils.numbers import as_ratio, quantize_fraction, quantize_product, to_fraction
+
+
+# the property tests compare the helpers with the Fraction based expressions they replace, for
+# random amounts, percents and proration fractions
+SEED, EXAMPLES = 0, 5000
+
+
+def random_amount(rng):
+    # money and units amounts, with up to 4 decimals, as stored in the database
+    places = rng.choice([0, 2, 4])
+    amount = Decimal(rng.randint(-10 ** 9, 10 ** 9)).scaleb(-places)
+
+    return amount if rng.random() > 0.1 else abs(amount)
+
+
+def random_percent(rng):
+    return Decimal(rng.randint(0, 10000)).scaleb(-2) / Decimal(100)
+
+
+def random_proration_fraction(rng):
+    days = rng.choice([28, 29, 30, 31, 7, 365, 366])
+    fraction = Fraction(rng.randint(0, days), days)
+
+    if rng.random() < 0.3:
+        # discounts applied to already prorated entries
+        fraction /= Fraction(rng.randint(1, days), days)
+
+    return fraction
+
+
+@pytest.fixture()
+def rng():
+    return random.Random(SEED)
+
+
+def test_quantize_product_matches_the_fraction_expressions(rng):
+    for _ in range(EXAMPLES):
+        percent, amount = random_percent(rng), random_amount(rng)
+        fraction = random_proration_fraction(rng)
+
+        expected = quantize_fraction(Fraction(str(percent)) * Fraction(str(amount)) * fraction)
+        result = quantize_product(percent, amount, fraction)
+
+        assert str(result) == str(expected), (percent, amount, fraction)
+
+        expected = quantize_fraction(Fraction(str(amount)) * fraction)
+        assert str(quantize_product(amount, fraction)) == str(expected), (amount, fraction)
+
+
+def test_quantize_product_rounds_like_quantize_fraction(rng):
+    # ratios close to the rounding boundaries, including ones rounded twice by the Decimal
+    # division and the quantization
+    for _ in range(EXAMPLES):
+        denominator = rng.choice([2, 3, 7, 10 ** 5, 2 * 10 ** 4, 3 * 10 ** 28, 10 ** 30 + 1])
+        numerator = rng.randint(-10 ** 6, 10 ** 6) * denominator // 10 ** 4 + rng.randint(-2, 2)
+        fraction = Fraction(numerator, denominator)
+
+        assert str(quantize_product(fraction)) == str(quantize_fraction(fraction)), fraction
+
+    assert str(quantize_product(Decimal('0.00005'))) == '0.0000'
+    assert str(quantize_product(Decimal('0.00015'))) == '0.0002'
+    assert str(quantize_product(Decimal('-0.00001'))) == '-0.0000'
+
+
+def test_quantize_product_with_other_decimals(rng):
+    for _ in range(EXAMPLES // 10):
+        amount, fraction = random_amount(rng), random_proration_fraction(rng)
+
+        for decimals in (2, 6):
+            assert (
+                str(quantize_product(amount, fraction, decimals=decimals)) ==
+                str(quantize_fraction(Fraction(str(amount)) * fraction, decimals=decimals))
+            )
+
+
+def test_to_fraction_matches_the_string_conversion(rng):
+    for _ in range(EXAMPLES):
+        amount = random_amount(rng)
+
+        assert to_fraction(amount) == Fraction(str(amount))
+
+    for value in [0, 7, Decimal('-0'), Decimal('1.50'), Decimal('1E+3'), 0.1, '2.25',
+                  Fraction(1, 3)]:
+        assert to_fraction(value) == Fraction(str(value))
+
+
+def test_as_ratio_doesnt_convert_floats_exactly():
+    # like Fraction(str(0.1)), not Fraction(0.1)
+    assert as_ratio(0.1) == (1, 10)
+
+
+def test_quantize_product_raises_like_quantize_fraction_on_overflow():
+    amount = Decimal(10) ** 30
+
+    with pytest.raises(InvalidOperation):
+        quantize_fraction(Fraction(str(amount)))
+
+    with pytest.raises(InvalidOperation):
+        quantize_product(amount)
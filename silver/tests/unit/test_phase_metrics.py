@@ -0,0 +1,65 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import pytest
+
+from silver.fixtures.factories import CustomerFactory
+from silver.models import Customer
+from silver.utils.profiling import PhaseMetrics
+
+
+@pytest.mark.django_db
+def test_phase_metrics():
+    metrics = PhaseMetrics(['selection', 'billing'])
+
+    with metrics.phase('selection'):
+        list(Customer.objects.all())
+
+    for _ in range(2):
+        with metrics.phase('billing'):
+            CustomerFactory.create()
+
+    metrics.increment('customers', 2)
+    metrics.increment('customers')
+
+    result = metrics.as_dict()
+    assert list(result['phases']) == ['selection', 'billing']
+    assert result['phases']['selection']['queries'] == 1
+    assert result['phases']['selection']['calls'] == 1
+    assert result['phases']['billing']['calls'] == 2
+    assert result['phases']['billing']['queries'] >= 2
+    assert result['counters'] == {'customers': 3}
+
+
+@pytest.mark.django_db
+def test_nested_phases_are_accounted_to_the_innermost_phase():
+    metrics = PhaseMetrics()
+
+    with metrics.phase('outer'):
+        list(Customer.objects.all())
+
+        with metrics.phase('inner'):
+            list(Customer.objects.all())
+            list(Customer.objects.all())
+
+        list(Customer.objects.all())
+
+    phases = metrics.as_dict()['phases']
+    assert phases['outer']['queries'] == 2
+    assert phases['inner']['queries'] == 2
+    assert phases['outer']['seconds'] >= 0
+    assert phases['inner']['seconds'] >= 0
@@ -0,0 +1,95 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+from mock import patch
+
+from django.test import override_settings
+
+from silver.fixtures.test_fixtures import PAYMENT_PROCESSORS, throttled_processor
+from silver.payment_processors.throttling import LocalThrottleBackend, ProcessorThrottle
+
+
+def test_unlimited_processor_is_never_throttled():
+    backend = LocalThrottleBackend()
+    throttle = ProcessorThrottle('triggered', backend=backend)
+
+    assert not throttle.is_limited
+    assert all(throttle.acquire() for _ in range(100))
+    assert throttle.capacity() is None
+    assert backend.get_queue_depths() == {}
+
+
+def test_concurrency_limit():
+    throttle = ProcessorThrottle('triggered', max_concurrency=2,
+                                 backend=LocalThrottleBackend())
+
+    first_slot = throttle.acquire()
+    second_slot = throttle.acquire()
+
+    assert first_slot and second_slot
+    assert throttle.acquire() is None
+    assert throttle.capacity() == 0
+
+    throttle.release(first_slot)
+
+    assert throttle.capacity() == 1
+    assert throttle.acquire()
+
+
+@patch('silver.payment_processors.throttling.time.time')
+def test_concurrency_slots_expire(mocked_time):
+    mocked_time.return_value = 1000
+    throttle = ProcessorThrottle('triggered', max_concurrency=1, slot_ttl=10,
+                                 backend=LocalThrottleBackend())
+
+    assert throttle.acquire()
+    assert throttle.acquire() is None
+
+    mocked_time.return_value = 1010
+
+    assert throttle.acquire()
+
+
+@patch('silver.payment_processors.throttling.time.time')
+def test_rate_limit_refills_tokens(mocked_time):
+    mocked_time.return_value = 1000
+    throttle = ProcessorThrottle('triggered', rate=2, burst=3,
+                                 backend=LocalThrottleBackend())
+
+    assert all(throttle.acquire() for _ in range(3))
+    assert throttle.acquire() is None
+    assert throttle.capacity() == 0
+
+    mocked_time.return_value = 1000.5
+
+    assert throttle.capacity() == 1
+    assert throttle.acquire()
+    assert throttle.acquire() is None
+
+    mocked_time.return_value = 1100
+
+    assert throttle.capacity() == 3
+
+
+@override_settings(PAYMENT_PROCESSORS=PAYMENT_PROCESSORS)
+def test_throttle_limits_are_read_from_settings():
+    throttle = ProcessorThrottle.for_processor(throttled_processor)
+
+    assert throttle.is_limited
+    assert throttle.max_concurrency == 2
+    assert throttle.rate == 3
+    assert throttle.burst == 3
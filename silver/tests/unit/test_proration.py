@@ -0,0 +1,136 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import datetime as dt
+
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from mock import patch
+
+from silver.fixtures.factories import (BonusFactory, DiscountFactory, PlanFactory,
+                                       SubscriptionFactory)
+from silver.models import Plan, Subscription
+from silver.models.documents.entries import OriginType
+from silver.proration import get_proration_cache, proration_cache, ProrationCache
+
+
+START_DATE, END_DATE = dt.date(2019, 1, 10), dt.date(2019, 1, 31)
+
+
+@pytest.fixture()
+def subscription(db):
+    plan = PlanFactory.create(interval=Plan.INTERVALS.MONTH, interval_count=1)
+
+    return SubscriptionFactory.create(plan=plan, start_date=dt.date(2019, 1, 1),
+                                      trial_end=None, state=Subscription.STATES.ACTIVE)
+
+
+def test_proration_cache_is_only_active_within_the_block():
+    assert get_proration_cache() is None
+
+    with proration_cache() as cache:
+        assert get_proration_cache() is cache
+
+        with proration_cache() as nested_cache:
+            assert nested_cache is cache
+
+        assert get_proration_cache() is cache
+
+    assert get_proration_cache() is None
+
+
+def test_subscription_proration_is_computed_once_per_interval(subscription):
+    expected = subscription._get_proration_status_and_fraction(START_DATE, END_DATE,
+                                                               OriginType.Plan)
+    assert expected == (True, Fraction(22, 31))
+
+    with patch.object(Subscription, '_compute_proration_status_and_fraction',
+                      autospec=True, return_value=expected) as compute:
+        with proration_cache() as cache:
+            for _ in range(3):
+                assert subscription._get_proration_status_and_fraction(
+                    START_DATE, END_DATE, OriginType.Plan
+                ) == expected
+
+            subscription._get_proration_status_and_fraction(START_DATE, END_DATE,
+                                                            OriginType.MeteredFeature)
+
+    assert compute.call_count == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_discount_and_bonus_prorations_are_cached(subscription):
+    discount = DiscountFactory.create(percentage=Decimal(10), start_date=dt.date(2019, 1, 20))
+    bonus = BonusFactory.create(amount=Decimal(10), start_date=dt.date(2019, 1, 20))
+
+    expected_discount = discount.extra_proration_fraction(subscription, START_DATE, END_DATE,
+                                                          OriginType.Plan)
+    expected_bonus = bonus.extra_proration_fraction(subscription, START_DATE, END_DATE,
+                                                    OriginType.MeteredFeature)
+
+    with proration_cache() as cache:
+        for _ in range(2):
+            assert discount.extra_proration_fraction(subscription, START_DATE, END_DATE,
+                                                     OriginType.Plan) == expected_discount
+            assert bonus.extra_proration_fraction(subscription, START_DATE, END_DATE,
+                                                  OriginType.MeteredFeature) == expected_bonus
+
+        assert cache.hits == 2
+
+
+def test_saving_an_object_invalidates_its_cached_prorations(subscription):
+    discount = DiscountFactory.create(percentage=Decimal(10))
+    other_discount = DiscountFactory.create(percentage=Decimal(10))
+
+    with proration_cache() as cache:
+        discount.extra_proration_fraction(subscription, START_DATE, END_DATE, OriginType.Plan)
+        other_discount.extra_proration_fraction(subscription, START_DATE, END_DATE,
+                                                OriginType.Plan)
+        # the discounts' computations include the subscription's proration
+        assert len(cache) == 3
+
+        discount.start_date = dt.date(2019, 1, 20)
+        discount.save()
+        assert len(cache) == 2
+
+        assert discount.extra_proration_fraction(
+            subscription, START_DATE, END_DATE, OriginType.Plan
+        )[2].start_date == dt.date(2019, 1, 20)
+
+        subscription.save()
+        assert len(cache) == 0
+
+
+def test_saving_a_plan_clears_the_proration_cache(subscription):
+    with proration_cache() as cache:
+        subscription._get_proration_status_and_fraction(START_DATE, END_DATE, OriginType.Plan)
+
+        subscription.plan.save()
+        assert len(cache) == 0
+
+
+def test_unsaved_objects_are_not_cached(subscription):
+    cache = ProrationCache()
+    unsaved_discount = DiscountFactory.build()
+
+    cache.get(unsaved_discount, subscription, START_DATE, END_DATE, OriginType.Plan,
+              lambda: 1)
+
+    assert len(cache) == 0
@@ -0,0 +1,75 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from silver.fixtures.factories import InvoiceFactory, ProformaFactory, ProviderFactory
+from silver.models import BillingDocumentBase, Invoice, Proforma
+
+
+@pytest.mark.django_db
+def test_changing_the_series_updates_the_draft_documents_at_once():
+    provider = ProviderFactory.create(invoice_series='OLDINV', proforma_series='OLDPRO')
+
+    with freeze_time('2018-01-01'):
+        draft_invoices = InvoiceFactory.create_batch(3, provider=provider)
+        draft_proformas = ProformaFactory.create_batch(2, provider=provider)
+        issued_invoice = InvoiceFactory.create(provider=provider)
+        issued_invoice.issue()
+        issued_invoice.save()
+
+    provider.invoice_series = 'NEWINV'
+    provider.proforma_series = 'NEWPRO'
+    with CaptureQueriesContext(connection) as queries:
+        provider.save()
+
+    # the old series, an update per documents kind, the provider's update and the reset of its
+    # subscriptions' next billing dates
+    assert len(queries) == 5
+
+    assert set(Invoice.objects.filter(pk__in=[invoice.pk for invoice in draft_invoices])
+               .values_list('series', 'number')) == {('NEWINV', None)}
+    assert set(Proforma.objects.filter(pk__in=[proforma.pk for proforma in draft_proformas])
+               .values_list('series', 'number')) == {('NEWPRO', None)}
+
+    issued_invoice.refresh_from_db()
+    assert (issued_invoice.series, issued_invoice.number) == ('OLDINV', 1)
+
+    # the drafts are part of the changes feed
+    updated_at = dict(BillingDocumentBase.objects.values_list('pk', 'updated_at'))
+    assert updated_at[draft_invoices[0].pk] > updated_at[issued_invoice.pk]
+
+    # the drafts are numbered within their new series when issued
+    draft_invoices[0].refresh_from_db()
+    draft_invoices[0].issue()
+    draft_invoices[0].save()
+    assert draft_invoices[0].series_number == 'NEWINV-1'
+
+
+@pytest.mark.django_db
+def test_unchanged_series_dont_update_the_drafts():
+    provider = ProviderFactory.create()
+    InvoiceFactory.create(provider=provider)
+
+    provider.name = 'Changed'
+    with CaptureQueriesContext(connection) as queries:
+        provider.save()
+
+    assert len(queries) == 3
@@ -20,7 +20,7 @@ from __future__ import absolute_import
 from django.conf.urls import include, re_path
 from django.contrib import admin
 
-from silver.views import (pay_transaction_view, complete_payment_view,
+from silver.views import (pay_transaction_view, complete_payment_view, metrics_view,
                           InvoiceAutocomplete, ProformaAutocomplete,
                           PaymentMethodAutocomplete, PlanAutocomplete,
                           CustomerAutocomplete, ProviderAutocomplete)
@@ -35,6 +35,8 @@ urlpatterns = [
                                namespace='rest_framework')),
     re_path(r'', include('silver.api.urls')),
 
+    re_path(r'^metrics/$', metrics_view, name='metrics'),
+
     re_path(r'pay/(?P<token>[0-9a-zA-Z-_\.]+)/$',
             pay_transaction_view, name='payment'),
     re_path(r'pay/(?P<token>[0-9a-zA-Z-_\.]+)/complete$',
@@ -40,6 +40,17 @@ class INTERVALS(object):
     YEAR = 'year'
 
 
+def billing_dates(from_date, to_date):
+    """
+    Yields the dates from `from_date` to `to_date`, both included.
+    """
+
+    date = from_date
+    while date <= to_date:
+        yield date
+        date += ONE_DAY
+
+
 def next_month(date):
     return date + ONE_MONTH
 
@@ -14,11 +14,50 @@
 
 from __future__ import absolute_import
 
-import pycountry
 
+class LazyChoices(object):
+    """
+        A sorted list of choices, built on first use, so that importing the models doesn't load
+        pycountry's databases. It can be passed as a model or form field's `choices`, and it is
+        deconstructed as the same list in the migrations.
+    """
 
-countries = sorted([(country.alpha_2, country.name) for country in
-                    pycountry.countries])
-currencies = sorted([(currency.alpha_3,
-                      u'{} ({})'.format(currency.alpha_3, currency.name))
-                     for currency in pycountry.currencies])
+    def __init__(self, load):
+        self._load = load
+        self._choices = None
+
+    @property
+    def choices(self):
+        if self._choices is None:
+            self._choices = sorted(self._load())
+
+        return self._choices
+
+    def __iter__(self):
+        return iter(self.choices)
+
+    def __len__(self):
+        return len(self.choices)
+
+    def __getitem__(self, index):
+        return self.choices[index]
+
+    def __repr__(self):
+        return repr(self.choices)
+
+
+def _countries():
+    import pycountry
+
+    return [(country.alpha_2, country.name) for country in pycountry.countries]
+
+
+def _currencies():
+    import pycountry
+
+    return [(currency.alpha_3, u'{} ({})'.format(currency.alpha_3, currency.name))
+            for currency in pycountry.currencies]
+
+
+countries = LazyChoices(_countries)
+currencies = LazyChoices(_currencies)
@@ -24,21 +24,79 @@ class UnsavedForeignKey(models.ForeignKey):
 
 class AutoDateTimeField(models.DateTimeField):
     def pre_save(self, model_instance, add):
-        return timezone.now()
+        value = timezone.now()
+        setattr(model_instance, self.attname, value)
+
+        return value
 
 
 class AutoCleanModelMixin:
+    _STATES_ATTRIBUTES = ('_loaded_attributes', '_initial_state', '_cleaned_state', '_saved_state')
+
+    _initial_state = None
+    _cleaned_state = None
+    _saved_state = None
+
     def _init_states(self):
-        self.initial_state = self.current_state
+        # Building the states for every loaded instance is costly, so only a (cheap) shallow copy
+        # of the instance attributes is taken here. The states are built out of it on first use.
+        loaded_attributes = self.__dict__.copy()
+        for attribute in self._STATES_ATTRIBUTES:
+            loaded_attributes.pop(attribute, None)
+            self.__dict__.pop(attribute, None)
 
-        self.cleaned_state = {} if not self.pk else self.initial_state.copy()
-        self.saved_state = {} if not self.pk else self.initial_state.copy()
+        self._loaded_attributes = loaded_attributes
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self._init_states()
 
+    def _get_loaded_state(self):
+        attributes = self._loaded_attributes
+
+        return {
+            field.name: attributes[field.attname]
+            for field in self._meta.fields
+            if field.attname in attributes
+        }
+
+    def _get_loaded_pk(self):
+        return self._loaded_attributes.get(self._meta.pk.attname)
+
+    @property
+    def initial_state(self):
+        if self._initial_state is None:
+            self._initial_state = self._get_loaded_state()
+
+        return self._initial_state
+
+    @initial_state.setter
+    def initial_state(self, value):
+        self._initial_state = value
+
+    @property
+    def cleaned_state(self):
+        if self._cleaned_state is None:
+            self._cleaned_state = {} if not self._get_loaded_pk() else self._get_loaded_state()
+
+        return self._cleaned_state
+
+    @cleaned_state.setter
+    def cleaned_state(self, value):
+        self._cleaned_state = value
+
+    @property
+    def saved_state(self):
+        if self._saved_state is None:
+            self._saved_state = {} if not self._get_loaded_pk() else self._get_loaded_state()
+
+        return self._saved_state
+
+    @saved_state.setter
+    def saved_state(self, value):
+        self._saved_state = value
+
     @property
     def current_state(self):
         return {
@@ -84,6 +142,12 @@ class AutoCleanModelMixin:
 
         super().save(*args, **kwargs)
 
+        # the auto updated fields are set while saving, after the instance has been cleaned
+        if self._cleaned_state is not None:
+            for field in self._meta.fields:
+                if isinstance(field, AutoDateTimeField) and field.attname in self.__dict__:
+                    self._cleaned_state[field.name] = self.__dict__[field.attname]
+
         self.initial_state = self.current_state.copy()
         if "update_fields" not in kwargs:
             self.saved_state = self.current_state.copy()
@@ -2,5 +2,64 @@ from decimal import Decimal
 from fractions import Fraction
 
 
+_QUANTUMS = {}
+
+
+def _quantum(decimals):
+    try:
+        return _QUANTUMS[decimals]
+    except KeyError:
+        quantum = _QUANTUMS[decimals] = Decimal(f".{'0'*decimals}")
+        return quantum
+
+
+def as_ratio(value):
+    """
+        :return: A (numerator, denominator) tuple of integers equal to the given int, Decimal
+        or Fraction, without normalizing it. Other values (floats, strings) are converted
+        through their string representation, like `Fraction(str(value))`.
+    """
+
+    if isinstance(value, (int, Decimal, Fraction)):
+        return value.as_integer_ratio()
+
+    return Fraction(str(value)).as_integer_ratio()
+
+
+def to_fraction(value) -> Fraction:
+    """
+        Equivalent of `Fraction(str(value))`, without the string round trip for ints, Decimals
+        and Fractions.
+    """
+
+    if isinstance(value, Fraction):
+        return value
+
+    return Fraction(*as_ratio(value))
+
+
+def quantize_ratio(numerator: int, denominator: int, decimals=4) -> Decimal:
+    return (Decimal(numerator) / Decimal(denominator)).quantize(_quantum(decimals))
+
+
 def quantize_fraction(f: Fraction, decimals=4) -> Decimal:
-    return (Decimal(f.numerator) / Decimal(f.denominator)).quantize(Decimal(f".{'0'*decimals}"))
+    return quantize_ratio(f.numerator, f.denominator, decimals)
+
+
+def quantize_product(*factors, decimals=4) -> Decimal:
+    """
+        Multiplies the given money amounts, percents and proration fractions as integer ratios
+        and rounds the result once, like `quantize_fraction` does for the product of their
+        fractions, e.g. `quantize_fraction(Fraction(str(amount)) * fraction)`.
+
+        The Decimal division is correctly rounded, so not normalizing the intermediate ratio
+        doesn't change the result.
+    """
+
+    numerator, denominator = 1, 1
+    for factor in factors:
+        factor_numerator, factor_denominator = as_ratio(factor)
+        numerator *= factor_numerator
+        denominator *= factor_denominator
+
+    return quantize_ratio(numerator, denominator, decimals)
@@ -0,0 +1,86 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import absolute_import
+
+import time
+
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from silver.utils.queries import QueryCounter
+
+
+class PhaseMetrics(object):
+    """
+        Collects the time spent and the queries made in each phase of a run, along with
+        arbitrary counters. Phases may be entered multiple times; their metrics add up.
+
+        metrics = PhaseMetrics(['selection', 'billing'])
+        with metrics.phase('selection'):
+            ...
+        metrics.increment('customers')
+    """
+
+    def __init__(self, phases=()):
+        self.phases = OrderedDict(
+            (name, {'seconds': 0.0, 'queries': 0, 'calls': 0}) for name in phases
+        )
+        self.counters = Counter()
+        self._active_phases = []
+
+    @contextmanager
+    def phase(self, name):
+        metrics = self.phases.setdefault(name, {'seconds': 0.0, 'queries': 0, 'calls': 0})
+
+        # Time spent within nested phases is only accounted to the innermost phase
+        if self._active_phases:
+            self._pause(self._active_phases[-1])
+
+        active_phase = {'metrics': metrics, 'counter': QueryCounter(name).__enter__(),
+                        'started_at': time.perf_counter()}
+        self._active_phases.append(active_phase)
+        try:
+            yield
+        finally:
+            self._active_phases.pop()
+            self._pause(active_phase)
+            active_phase['counter'].__exit__(None, None, None)
+            metrics['calls'] += 1
+
+            if self._active_phases:
+                self._resume(self._active_phases[-1])
+
+    def _pause(self, active_phase):
+        active_phase['metrics']['seconds'] += time.perf_counter() - active_phase['started_at']
+        active_phase['metrics']['queries'] += active_phase['counter'].count
+        active_phase['counter'].queries = []
+
+    def _resume(self, active_phase):
+        # the queries recorded in the meantime belong to the nested phase
+        active_phase['counter'].queries = []
+        active_phase['started_at'] = time.perf_counter()
+
+    def increment(self, counter, value=1):
+        self.counters[counter] += value
+
+    def as_dict(self):
+        return {
+            'phases': OrderedDict(
+                (name, dict(metrics, seconds=round(metrics['seconds'], 6)))
+                for name, metrics in self.phases.items()
+            ),
+            'counters': dict(self.counters),
+        }
@@ -0,0 +1,135 @@
+# Copyright (c) 2017 Presslabs SRL
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+
+import logging
+import time
+
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter(object):
+    """
+        Context manager recording the queries executed on a database connection within a code
+        region: their number, the total time spent in the database and the duplicated SQL.
+
+        Unlike `django.test.utils.CaptureQueriesContext`, it doesn't require `DEBUG` to be on.
+
+        with QueryCounter('billing') as counter:
+            ...
+        counter.count, counter.total_time, counter.duplicates
+    """
+
+    def __init__(self, name=None, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.using = using
+        self.queries = []
+
+    def _record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': tuple(params) if params and not many else params,
+                'time': time.perf_counter() - start
+            })
+
+    def __enter__(self):
+        self.queries = []
+        self._wrapper = connections[self.using].execute_wrapper(self._record)
+        self._wrapper.__enter__()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+
+        logger.debug('%s', self)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['time'] for query in self.queries)
+
+    @property
+    def duplicates(self):
+        """
+            :return: A dict mapping the SQL statements executed more than once with the exact
+            same parameters to the number of times they were executed.
+        """
+
+        counter = Counter((query['sql'], repr(query['params'])) for query in self.queries)
+
+        return {sql: count for (sql, _), count in counter.items() if count > 1}
+
+    @property
+    def repeated_statements(self):
+        """
+            :return: A dict mapping the SQL statements executed more than once, regardless of
+            their parameters, to the number of times they were executed. These usually point to
+            queries made once per row (N+1).
+        """
+
+        counter = Counter(query['sql'] for query in self.queries)
+
+        return {sql: count for sql, count in counter.items() if count > 1}
+
+    def report(self, limit=10):
+        lines = [str(self)]
+
+        repeated = sorted(self.repeated_statements.items(), key=lambda item: -item[1])
+        for sql, count in repeated[:limit]:
+            lines.append('  {}x {}'.format(count, sql))
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return '{}: {} queries ({} duplicated) in {:.1f}ms'.format(
+            self.name or 'Queries', self.count, sum(self.duplicates.values()),
+            self.total_time * 1000
+        )
+
+
+class QueryBudget(QueryCounter):
+    """
+        A QueryCounter raising QueryBudgetExceeded when the code region executes more than
+        `max_queries` queries.
+    """
+
+    def __init__(self, max_queries, name=None, using=DEFAULT_DB_ALIAS):
+        super(QueryBudget, self).__init__(name=name, using=using)
+        self.max_queries = max_queries
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(QueryBudget, self).__exit__(exc_type, exc_value, traceback)
+
+        if exc_type is None and self.count > self.max_queries:
+            raise QueryBudgetExceeded('Query budget of {} exceeded.\n{}'.format(
+                self.max_queries, self.report()
+            ))
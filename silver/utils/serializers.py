@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from copy import deepcopy
 
 from rest_framework import serializers
@@ -51,3 +52,17 @@ class AutoCleanSerializerMixin:
             **{field: value for field, value in data.items()
                if field not in reverse_relation}
         )
+
+
+class FieldsSelectionSerializerMixin:
+    # Only serialize the fields listed in the `fields` context entry (see `?fields=`), if any
+    def get_fields(self):
+        fields = super().get_fields()
+
+        selected_fields = self.context.get('fields')
+        if not selected_fields:
+            return fields
+
+        return OrderedDict(
+            (name, field) for name, field in fields.items() if name in selected_fields
+        )
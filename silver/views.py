@@ -24,13 +24,19 @@ from six.moves import reduce
 from furl import furl
 from dal import autocomplete
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.db.models.functions import Concat
 from django.db.models import Q, F, Value
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, condition
+
+from silver.api.conditional import get_etag
+from silver.metrics import render_metrics
 
 from silver.models.plans import Plan
 from silver.models.billing_entities import Customer, Provider
@@ -42,18 +48,58 @@ from silver.payment_processors import get_instance
 from silver.utils.decorators import get_transaction_from_token
 
 
+def document_updated_at(model, lookup_url_kwarg):
+    def updated_at(request, **kwargs):
+        # memoized, as both the ETag and the Last-Modified conditions need it
+        if not hasattr(request, '_document_updated_at'):
+            request._document_updated_at = model.objects.filter(
+                pk=kwargs[lookup_url_kwarg]
+            ).prefetch_related(None).values_list('updated_at', flat=True).order_by().first()
+
+        return request._document_updated_at
+
+    def etag(request, **kwargs):
+        document_updated_at = updated_at(request, **kwargs)
+
+        return get_etag(request, document_updated_at.isoformat()) if document_updated_at else None
+
+    return condition(etag_func=etag, last_modified_func=updated_at)
+
+
 @login_required
+@document_updated_at(Proforma, 'proforma_id')
 def proforma_pdf(request, proforma_id):
     proforma = get_object_or_404(Proforma, id=proforma_id)
     return HttpResponseRedirect(proforma.pdf.url)
 
 
 @login_required
+@document_updated_at(Invoice, 'invoice_id')
 def invoice_pdf(request, invoice_id):
     invoice = get_object_or_404(Invoice, id=invoice_id)
     return HttpResponseRedirect(invoice.pdf.url)
 
 
+@require_GET
+def metrics_view(request):
+    """
+        Exposes the metrics in the Prometheus text format, to staff users or to the requests
+        authenticated by the `SILVER_METRICS_TOKEN` setting (`Authorization: Bearer <token>`).
+    """
+
+    token = getattr(settings, 'SILVER_METRICS_TOKEN', None)
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+
+    authorized = (
+        (request.user.is_authenticated and request.user.is_staff) or
+        (token and constant_time_compare(authorization, 'Bearer {}'.format(token)))
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @csrf_exempt
 @get_transaction_from_token
 def complete_payment_view(request, transaction, expired=None):